@@ -41,6 +41,8 @@ class Settings(BaseSettings):
     elevenlabs_voice_id_ar: str = ""
     elevenlabs_voice_id_fr: str = ""
     elevenlabs_voice_id_en: str = ""
+    # TTS model (e.g. eleven_multilingual_v2); empty = ElevenLabs default. Part of the audio cache key
+    elevenlabs_model_id: str = ""
     reminder_send_voice: bool = True
 
     # Email (SMTP) — for sending reminder emails with voice attachment
@@ -50,6 +52,9 @@ class Settings(BaseSettings):
     smtp_user: str = ""
     smtp_password: str = ""
     smtp_from: str = ""
+    # STARTTLS after connecting (false for a local test server); login only when smtp_user is set
+    smtp_starttls: bool = True
+    smtp_timeout_seconds: int = 30
 
     # Twilio — SMS and voice call reminders
     twilio_sms_enabled: bool = False
@@ -57,15 +62,80 @@ class Settings(BaseSettings):
     twilio_account_sid: str = ""
     twilio_auth_token: str = ""
     twilio_phone_number: str = ""
+    # One shared client; create requests paced per second (0 = unpaced) to the account/number limits
+    twilio_sms_per_second: float = 1.0
+    twilio_calls_per_second: float = 1.0
+    # Retries on 429/5xx, waiting Retry-After (else backoff * 2^n); longer waits are left to the outbox retry
+    twilio_max_retries: int = 3
+    twilio_retry_backoff_seconds: float = 1.0
+    twilio_retry_max_wait_seconds: float = 30.0
+    twilio_timeout_seconds: float = 30.0
     # Public URL of this backend (required for Twilio voice: Twilio fetches TwiML from here)
     app_base_url: str = ""
 
     # Media: directory for storing reminder audio (relative to backend root or absolute)
     reminder_media_dir: str = "media/reminders"
 
+    # Reminder pipeline: period groups run concurrently; at most this many calls in flight
+    # per provider (Minimax text, ElevenLabs voice, SMTP, Twilio SMS/voice)
+    reminder_llm_concurrency: int = 4
+    reminder_tts_concurrency: int = 2
+    reminder_smtp_concurrency: int = 2
+    reminder_twilio_concurrency: int = 4
+    # Minimax reminder texts are generated once per (language, period, vaccine set, model) with
+    # name/date placeholders and reused by every child until they are this old
+    reminder_text_template_ttl_hours: int = 24
+    # Missing templates of one language are generated this many per Minimax call (JSON array reply)
+    reminder_llm_batch_size: int = 25
+
+    # Reminder outbox (reminder_jobs). When the worker is enabled (python -m app.services.reminder_outbox),
+    # /reminders/send and new children only enqueue jobs; otherwise the request drains them inline
+    reminder_worker_enabled: bool = False
+    reminder_job_batch_size: int = 50
+    # Due reminder groups are scanned and enqueued this many per query/commit (bounded memory)
+    reminder_scan_batch_size: int = 1000
+    reminder_job_lease_seconds: int = 300
+    # Worst case for one reminder group in one pipeline phase (provider timeouts, Twilio retry
+    # waits). A lease is renewed before each phase and lasts at least one phase of the batch:
+    # ceil(batch / scarcest provider concurrency) * this, or reminder_job_lease_seconds if longer
+    reminder_job_group_seconds: int = 60
+    reminder_job_max_attempts: int = 5
+    # Retry delay: base * 2^(attempt - 1), capped
+    reminder_job_backoff_seconds: int = 60
+    reminder_job_backoff_max_seconds: int = 21600
+    reminder_worker_poll_seconds: float = 5.0
+
     # Telegram: bot token for admin region notifications (set TELEGRAM_BOT_TOKEN in .env)
     telegram_bot_token: str = ""
 
+    # Coverage cache (in-process): entries are fresh for ttl, then served stale for up to
+    # stale seconds while one background recompute refreshes them; LRU-bounded
+    coverage_cache_ttl_seconds: int = 300
+    coverage_cache_stale_seconds: int = 3600
+    coverage_cache_max_entries: int = 256
+
+    # Reference data cache (templates, regions, national stock): invalidated on writes in this
+    # process; reloaded after this many seconds to pick up writes from other processes
+    reference_cache_ttl_seconds: int = 300
+
+    # Demand forecast: weeks ahead, and how far back uncompleted (overdue) doses still count
+    forecast_horizon_weeks: int = 12
+    forecast_overdue_days: int = 90
+
+    # Coverage report snapshots retention: keep the newest N per vaccine, plus one per day
+    # for the last daily_days and one per ISO week for the last weekly_weeks
+    coverage_report_keep_latest: int = 7
+    coverage_report_keep_daily_days: int = 30
+    coverage_report_keep_weekly_weeks: int = 52
+
+    # Analytics engine: "sql" (rollup tables) or "numpy" (columnar snapshot, requires numpy).
+    # Snapshots are written under analytics_snapshot_dir and refreshed incrementally when older
+    # than max_age (and every analytics_snapshot_refresh_minutes by the scheduler)
+    analytics_engine: str = "sql"
+    analytics_snapshot_dir: str = "data/analytics"
+    analytics_snapshot_max_age_seconds: int = 900
+    analytics_snapshot_refresh_minutes: int = 10
+
     # CORS: origins allowed to access the API (comma-separated in env, or default below)
     cors_origins: str = "http://localhost:5173,http://localhost:3000,https://jelba.vercel.app"
 
@@ -34,7 +34,7 @@ def get_db() -> Generator[Session, None, None]:
 
 
 def ensure_sqlite_columns() -> None:
-    """Add missing columns to existing SQLite tables (vaccine_templates, child_vaccinations)."""
+    """Add missing columns and indexes to existing SQLite tables."""
     if "sqlite" not in DATABASE_URL:
         return
     with engine.connect() as conn:
@@ -82,4 +82,35 @@ def ensure_sqlite_columns() -> None:
         )
         if r.fetchone() is None:
             conn.execute(text("ALTER TABLE children ADD COLUMN region_id INTEGER REFERENCES regions(id)"))
+        # children: add effective_region_id (denormalized region) and backfill it
+        r = conn.execute(
+            text("SELECT 1 FROM pragma_table_info('children') WHERE name = 'effective_region_id'")
+        )
+        if r.fetchone() is None:
+            conn.execute(text("ALTER TABLE children ADD COLUMN effective_region_id INTEGER"))
+        conn.execute(
+            text(
+                "UPDATE children SET effective_region_id = COALESCE(region_id, "
+                "(SELECT parents.region_id FROM parents WHERE parents.id = children.parent_id)) "
+                "WHERE effective_region_id IS NULL"
+            )
+        )
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_children_effective_region_id ON children (effective_region_id)")
+        )
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_child_vaccinations_child_id ON child_vaccinations (child_id)")
+        )
+        # coverage_reports: add encoding (compressed payloads) and the latest-lookup index
+        r = conn.execute(
+            text("SELECT 1 FROM pragma_table_info('coverage_reports') WHERE name = 'encoding'")
+        )
+        if r.fetchone() is None:
+            conn.execute(text("ALTER TABLE coverage_reports ADD COLUMN encoding TEXT NOT NULL DEFAULT 'json'"))
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_coverage_reports_vaccine_calculated "
+                "ON coverage_reports (vaccine_name, calculated_at)"
+            )
+        )
         conn.commit()
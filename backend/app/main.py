@@ -32,6 +32,10 @@ if settings.seed_fake_data:
     from app.services.seed_fake_data import seed_fake_data
     seed_fake_data()
 
+# Build coverage aggregates (rebuilt when seeding may have rewritten children/vaccinations)
+from app.services.aggregate_service import ensure_coverage_aggregates
+ensure_coverage_aggregates(force=settings.seed_fake_data or settings.replace_vaccine_templates)
+
 # Seed default admin user (skips if an admin already exists)
 from app.services.seed_admin import seed_admin
 seed_admin()
@@ -1,20 +1,38 @@
 """SQLAlchemy ORM models. Import order: Region first (FK from Parent/Child)."""
 from app.models.region import Region
 from app.models.national_stock import NationalStock
+from app.models.stock_movement import StockMovement
+from app.models.stock_balance import StockBalance
 from app.models.telegram_log import TelegramLog
 from app.models.coverage_report import CoverageReport
+from app.models.coverage_rollup import CoverageRollup
+from app.models.coverage_cube import CoverageCube
+from app.models.daily_completion import DailyCompletion
 from app.models.parent import Parent
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
 from app.models.vaccine_template import VaccineTemplate
+from app.models.reminder_audio import ReminderAudio
+from app.models.reminder_text_template import ReminderTextTemplate
+from app.models.reminder_job import ReminderJob
+from app.models.reminder_delivery import ReminderDelivery
 
 __all__ = [
     "Region",
     "NationalStock",
+    "StockMovement",
+    "StockBalance",
     "TelegramLog",
     "CoverageReport",
+    "CoverageRollup",
+    "CoverageCube",
+    "DailyCompletion",
     "Parent",
     "Child",
     "ChildVaccination",
     "VaccineTemplate",
+    "ReminderAudio",
+    "ReminderTextTemplate",
+    "ReminderJob",
+    "ReminderDelivery",
 ]
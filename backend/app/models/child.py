@@ -1,10 +1,11 @@
 """Child model."""
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, event, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
+from app.models.parent import Parent
 
 
 class Child(Base):
@@ -21,6 +22,11 @@ class Child(Base):
     region_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("regions.id"), nullable=True
     )
+    # Denormalized region_id or parent's region_id (maintained by the event below, and by
+    # aggregate_service.set_parent_region when the parent moves) so analytics filter on one
+    # indexed column without joining parents. No FK: it would make the Region.children
+    # relationship ambiguous.
+    effective_region_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
     )
@@ -33,3 +39,14 @@ class Child(Base):
         cascade="all, delete-orphan",
     )
 
+
+@event.listens_for(Child, "before_insert")
+@event.listens_for(Child, "before_update")
+def _set_effective_region(mapper, connection, target: Child) -> None:
+    if target.region_id is not None:
+        target.effective_region_id = target.region_id
+    else:
+        target.effective_region_id = connection.execute(
+            select(Parent.region_id).where(Parent.id == target.parent_id)
+        ).scalar()
+
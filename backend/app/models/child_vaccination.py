@@ -12,7 +12,7 @@ class ChildVaccination(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     child_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("children.id"), nullable=False
+        Integer, ForeignKey("children.id"), nullable=False, index=True
     )
     vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
     vaccine_group: Mapped[str] = mapped_column(String, nullable=False, default="")  # e.g. 'Hépatite B (HB)'
@@ -0,0 +1,33 @@
+"""Coverage cube per (region, vaccine, birth cohort month, gender), maintained incrementally on writes."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CoverageCube(Base):
+    __tablename__ = "coverage_cube"
+    __table_args__ = (
+        UniqueConstraint(
+            "region_id", "vaccine_name", "cohort_month", "gender", name="uq_coverage_cube_cell"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    region_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("regions.id"), nullable=False
+    )
+    vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Child's birth month as 'YYYY-MM' ('' when birthdate is unknown)
+    cohort_month: Mapped[str] = mapped_column(String, nullable=False)
+    # Child's gender as stored on the child ('' when unknown)
+    gender: Mapped[str] = mapped_column(String, nullable=False)
+    # ChildVaccination rows in this cell
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Completed ChildVaccination rows in this cell
+    completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
@@ -1,7 +1,7 @@
-"""Cached coverage report (optional, for daily refresh)."""
+"""Coverage report snapshots (daily refresh and refresh=true), compacted by retention policy."""
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy import DateTime, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -9,13 +9,18 @@ from app.database import Base
 
 class CoverageReport(Base):
     __tablename__ = "coverage_reports"
+    # Latest-per-vaccine lookup and compaction scan this index, not the whole table
+    __table_args__ = (
+        Index("ix_coverage_reports_vaccine_calculated", "vaccine_name", "calculated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     vaccine_name: Mapped[str] = mapped_column(String, nullable=False, index=True)
     calculated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
     )
-    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON, or base64 zlib JSON
+    encoding: Mapped[str] = mapped_column(String, default="json", nullable=False)  # json | zlib
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
     )
@@ -0,0 +1,27 @@
+"""Coverage rollup per (region, vaccine), maintained incrementally on writes."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CoverageRollup(Base):
+    __tablename__ = "coverage_rollup"
+    __table_args__ = (UniqueConstraint("region_id", "vaccine_name", name="uq_coverage_rollup_region_vaccine"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    region_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("regions.id"), nullable=False
+    )
+    vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Children registered in the region (same for every vaccine of that region)
+    registered: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # ChildVaccination rows for this vaccine in the region
+    record_total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Completed ChildVaccination rows for this vaccine in the region
+    completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
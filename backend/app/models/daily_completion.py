@@ -0,0 +1,25 @@
+"""Completed doses per (region, vaccine, day) with running totals, maintained on completion."""
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DailyCompletion(Base):
+    __tablename__ = "daily_completions"
+    # Also serves (region_id, vaccine_name, day <= ?) lookups of the running total
+    __table_args__ = (
+        UniqueConstraint("region_id", "vaccine_name", "day", name="uq_daily_completions_region_vaccine_day"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    region_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("regions.id"), nullable=False
+    )
+    vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)  # completed_at date (UTC)
+    completed_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Completed doses for (region, vaccine) on or before this day
+    cumulative_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -19,7 +19,8 @@ class Parent(Base):
     preferred_language: Mapped[str | None] = mapped_column(String, nullable=True)
     # Admin-only access to /admin/* endpoints
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    # Region (12 Moroccan regions) for immunity monitor; child inherits if not set
+    # Region (12 Moroccan regions) for immunity monitor; child inherits if not set.
+    # Change it with aggregate_service.set_parent_region so the children's counts move too.
     region_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("regions.id"), nullable=True
     )
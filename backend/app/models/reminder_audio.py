@@ -0,0 +1,26 @@
+"""Synthesized reminder audio, stored once per content hash and shared by vaccinations."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ReminderAudio(Base):
+    __tablename__ = "reminder_audio"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # sha256 of (text, voice id, model id, language)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    # File name in the reminder media directory (what ChildVaccination.reminder_audio_path holds)
+    path: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    voice_id: Mapped[str] = mapped_column(String, nullable=False)
+    model_id: Mapped[str] = mapped_column(String, nullable=False, default="")
+    lang: Mapped[str] = mapped_column(String, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # ChildVaccination rows whose reminder_audio_path points at this file
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
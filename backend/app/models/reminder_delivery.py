@@ -0,0 +1,32 @@
+"""Outcome of each reminder delivery (email, SMS, voice call) per (child, period, due_date) group."""
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ReminderDelivery(Base):
+    __tablename__ = "reminder_deliveries"
+    __table_args__ = (
+        Index("ix_reminder_deliveries_group", "child_id", "period_label", "due_date", "channel"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Group key as in reminder_jobs; no FK so the audit trail outlives a deleted child
+    child_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    period_label: Mapped[str] = mapped_column(String, nullable=False)
+    due_date: Mapped[date] = mapped_column(Date, nullable=False)
+    child_vaccination_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    channel: Mapped[str] = mapped_column(String, nullable=False)  # email | sms | voice
+    recipient: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)  # sent | failed | deferred
+    # Twilio message/call SID when the provider accepted the request
+    provider_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    # HTTP attempts made (Twilio retries on 429/5xx)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
@@ -0,0 +1,34 @@
+"""Reminder outbox: one job per (child, period, due_date) reminder group, claimed by workers with leases."""
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ReminderJob(Base):
+    __tablename__ = "reminder_jobs"
+    __table_args__ = (Index("ix_reminder_jobs_status_next_attempt", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # "<child_id>:<period_label>:<due_date>": a group is enqueued (and sent) at most once
+    idempotency_key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    # No FK: jobs of a deleted child are simply completed with nothing to send
+    child_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    period_label: Mapped[str] = mapped_column(String, nullable=False)
+    due_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")  # pending | leased | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    lease_owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Sent item (JSON) once done; null if there was nothing left to send
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
@@ -0,0 +1,26 @@
+"""LLM-generated reminder text per (language, period, vaccine set, model), with name/date placeholders."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ReminderTextTemplate(Base):
+    __tablename__ = "reminder_text_templates"
+    __table_args__ = (
+        UniqueConstraint("lang", "period_label", "vaccine_names", "model", name="uq_reminder_text_template_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    lang: Mapped[str] = mapped_column(String, nullable=False)
+    period_label: Mapped[str] = mapped_column(String, nullable=False)
+    # Sorted vaccine names joined with ", "
+    vaccine_names: Mapped[str] = mapped_column(String, nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    # Text with {child_name} and {due_date} placeholders
+    template: Mapped[str] = mapped_column(Text, nullable=False)
+    generated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
@@ -0,0 +1,24 @@
+"""Materialized stock balance per (region, vaccine), updated with every ledger movement."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class StockBalance(Base):
+    __tablename__ = "stock_balances"
+    __table_args__ = (UniqueConstraint("region_id", "vaccine_name", name="uq_stock_balance_region_vaccine"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    region_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("regions.id"), nullable=False
+    )
+    vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Sum of stock_movements.quantity for this region and vaccine (negative if doses were
+    # administered before the receipts were recorded)
+    balance: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
@@ -0,0 +1,28 @@
+"""Append-only stock ledger: receipts, transfers and administered doses per vaccine and location."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    __table_args__ = (Index("ix_stock_movements_vaccine_region", "vaccine_name", "region_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    vaccine_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Location whose balance moves (NULL = national store, balance in national_stock)
+    region_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("regions.id"), nullable=True
+    )
+    # Signed dose count: + into the location, - out of it
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)  # receipt | transfer | administered
+    # Source of the movement, e.g. child_vaccination id for administered doses
+    child_vaccination_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    note: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
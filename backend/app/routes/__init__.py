@@ -3,8 +3,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.region import Region
-from app.models.vaccine_template import VaccineTemplate
+from app.services.reference_cache import get_reference_data
 
 router = APIRouter()
 
@@ -18,15 +17,13 @@ def api_root():
 @router.get("/vaccines", response_model=list[str])
 def list_vaccines(db: Session = Depends(get_db)):
     """List distinct vaccine names (for admin and public dropdown)."""
-    rows = db.query(VaccineTemplate.vaccine_name).distinct().order_by(VaccineTemplate.vaccine_name).all()
-    return [r[0] for r in rows]
+    return sorted(get_reference_data(db).vaccine_names)
 
 
 @router.get("/regions")
 def list_regions(db: Session = Depends(get_db)):
     """List regions (for signup region selector, public)."""
-    regions = db.query(Region).order_by(Region.id).all()
-    return [{"id": r.id, "name": r.name} for r in regions]
+    return [{"id": r.id, "name": r.name} for r in get_reference_data(db).regions]
 
 
 from . import child_vaccination
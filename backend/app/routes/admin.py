@@ -1,20 +1,33 @@
-"""Admin-only routes: coverage, supply, region detail, Telegram generate/send."""
+"""Admin-only routes: coverage, analytics, supply, stock ledger, region detail, Telegram generate/send."""
 from datetime import date, datetime, timedelta
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
-from app.models.parent import Parent
 from app.models.region import Region
-from app.models.vaccine_template import VaccineTemplate
-from app.services.coverage_service import cache_coverage_report, get_coverage
-from app.services.supply_service import get_supply
+from app.models.stock_movement import StockMovement
+from app.services.coverage_service import (
+    DEFAULT_ON_TIME_DAYS,
+    DROPOUT_PAIRS,
+    cache_coverage_report,
+    get_coverage,
+    get_coverage_cube,
+    get_coverage_history,
+    get_coverage_matrix,
+    get_coverage_timeseries,
+    get_dropout,
+)
+from app.services.forecast_service import get_forecast
+from app.services.reference_cache import get_reference_data
+from app.services.stock_service import record_receipt, stock_balances, transfer_stock
+from app.services.supply_service import get_supply, get_supply_all
 from app.services.telegram_service import (
     generate_telegram_text,
     send_to_region,
@@ -44,13 +57,130 @@ def admin_coverage(
         refresh=refresh,
         mode=mode,
     )
-    if not data and db.query(VaccineTemplate).filter(VaccineTemplate.vaccine_name == vaccine).first() is None:
+    if not data and not get_reference_data(db).has_vaccine(vaccine):
         raise HTTPException(status_code=400, detail="Vaccine not found")
     if refresh and data:
         cache_coverage_report(db, vaccine, data)
     return data
 
 
+@router.get("/coverage/matrix")
+def admin_coverage_matrix(
+    refresh: bool = Query(False, description="Force recompute from raw tables"),
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    mode: Literal["registered_children", "vaccination_records"] = Query("registered_children"),
+    db: Session = Depends(get_db),
+):
+    """Coverage for every region x vaccine in one response (landing dashboard)."""
+    return get_coverage_matrix(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        use_cache=True,
+        refresh=refresh,
+        mode=mode,
+    )
+
+
+@router.get("/coverage/timeseries")
+def admin_coverage_timeseries(
+    vaccine: list[str] | None = Query(None, description="Vaccine name(s); repeat the parameter, omit for all"),
+    bucket: Literal["day", "week", "month"] = Query("week"),
+    date_from: date | None = Query(None, description="Default: one year before date_to"),
+    date_to: date | None = Query(None, description="Default: today"),
+    region_id: int | None = Query(None),
+    mode: Literal["registered_children", "vaccination_records"] = Query("registered_children"),
+    db: Session = Depends(get_db),
+):
+    """Completed counts and cumulative coverage per region and vaccine, bucketed by day/week/month."""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=365)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+    known = get_reference_data(db).vaccine_names
+    if vaccine:
+        unknown = [v for v in vaccine if v not in known]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Vaccine not found: {', '.join(unknown)}")
+        vaccine_names = list(dict.fromkeys(vaccine))
+    else:
+        vaccine_names = list(dict.fromkeys(known))
+    return get_coverage_timeseries(
+        db,
+        vaccine_names,
+        date_from=date_from,
+        date_to=date_to,
+        bucket=bucket,
+        region_id=region_id,
+        mode=mode,
+    )
+
+
+@router.get("/coverage/cube")
+def admin_coverage_cube(
+    group_by: list[Literal["region", "vaccine", "cohort", "gender"]] = Query(
+        ["region"], description="Dimensions to keep (repeatable); others are rolled up"
+    ),
+    vaccine: str | None = Query(None),
+    region_id: int | None = Query(None),
+    gender: str | None = Query(None),
+    cohort_from: str | None = Query(None, pattern=r"^\d{4}-\d{2}$", description="Birth cohort YYYY-MM"),
+    cohort_to: str | None = Query(None, pattern=r"^\d{4}-\d{2}$", description="Birth cohort YYYY-MM"),
+    db: Session = Depends(get_db),
+):
+    """Coverage by any combination of region, vaccine, birth cohort month and gender (from coverage_cube)."""
+    if vaccine is not None and not get_reference_data(db).has_vaccine(vaccine):
+        raise HTTPException(status_code=400, detail="Vaccine not found")
+    return get_coverage_cube(
+        db,
+        group_by=tuple(dict.fromkeys(group_by)),
+        vaccine_name=vaccine,
+        region_id=region_id,
+        gender=gender,
+        cohort_from=cohort_from,
+        cohort_to=cohort_to,
+    )
+
+
+@router.get("/coverage/history")
+def admin_coverage_history(
+    vaccine: str = Query(..., description="Vaccine name"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Retained coverage snapshots (latest, daily and weekly history), newest first."""
+    if not get_reference_data(db).has_vaccine(vaccine):
+        raise HTTPException(status_code=400, detail="Vaccine not found")
+    return get_coverage_history(db, vaccine, limit=limit)
+
+
+# --- Analytics ---
+@router.get("/analytics/dropout")
+def admin_analytics_dropout(
+    pair: list[str] | None = Query(
+        None, description="Dose pair FIRST:LAST of the same vaccine group (repeatable); default Penta1:Penta3, VPO1:VPO3, RR1:RR2"
+    ),
+    on_time_days: int = Query(DEFAULT_ON_TIME_DAYS, ge=0, le=365, description="Completed within N days of due date"),
+    refresh: bool = Query(False, description="Force recompute"),
+    db: Session = Depends(get_db),
+):
+    """Per-region dropout rates for dose pairs and on-time rates per vaccine."""
+    pairs = DROPOUT_PAIRS
+    if pair:
+        groups = {name: t.vaccine_group for name, t in get_reference_data(db).template_by_name.items()}
+        parsed = []
+        for raw in pair:
+            first, sep, last = raw.partition(":")
+            if not sep or first not in groups or last not in groups:
+                raise HTTPException(status_code=400, detail=f"Invalid dose pair: {raw}")
+            if groups[first] != groups[last]:
+                raise HTTPException(status_code=400, detail=f"Doses of different vaccine groups: {raw}")
+            parsed.append((first, last))
+        pairs = tuple(parsed)
+    return get_dropout(db, pairs=pairs, on_time_days=on_time_days, refresh=refresh)
+
+
 # --- Supply ---
 @router.get("/supply")
 def admin_supply(
@@ -59,120 +189,264 @@ def admin_supply(
 ):
     """Per-region projected need and national stock/shortage/surplus."""
     result = get_supply(db, vaccine)
-    if not result["regions"] and db.query(VaccineTemplate).filter(VaccineTemplate.vaccine_name == vaccine).first() is None:
+    if not result["regions"] and not get_reference_data(db).has_vaccine(vaccine):
         raise HTTPException(status_code=400, detail="Vaccine not found")
     return result
 
 
+@router.get("/supply/all")
+def admin_supply_all(
+    allocation: Literal["proportional", "priority"] = Query(
+        "proportional", description="proportional to net need, or red/yellow/green coverage first"
+    ),
+    db: Session = Depends(get_db),
+):
+    """Supply for every vaccine, with the national store allocated across regions by need net of their own stock."""
+    return get_supply_all(db, allocation)
+
+
+@router.get("/supply/forecast")
+def admin_supply_forecast(
+    vaccine: str | None = Query(None, description="Vaccine name; omit for all"),
+    horizon_weeks: int | None = Query(None, ge=1, le=104, description="Default: FORECAST_HORIZON_WEEKS"),
+    refresh: bool = Query(False, description="Force recompute"),
+    db: Session = Depends(get_db),
+):
+    """Weekly demand from due dates plus births projection, per region, with projected stock-out date."""
+    if vaccine is not None and not get_reference_data(db).has_vaccine(vaccine):
+        raise HTTPException(status_code=400, detail="Vaccine not found")
+    return get_forecast(db, vaccine_name=vaccine, horizon_weeks=horizon_weeks, refresh=refresh)
+
+
+# --- Stock ledger ---
+class StockReceiptBody(BaseModel):
+    vaccine_name: str
+    quantity: int = Field(..., gt=0)
+    region_id: int | None = Field(None, description="Omit for the national store")
+    note: str | None = None
+
+
+class StockTransferBody(BaseModel):
+    vaccine_name: str
+    quantity: int = Field(..., gt=0)
+    from_region_id: int | None = Field(None, description="Omit for the national store")
+    to_region_id: int | None = Field(None, description="Omit for the national store")
+    note: str | None = None
+
+
+def _check_stock_location(db: Session, vaccine_name: str, *region_ids: int | None) -> None:
+    ref = get_reference_data(db)
+    if not ref.has_vaccine(vaccine_name):
+        raise HTTPException(status_code=400, detail="Vaccine not found")
+    for region_id in region_ids:
+        if region_id is not None and region_id not in ref.region_by_id:
+            raise HTTPException(status_code=404, detail="Region not found")
+
+
+@router.post("/stock/receipts")
+def admin_stock_receipt(body: StockReceiptBody, db: Session = Depends(get_db)):
+    """Record doses received by the national store or a region."""
+    _check_stock_location(db, body.vaccine_name, body.region_id)
+    movement = record_receipt(db, body.vaccine_name, body.quantity, region_id=body.region_id, note=body.note)
+    db.commit()
+    return {
+        "id": movement.id,
+        "vaccine_name": movement.vaccine_name,
+        "region_id": movement.region_id,
+        "quantity": movement.quantity,
+    }
+
+
+@router.post("/stock/transfers")
+def admin_stock_transfer(body: StockTransferBody, db: Session = Depends(get_db)):
+    """Move doses between the national store and regions; 400 if the source has too few."""
+    if body.from_region_id == body.to_region_id:
+        raise HTTPException(status_code=400, detail="Source and destination are the same")
+    _check_stock_location(db, body.vaccine_name, body.from_region_id, body.to_region_id)
+    if not transfer_stock(
+        db,
+        body.vaccine_name,
+        body.quantity,
+        from_region_id=body.from_region_id,
+        to_region_id=body.to_region_id,
+        note=body.note,
+    ):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient stock at source")
+    db.commit()
+    return {"transferred": body.quantity}
+
+
+@router.get("/stock/balances")
+def admin_stock_balances(
+    vaccine: str | None = Query(None, description="Vaccine name; omit for all"),
+    db: Session = Depends(get_db),
+):
+    """National store and per-region balances per vaccine (materialized, no ledger scan)."""
+    ref = get_reference_data(db)
+    if vaccine is not None and not ref.has_vaccine(vaccine):
+        raise HTTPException(status_code=400, detail="Vaccine not found")
+    balances = stock_balances(db)
+    out = []
+    for vaccine_name in ref.vaccine_names if vaccine is None else (vaccine,):
+        stock_row = ref.stock_by_vaccine.get(vaccine_name)
+        regional = balances.get(vaccine_name, {})
+        national_store = stock_row.current_stock if stock_row else 0
+        out.append({
+            "vaccine_name": vaccine_name,
+            "national_store": national_store,
+            "total": national_store + sum(regional.values()),
+            "regions": [
+                {"region_id": r.id, "region_name": r.name, "balance": regional.get(r.id, 0)}
+                for r in ref.regions
+            ],
+        })
+    return out
+
+
+@router.get("/stock/movements")
+def admin_stock_movements(
+    vaccine: str | None = Query(None, description="Vaccine name"),
+    region_id: int | None = Query(None, description="Region; omit for all locations"),
+    cursor: int | None = Query(None, description="Last movement id of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Ledger entries, newest first, keyset-paginated by id."""
+    q = db.query(StockMovement)
+    if vaccine is not None:
+        q = q.filter(StockMovement.vaccine_name == vaccine)
+    if region_id is not None:
+        q = q.filter(StockMovement.region_id == region_id)
+    if cursor is not None:
+        q = q.filter(StockMovement.id < cursor)
+    rows = q.order_by(StockMovement.id.desc()).limit(limit + 1).all()
+    page = rows[:limit]
+    return {
+        "items": [
+            {
+                "id": m.id,
+                "vaccine_name": m.vaccine_name,
+                "region_id": m.region_id,
+                "quantity": m.quantity,
+                "kind": m.kind,
+                "child_vaccination_id": m.child_vaccination_id,
+                "note": m.note,
+                "created_at": m.created_at.isoformat(),
+            }
+            for m in page
+        ],
+        "next_cursor": page[-1].id if len(rows) > limit else None,
+    }
+
+
 # --- Region detail ---
+def _region_detail_sql(db: Session, region_id: int, vaccine: str, today: date) -> tuple[list[dict], int, list[dict]]:
+    """
+    by_period, last_30_days_count and trend_weeks in one grouped query: doses of this vaccine
+    for children of the region, per period, with conditional sums over the completion day.
+    """
+    done_day = func.date(ChildVaccination.completed_at)
+    week_ends = [today - timedelta(weeks=i) for i in range(3, -1, -1)]
+
+    def completed_count(*window):
+        return func.coalesce(func.sum(case((and_(ChildVaccination.completed == True, *window), 1), else_=0)), 0)
+
+    def completed_between(start: date, end: date):
+        # (start, end] on the completion day, like daily_completions buckets
+        return completed_count(done_day > start.isoformat(), done_day <= end.isoformat())
+
+    rows = (
+        db.query(
+            ChildVaccination.period_label,
+            func.count(ChildVaccination.id),
+            func.coalesce(func.sum(case((ChildVaccination.completed == True, 1), else_=0)), 0),
+            completed_count(done_day > (today - timedelta(days=30)).isoformat()),
+            *(completed_between(end - timedelta(days=7), end) for end in week_ends),
+        )
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.effective_region_id == region_id, ChildVaccination.vaccine_name == vaccine)
+        .group_by(ChildVaccination.period_label)
+        .order_by(ChildVaccination.period_label)
+        .all()
+    )
+    by_period = [{"period_label": r[0], "total": int(r[1]), "completed": int(r[2])} for r in rows]
+    last_30 = sum(int(r[3]) for r in rows)
+    trend_weeks = [
+        {"week_end": end.isoformat(), "completed_count": sum(int(r[4 + i]) for r in rows)}
+        for i, end in enumerate(week_ends)
+    ]
+    return by_period, last_30, trend_weeks
+
+
 @router.get("/region/{region_id}/detail")
 def admin_region_detail(
     region_id: int,
     vaccine: str = Query(..., description="Vaccine name"),
     db: Session = Depends(get_db),
 ):
-    """Detailed breakdown: registered children, vaccination counts by period, last 30 days, 4-week trend."""
-    region = db.query(Region).filter(Region.id == region_id).first()
+    """
+    Detailed breakdown: registered children count, vaccination counts by period, last 30 days,
+    4-week trend. The children themselves are listed by GET /admin/region/{id}/children.
+    """
+    ref = get_reference_data(db)
+    region = ref.region_by_id.get(region_id)
     if not region:
         raise HTTPException(status_code=404, detail="Region not found")
-    if db.query(VaccineTemplate).filter(VaccineTemplate.vaccine_name == vaccine).first() is None:
+    if not ref.has_vaccine(vaccine):
         raise HTTPException(status_code=400, detail="Vaccine not found")
 
-    # Children in region (child.region_id or parent.region_id)
-    children_ids = (
-        db.query(Child.id)
-        .outerjoin(Parent, Child.parent_id == Parent.id)
-        .filter(
-            or_(
-                Child.region_id == region_id,
-                and_(Child.region_id.is_(None), Parent.region_id == region_id),
-            )
-        )
-        .all()
-    )
-    child_ids = [r[0] for r in children_ids]
-    registered_count = len(child_ids)
-
-    if not child_ids:
-        return {
-            "region_id": region_id,
-            "region_name": region.name,
-            "vaccine_name": vaccine,
-            "registered_children": [],
-            "by_period": [],
-            "last_30_days_count": 0,
-            "trend_weeks": [],
-        }
-
-    # Vaccinations for this vaccine in region
-    vaccs = (
-        db.query(ChildVaccination)
-        .filter(
-            ChildVaccination.child_id.in_(child_ids),
-            ChildVaccination.vaccine_name == vaccine,
-        )
-        .all()
-    )
-    by_period: dict[str, dict] = {}
-    for v in vaccs:
-        key = v.period_label
-        if key not in by_period:
-            by_period[key] = {"total": 0, "completed": 0}
-        by_period[key]["total"] += 1
-        if v.completed:
-            by_period[key]["completed"] += 1
-    by_period_list = [{"period_label": k, **v} for k, v in sorted(by_period.items())]
-
-    # Last 30 days completed
-    since = datetime.utcnow() - timedelta(days=30)
-    last_30 = (
-        db.query(ChildVaccination)
-        .filter(
-            ChildVaccination.child_id.in_(child_ids),
-            ChildVaccination.vaccine_name == vaccine,
-            ChildVaccination.completed == True,
-            ChildVaccination.completed_at >= since,
-        )
-        .count()
-    )
+    # Children in region (effective_region_id = child.region_id or parent.region_id)
+    registered_count = db.query(func.count(Child.id)).filter(Child.effective_region_id == region_id).scalar()
 
-    # Trend: last 4 weeks (week-by-week completed count)
-    trend_weeks = []
-    for i in range(4):
-        end = datetime.utcnow() - timedelta(weeks=i)
-        start = end - timedelta(days=7)
-        c = (
-            db.query(ChildVaccination)
-            .filter(
-                ChildVaccination.child_id.in_(child_ids),
-                ChildVaccination.vaccine_name == vaccine,
-                ChildVaccination.completed == True,
-                ChildVaccination.completed_at >= start,
-                ChildVaccination.completed_at < end,
-            )
-            .count()
-        )
-        trend_weeks.append({"week_end": end.date().isoformat(), "completed_count": c})
-    trend_weeks.reverse()
+    today = datetime.utcnow().date()
+    if not registered_count:
+        by_period_list, last_30, trend_weeks = [], 0, []
+    elif settings.analytics_engine == "numpy":
+        from app.services.analytics_engine import get_snapshot
 
-    # List of registered children (id, name, birthdate)
-    children_list = (
-        db.query(Child.id, Child.name, Child.birthdate)
-        .filter(Child.id.in_(child_ids))
-        .all()
-    )
+        detail = get_snapshot(db).region_detail(region_id, vaccine, today)
+        by_period_list = detail["by_period"]
+        last_30 = detail["last_30_days_count"]
+        trend_weeks = detail["trend_weeks"]
+    else:
+        by_period_list, last_30, trend_weeks = _region_detail_sql(db, region_id, vaccine, today)
 
     return {
         "region_id": region_id,
         "region_name": region.name,
         "vaccine_name": vaccine,
-        "registered_children": [{"id": c[0], "name": c[1], "birthdate": str(c[2]) if c[2] else None} for c in children_list],
+        "registered_count": registered_count,
         "by_period": by_period_list,
         "last_30_days_count": last_30,
         "trend_weeks": trend_weeks,
     }
 
 
+@router.get("/region/{region_id}/children")
+def admin_region_children(
+    region_id: int,
+    cursor: int | None = Query(None, description="Last child id of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    name: str | None = Query(None, description="Case-insensitive name filter"),
+    db: Session = Depends(get_db),
+):
+    """Registered children of a region (id, name, birthdate), keyset-paginated by child id."""
+    if region_id not in get_reference_data(db).region_by_id:
+        raise HTTPException(status_code=404, detail="Region not found")
+    q = db.query(Child.id, Child.name, Child.birthdate).filter(Child.effective_region_id == region_id)
+    if cursor is not None:
+        q = q.filter(Child.id > cursor)
+    if name:
+        q = q.filter(Child.name.ilike(f"%{name}%"))
+    rows = q.order_by(Child.id).limit(limit + 1).all()
+    page = rows[:limit]
+    return {
+        "items": [{"id": c[0], "name": c[1], "birthdate": str(c[2]) if c[2] else None} for c in page],
+        "next_cursor": page[-1][0] if len(rows) > limit else None,
+    }
+
+
 # --- Telegram ---
 class TelegramGenerateBody(BaseModel):
     vaccine_name: str
@@ -197,9 +471,10 @@ def admin_telegram_generate(
     """Generate preview messages for selected regions (no send)."""
     coverage = get_coverage(db, body.vaccine_name, use_cache=True, refresh=False)
     coverage_by_region = {r["region_id"]: r for r in coverage}
+    regions = get_reference_data(db).region_by_id
     messages = []
     for rid in body.region_ids:
-        region = db.query(Region).filter(Region.id == rid).first()
+        region = regions.get(rid)
         if not region:
             messages.append({"region_id": rid, "error": "Region not found", "preview": None, "can_send": False})
             continue
@@ -232,9 +507,10 @@ def admin_telegram_send(
         return {"sent": [], "errors": ["send is false, no messages sent"]}
     coverage = get_coverage(db, body.vaccine_name, use_cache=True, refresh=False)
     coverage_by_region = {r["region_id"]: r for r in coverage}
+    regions = get_reference_data(db).region_by_id
     results = []
     for i, rid in enumerate(body.region_ids):
-        region = db.query(Region).filter(Region.id == rid).first()
+        region = regions.get(rid)
         if not region:
             results.append({"region_id": rid, "success": False, "error": "Region not found"})
             continue
@@ -259,7 +535,7 @@ def admin_telegram_send(
 @router.get("/regions")
 def admin_list_regions(db: Session = Depends(get_db)):
     """List all regions with optional telegram_chat_id."""
-    regions = db.query(Region).order_by(Region.id).all()
+    regions = get_reference_data(db).regions
     return [
         {
             "id": r.id,
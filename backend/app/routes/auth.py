@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.parent import Parent
-from app.schemas.parent import ParentCreate, ParentLogin, ParentResponse, PreferredLanguageUpdate
+from app.schemas.parent import ParentCreate, ParentLogin, ParentResponse, ParentUpdate
+from app.services.aggregate_service import set_parent_region
+from app.services.reference_cache import get_reference_data
 from app.utils.dependencies import get_current_user
 from app.utils.security import create_access_token, hash_password, verify_password
 
@@ -50,12 +52,18 @@ def get_me(current_user: Parent = Depends(get_current_user)):
 
 @router.patch("/me", response_model=ParentResponse)
 def update_me(
-    body: PreferredLanguageUpdate,
+    body: ParentUpdate,
     db: Session = Depends(get_db),
     current_user: Parent = Depends(get_current_user),
 ):
-    """Update current user's preferred language for voice notifications (ar, fr, en)."""
-    current_user.preferred_language = body.preferred_language
+    """Update current user's preferred language for voice notifications (ar, fr, en) and/or region."""
+    if body.preferred_language is not None:
+        current_user.preferred_language = body.preferred_language
+    if "region_id" in body.model_fields_set:
+        if body.region_id is not None and body.region_id not in get_reference_data(db).region_by_id:
+            raise HTTPException(status_code=404, detail="Region not found")
+        # Children without their own region move too, with their coverage counts
+        set_parent_region(db, current_user, body.region_id)
     db.commit()
     db.refresh(current_user)
     return current_user
@@ -8,14 +8,23 @@ from app.database import SessionLocal, get_db
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
 from app.models.parent import Parent
-from app.models.vaccine_template import VaccineTemplate
 from app.schemas.child import (
     ChildCreate,
     ChildResponse,
     ChildUpdate,
     VaccinationTimelineItem,
 )
-from app.services.reminder_service import check_and_send_reminders_for_child
+from app.services.aggregate_service import (
+    cube_cell,
+    on_child_created,
+    on_child_deleted,
+    on_child_updated,
+    on_vaccinations_created,
+)
+from app.services.audio_store import release_audio, remove_audio_files
+from app.services.reference_cache import get_reference_data
+from app.services.reminder_outbox import check_and_send_reminders_for_child
+from app.services.reminder_service import _media_dir
 from app.utils.dependencies import get_current_user
 
 router = APIRouter()
@@ -42,7 +51,7 @@ def _get_child_or_404(db: Session, child_id: int, parent: Parent) -> Child:
 
 
 def _run_reminders_in_background(child_id: int) -> None:
-    """Generate voice reminders in background (own DB session)."""
+    """Enqueue (and without a worker, send) voice reminders in background (own DB session)."""
     db = SessionLocal()
     try:
         check_and_send_reminders_for_child(db, child_id)
@@ -68,17 +77,17 @@ def create_child(
         region_id=region_id,
     )
     db.add(child)
-    db.commit()
-    db.refresh(child)
+    db.flush()
 
     # Create ChildVaccination for each VaccineTemplate (due_date = birthdate + offset_days)
-    templates = db.query(VaccineTemplate).all()
+    templates = get_reference_data(db).templates
     birthdate = child.birthdate
+    vaccinations: list[ChildVaccination] = []
     if birthdate:
         for template in templates:
             due_date = birthdate + timedelta(days=template.offset_days)
             remindable = _is_remindable(due_date)
-            db.add(
+            vaccinations.append(
                 ChildVaccination(
                     child_id=child.id,
                     vaccine_name=template.vaccine_name,
@@ -89,8 +98,13 @@ def create_child(
                     remindable=remindable,
                 )
             )
-        db.commit()
+        db.add_all(vaccinations)
+    # Child, its vaccinations and the coverage rollup are committed together
+    on_child_created(db, child, vaccinations)
+    db.commit()
+    db.refresh(child)
 
+    if birthdate:
         # Generate voice reminders in background so the response returns immediately
         background_tasks.add_task(_run_reminders_in_background, child.id)
 
@@ -136,11 +150,12 @@ def get_child_timeline(
     )
     # Backfill: if child has no vaccinations but has birthdate and templates exist, create them
     if not vaccinations and child.birthdate:
-        templates = db.query(VaccineTemplate).all()
+        templates = get_reference_data(db).templates
+        backfilled: list[ChildVaccination] = []
         for template in templates:
             due_date = child.birthdate + timedelta(days=template.offset_days)
             remindable = _is_remindable(due_date)
-            db.add(
+            backfilled.append(
                 ChildVaccination(
                     child_id=child.id,
                     vaccine_name=template.vaccine_name,
@@ -151,6 +166,8 @@ def get_child_timeline(
                     remindable=remindable,
                 )
             )
+        db.add_all(backfilled)
+        on_vaccinations_created(db, child, backfilled)
         db.commit()
         vaccinations = (
             db.query(ChildVaccination)
@@ -193,9 +210,11 @@ def update_child(
 ):
     """Update child info. Only if belongs to parent. Name and gender only; birthdate cannot be changed."""
     child = _get_child_or_404(db, child_id, current_user)
+    old_cell = cube_cell(child)
     update_data = payload.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(child, field, value)
+    on_child_updated(db, child, old_cell)
     db.commit()
     db.refresh(child)
     return child
@@ -209,6 +228,9 @@ def delete_child(
 ):
     """Delete child. Only if belongs to parent. Return success message."""
     child = _get_child_or_404(db, child_id, current_user)
+    on_child_deleted(db, child)
+    orphaned = release_audio(db, [v.reminder_audio_path for v in child.vaccinations])
     db.delete(child)
     db.commit()
+    remove_audio_files(_media_dir(), orphaned)
     return {"message": "Child deleted successfully"}
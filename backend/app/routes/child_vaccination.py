@@ -9,6 +9,8 @@ from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
 from app.models.parent import Parent
 from app.schemas.child import ChildVaccinationResponse
+from app.services.aggregate_service import on_vaccination_completed
+from app.services.stock_service import on_dose_administered
 from app.utils.dependencies import get_current_user
 
 router = APIRouter()
@@ -40,8 +42,13 @@ def complete_vaccination(
 ):
     """Mark vaccination as completed. Only if it belongs to a child of current parent."""
     vaccination = _get_vaccination_for_parent(db, vaccination_id, current_user)
-    vaccination.completed = True
-    vaccination.completed_at = datetime.utcnow()
+    # Completing twice keeps the first completed_at (aggregates are bucketed by that day)
+    if not vaccination.completed:
+        vaccination.completed = True
+        vaccination.completed_at = datetime.utcnow()
+        on_vaccination_completed(db, vaccination)
+        # The dose leaves the region's stock in the same transaction
+        on_dose_administered(db, vaccination)
     db.commit()
     db.refresh(vaccination)
     return vaccination
@@ -10,6 +10,7 @@ from app.database import get_db
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
 from app.models.parent import Parent
+from app.services.audio_store import release_audio, remove_audio_files
 from app.utils.dependencies import get_current_user
 
 router = APIRouter()
@@ -78,7 +79,7 @@ def delete_notification(
 ):
     """
     Delete the voice reminder for this period: clear reminder_audio_path for all vaccinations
-    in the same (child, period_label), delete the audio file once.
+    in the same (child, period_label); the audio file is deleted once nothing references it.
     """
     vac = (
         db.query(ChildVaccination)
@@ -91,7 +92,6 @@ def delete_notification(
     )
     if not vac:
         raise HTTPException(status_code=404, detail="Notification not found")
-    path = vac.reminder_audio_path
     # Clear same period for this child (all vacs sharing this reminder_audio_path)
     period_label = vac.period_label or ""
     same_period = (
@@ -104,15 +104,12 @@ def delete_notification(
             ChildVaccination.reminder_audio_path.isnot(None),
         )
     )
+    released = []
     for v in same_period:
+        released.append(v.reminder_audio_path)
         v.reminder_audio_path = None
-    if path:
-        root = _media_dir()
-        file_path = root / path
-        if file_path.exists():
-            try:
-                file_path.unlink()
-            except OSError:
-                pass
+    # The audio may be shared with other reminders: only unreferenced files are deleted
+    orphaned = release_audio(db, released)
     db.commit()
+    remove_audio_files(_media_dir(), orphaned)
     return None
@@ -7,7 +7,8 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.child_vaccination import ChildVaccination
-from app.services.reminder_service import check_and_send_reminders, get_twiml_for_vaccination, _media_dir
+from app.services.reminder_outbox import check_and_send_reminders
+from app.services.reminder_service import get_twiml_for_vaccination, _media_dir
 
 router = APIRouter()
 
@@ -16,10 +17,12 @@ router = APIRouter()
 def send_reminders(db: Session = Depends(get_db)) -> dict:
     """
     Manually trigger reminder check and send. For testing or cron.
+    Due reminder groups are enqueued in the reminder_jobs outbox; without a worker
+    (REMINDER_WORKER_ENABLED=false) they are sent in this request.
     Returns list of reminders sent: child_name, vaccine_name, due_date, text, audio_url (if voice generated).
     """
-    sent = check_and_send_reminders(db)
-    return {"reminders_sent": len(sent), "reminders": sent}
+    enqueued, sent = check_and_send_reminders(db)
+    return {"reminders_sent": len(sent), "reminders": sent, "jobs_enqueued": enqueued}
 
 
 @router.get("/audio/{vaccination_id}")
@@ -1,11 +1,18 @@
-"""Daily background job: refresh cached coverage reports for all vaccines."""
+"""Background jobs: daily coverage report refresh and cube rebuild; analytics snapshot refresh (numpy engine)."""
+import logging
+
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from app.config import settings
 from app.database import SessionLocal
 from app.models.vaccine_template import VaccineTemplate
+from app.services.aggregate_service import refresh_coverage_cube
 from app.services.coverage_service import cache_coverage_report, get_coverage
 
+logger = logging.getLogger(__name__)
+
 
 def _refresh_coverage_job() -> None:
     """Recompute and cache coverage for each vaccine."""
@@ -20,9 +27,28 @@ def _refresh_coverage_job() -> None:
         db.close()
 
 
+def _refresh_analytics_snapshot_job() -> None:
+    """Append new rows / completions to the columnar analytics snapshot."""
+    from app.services.analytics_engine import refresh_snapshot
+
+    db = SessionLocal()
+    try:
+        refresh_snapshot(db)
+    except Exception as e:
+        logger.warning("Analytics snapshot refresh failed: %s", e)
+    finally:
+        db.close()
+
+
 def start_scheduler() -> BackgroundScheduler:
-    """Run daily at 02:00 to refresh coverage cache."""
+    """Run daily at 02:00 to refresh coverage cache and 02:30 to rebuild the cube (plus the analytics snapshot when enabled)."""
     scheduler = BackgroundScheduler()
     scheduler.add_job(_refresh_coverage_job, CronTrigger(hour=2, minute=0))
+    scheduler.add_job(refresh_coverage_cube, CronTrigger(hour=2, minute=30))
+    if settings.analytics_engine == "numpy":
+        scheduler.add_job(
+            _refresh_analytics_snapshot_job,
+            IntervalTrigger(minutes=settings.analytics_snapshot_refresh_minutes),
+        )
     scheduler.start()
     return scheduler
@@ -31,6 +31,7 @@ class ParentResponse(BaseModel):
     created_at: datetime
 
 
-class PreferredLanguageUpdate(BaseModel):
-    """Update preferred language for voice notifications (ar, fr, en)."""
-    preferred_language: Literal["ar", "fr", "en"]
+class ParentUpdate(BaseModel):
+    """Update preferred language for voice notifications (ar, fr, en) and/or region (null clears it)."""
+    preferred_language: Literal["ar", "fr", "en"] | None = None
+    region_id: int | None = None
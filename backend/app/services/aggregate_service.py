@@ -0,0 +1,413 @@
+"""
+Incrementally maintained coverage aggregates.
+
+The hooks below are called by the write paths (create child, backfill timeline,
+complete vaccination, delete child, parent region change) before they commit, so
+aggregates change in the same transaction as the rows they summarise:
+- coverage_rollup: registered / record / completed counters per (region, vaccine)
+- daily_completions: completed doses per (region, vaccine, day) with running totals
+- coverage_cube: total / completed doses per (region, vaccine, birth cohort month, gender)
+
+The rebuild_* functions recompute them from the raw tables
+(repair/backfill: python -m app.services.aggregate_service).
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.coverage_cube import CoverageCube
+from app.models.coverage_rollup import CoverageRollup
+from app.models.daily_completion import DailyCompletion
+from app.models.parent import Parent
+from app.models.region import Region
+from app.models.vaccine_template import VaccineTemplate
+from app.services.coverage_service import region_vaccine_counts, registered_counts
+
+
+def _bump_rollup(
+    db: Session,
+    region_id: int,
+    vaccine_name: str,
+    *,
+    record_total: int = 0,
+    completed: int = 0,
+) -> None:
+    """Atomically add deltas to one rollup row; create the row if it does not exist yet."""
+    updated = (
+        db.query(CoverageRollup)
+        .filter(CoverageRollup.region_id == region_id, CoverageRollup.vaccine_name == vaccine_name)
+        .update(
+            {
+                CoverageRollup.record_total: CoverageRollup.record_total + record_total,
+                CoverageRollup.completed: CoverageRollup.completed + completed,
+            },
+            synchronize_session=False,
+        )
+    )
+    if updated:
+        return
+    registered = (
+        db.query(func.max(CoverageRollup.registered))
+        .filter(CoverageRollup.region_id == region_id)
+        .scalar()
+    ) or 0
+    db.add(
+        CoverageRollup(
+            region_id=region_id,
+            vaccine_name=vaccine_name,
+            registered=registered,
+            record_total=record_total,
+            completed=completed,
+        )
+    )
+    db.flush()
+
+
+def _bump_daily(db: Session, region_id: int, vaccine_name: str, day: date, delta: int) -> None:
+    """Add delta completions on day and shift the running total of every later day."""
+    same_key = (DailyCompletion.region_id == region_id, DailyCompletion.vaccine_name == vaccine_name)
+    updated = (
+        db.query(DailyCompletion)
+        .filter(*same_key, DailyCompletion.day == day)
+        .update(
+            {
+                DailyCompletion.completed_count: DailyCompletion.completed_count + delta,
+                DailyCompletion.cumulative_count: DailyCompletion.cumulative_count + delta,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        before = (
+            db.query(DailyCompletion.cumulative_count)
+            .filter(*same_key, DailyCompletion.day < day)
+            .order_by(DailyCompletion.day.desc())
+            .limit(1)
+            .scalar()
+        ) or 0
+        db.add(
+            DailyCompletion(
+                region_id=region_id,
+                vaccine_name=vaccine_name,
+                day=day,
+                completed_count=delta,
+                cumulative_count=before + delta,
+            )
+        )
+        db.flush()
+    # Completions are recorded "now", so later days rarely exist
+    db.query(DailyCompletion).filter(*same_key, DailyCompletion.day > day).update(
+        {DailyCompletion.cumulative_count: DailyCompletion.cumulative_count + delta},
+        synchronize_session=False,
+    )
+
+
+def cube_cell(child: Child) -> tuple[str, str]:
+    """(cohort_month, gender) cube coordinates of a child."""
+    cohort_month = child.birthdate.strftime("%Y-%m") if child.birthdate else ""
+    return cohort_month, child.gender or ""
+
+
+def _bump_cube(
+    db: Session,
+    region_id: int,
+    vaccine_name: str,
+    cell: tuple[str, str],
+    *,
+    total: int = 0,
+    completed: int = 0,
+) -> None:
+    """Atomically add deltas to one cube cell; create the cell if it does not exist yet."""
+    cohort_month, gender = cell
+    updated = (
+        db.query(CoverageCube)
+        .filter(
+            CoverageCube.region_id == region_id,
+            CoverageCube.vaccine_name == vaccine_name,
+            CoverageCube.cohort_month == cohort_month,
+            CoverageCube.gender == gender,
+        )
+        .update(
+            {
+                CoverageCube.total: CoverageCube.total + total,
+                CoverageCube.completed: CoverageCube.completed + completed,
+            },
+            synchronize_session=False,
+        )
+    )
+    if updated:
+        return
+    db.add(
+        CoverageCube(
+            region_id=region_id,
+            vaccine_name=vaccine_name,
+            cohort_month=cohort_month,
+            gender=gender,
+            total=total,
+            completed=completed,
+        )
+    )
+    db.flush()
+
+
+def _bump_registered(db: Session, region_id: int, delta: int) -> None:
+    """Registered children is per region: apply the delta to every vaccine row of that region."""
+    db.query(CoverageRollup).filter(CoverageRollup.region_id == region_id).update(
+        {CoverageRollup.registered: CoverageRollup.registered + delta},
+        synchronize_session=False,
+    )
+
+
+def _bump_vaccinations(
+    db: Session, region_id: int, child: Child, vaccinations: list[ChildVaccination], sign: int
+) -> None:
+    totals: Counter[str] = Counter()
+    completed: Counter[str] = Counter()
+    for v in vaccinations:
+        totals[v.vaccine_name] += 1
+        if v.completed:
+            completed[v.vaccine_name] += 1
+    for vaccine_name, n in totals.items():
+        _bump_rollup(
+            db,
+            region_id,
+            vaccine_name,
+            record_total=sign * n,
+            completed=sign * completed[vaccine_name],
+        )
+        _bump_cube(
+            db,
+            region_id,
+            vaccine_name,
+            cube_cell(child),
+            total=sign * n,
+            completed=sign * completed[vaccine_name],
+        )
+
+
+def on_child_created(db: Session, child: Child, vaccinations: list[ChildVaccination]) -> None:
+    """New child and its scheduled vaccinations (call after flush, before commit)."""
+    region_id = child.effective_region_id
+    if region_id is None:
+        return
+    _bump_vaccinations(db, region_id, child, vaccinations, 1)
+    _bump_registered(db, region_id, 1)
+
+
+def on_vaccinations_created(db: Session, child: Child, vaccinations: list[ChildVaccination]) -> None:
+    """Vaccinations added for an existing child (e.g. timeline backfill)."""
+    region_id = child.effective_region_id
+    if region_id is None:
+        return
+    _bump_vaccinations(db, region_id, child, vaccinations, 1)
+
+
+def on_vaccination_completed(db: Session, vaccination: ChildVaccination) -> None:
+    """One dose moved from not completed to completed (call after setting completed_at)."""
+    region_id = vaccination.child.effective_region_id
+    if region_id is None:
+        return
+    _bump_rollup(db, region_id, vaccination.vaccine_name, completed=1)
+    _bump_cube(db, region_id, vaccination.vaccine_name, cube_cell(vaccination.child), completed=1)
+    if vaccination.completed_at is not None:
+        _bump_daily(db, region_id, vaccination.vaccine_name, vaccination.completed_at.date(), 1)
+
+
+def on_child_updated(db: Session, child: Child, old_cell: tuple[str, str]) -> None:
+    """Child's cube coordinates may have changed (e.g. gender edit); old_cell = cube_cell before."""
+    region_id = child.effective_region_id
+    new_cell = cube_cell(child)
+    if region_id is None or new_cell == old_cell:
+        return
+    vaccinations = list(child.vaccinations)
+    totals: Counter[str] = Counter(v.vaccine_name for v in vaccinations)
+    completed: Counter[str] = Counter(v.vaccine_name for v in vaccinations if v.completed)
+    for vaccine_name, n in totals.items():
+        _bump_cube(db, region_id, vaccine_name, old_cell, total=-n, completed=-completed[vaccine_name])
+        _bump_cube(db, region_id, vaccine_name, new_cell, total=n, completed=completed[vaccine_name])
+
+
+def on_child_deleted(db: Session, child: Child) -> None:
+    """Child about to be deleted with its vaccinations (call before db.delete)."""
+    region_id = child.effective_region_id
+    if region_id is None:
+        return
+    vaccinations = list(child.vaccinations)
+    _bump_vaccinations(db, region_id, child, vaccinations, -1)
+    _bump_registered(db, region_id, -1)
+    for v in vaccinations:
+        if v.completed and v.completed_at is not None:
+            _bump_daily(db, region_id, v.vaccine_name, v.completed_at.date(), -1)
+
+
+def _move_child(db: Session, child: Child, region_id: int | None) -> None:
+    """Move a child's counts from its current effective region to region_id."""
+    on_child_deleted(db, child)
+    child.effective_region_id = region_id
+    if region_id is None:
+        return
+    vaccinations = list(child.vaccinations)
+    on_child_created(db, child, vaccinations)
+    for v in vaccinations:
+        if v.completed and v.completed_at is not None:
+            _bump_daily(db, region_id, v.vaccine_name, v.completed_at.date(), 1)
+
+
+def set_parent_region(db: Session, parent: Parent, region_id: int | None) -> None:
+    """
+    Change a parent's region (before commit). Children without their own region follow it:
+    their effective_region_id and aggregate counts move to the new region. The only way to
+    change Parent.region_id once the parent has children (PATCH /auth/me uses it): a plain
+    assignment leaves effective_region_id, coverage_rollup, daily_completions and
+    coverage_cube on the old region.
+    """
+    if parent.region_id == region_id:
+        return
+    parent.region_id = region_id
+    for child in parent.children:
+        if child.region_id is None:
+            _move_child(db, child, region_id)
+
+
+def rebuild_coverage_rollup(db: Session) -> int:
+    """Recompute the whole rollup from children/child_vaccinations. Returns rows written."""
+    registered = registered_counts(db)
+    by_key = region_vaccine_counts(db)
+
+    region_ids = [r[0] for r in db.query(Region.id).all()]
+    vaccine_names = {r[0] for r in db.query(VaccineTemplate.vaccine_name).distinct().all()}
+    vaccine_names.update(v for _, v in by_key)
+
+    db.query(CoverageRollup).delete(synchronize_session=False)
+    for region_id in region_ids:
+        for vaccine_name in sorted(vaccine_names):
+            total, done = by_key.get((region_id, vaccine_name), (0, 0))
+            db.add(
+                CoverageRollup(
+                    region_id=region_id,
+                    vaccine_name=vaccine_name,
+                    registered=registered.get(region_id, 0),
+                    record_total=total,
+                    completed=done,
+                )
+            )
+    db.commit()
+    return len(region_ids) * len(vaccine_names)
+
+
+def rebuild_daily_completions(db: Session) -> int:
+    """Backfill daily_completions from child_vaccinations.completed_at. Returns rows written."""
+    day_col = func.date(ChildVaccination.completed_at)
+    rows = (
+        db.query(Child.effective_region_id, ChildVaccination.vaccine_name, day_col, func.count(ChildVaccination.id))
+        .select_from(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(
+            ChildVaccination.completed == True,
+            ChildVaccination.completed_at.isnot(None),
+            Child.effective_region_id.isnot(None),
+        )
+        .group_by(Child.effective_region_id, ChildVaccination.vaccine_name, day_col)
+        .all()
+    )
+    series: dict[tuple[int, str], list[tuple[date, int]]] = defaultdict(list)
+    for region_id, vaccine_name, day, n in rows:
+        series[(region_id, vaccine_name)].append((date.fromisoformat(str(day)), int(n)))
+
+    db.query(DailyCompletion).delete(synchronize_session=False)
+    written = 0
+    for (region_id, vaccine_name), days in series.items():
+        running = 0
+        for day, n in sorted(days):
+            running += n
+            db.add(
+                DailyCompletion(
+                    region_id=region_id,
+                    vaccine_name=vaccine_name,
+                    day=day,
+                    completed_count=n,
+                    cumulative_count=running,
+                )
+            )
+            written += 1
+    db.commit()
+    return written
+
+
+def rebuild_coverage_cube(db: Session) -> int:
+    """Recompute coverage_cube from children/child_vaccinations in one grouped scan. Returns rows written."""
+    cohort_col = func.coalesce(func.strftime("%Y-%m", Child.birthdate), "")
+    gender_col = func.coalesce(Child.gender, "")
+    rows = (
+        db.query(
+            Child.effective_region_id,
+            ChildVaccination.vaccine_name,
+            cohort_col,
+            gender_col,
+            func.count(ChildVaccination.id),
+            func.coalesce(func.sum(case((ChildVaccination.completed == True, 1), else_=0)), 0),
+        )
+        .select_from(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.effective_region_id.isnot(None))
+        .group_by(Child.effective_region_id, ChildVaccination.vaccine_name, cohort_col, gender_col)
+        .all()
+    )
+    db.query(CoverageCube).delete(synchronize_session=False)
+    db.add_all(
+        CoverageCube(
+            region_id=region_id,
+            vaccine_name=vaccine_name,
+            cohort_month=cohort_month,
+            gender=gender,
+            total=int(total),
+            completed=int(completed),
+        )
+        for region_id, vaccine_name, cohort_month, gender, total, completed in rows
+    )
+    db.commit()
+    return len(rows)
+
+
+def refresh_coverage_cube() -> int:
+    """Scheduled full rebuild of coverage_cube (repairs any drift from incremental updates)."""
+    db = SessionLocal()
+    try:
+        return rebuild_coverage_cube(db)
+    finally:
+        db.close()
+
+
+def ensure_coverage_aggregates(force: bool = False) -> int:
+    """
+    Build missing aggregates on startup (or all of them when force=True, e.g. after seeding
+    wrote children/vaccinations directly). Returns rows written (0 if nothing to do).
+    """
+    db = SessionLocal()
+    try:
+        written = 0
+        if force or db.query(CoverageRollup).first() is None:
+            written += rebuild_coverage_rollup(db)
+        if force or (
+            db.query(DailyCompletion).first() is None
+            and db.query(ChildVaccination.id).filter(ChildVaccination.completed_at.isnot(None)).first() is not None
+        ):
+            written += rebuild_daily_completions(db)
+        if force or (
+            db.query(CoverageCube).first() is None
+            and db.query(ChildVaccination.id).first() is not None
+        ):
+            written += rebuild_coverage_cube(db)
+        return written
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    n = ensure_coverage_aggregates(force=True)
+    print(f"Rebuilt coverage aggregates: {n} rows.")
@@ -0,0 +1,426 @@
+"""
+Columnar NumPy analytics over a snapshot of child_vaccinations.
+
+The snapshot holds one row per ChildVaccination as int-coded arrays (vaccine, period, region,
+gender) and day numbers (due, completed, birth; days since 1970-01-01), plus one row per child
+for registered counts. It is written as .npy files and memory-mapped, so coverage, dropout,
+timeliness and cohort statistics are vectorized group-bys that never touch the SQLite file
+parents write to. refresh_snapshot() appends new rows, patches completions since the last
+refresh and re-reads every child's region, gender and birthdate (parents move, children are
+edited); deletions (row counts shrinking) trigger a full rebuild.
+
+Enabled with ANALYTICS_ENGINE=numpy (requires numpy); the default is the SQL path.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+
+logger = logging.getLogger(__name__)
+
+NO_DAY = np.iinfo(np.int32).min
+NO_REGION = -1
+_CHUNK_ROWS = 50_000
+_UNIX_EPOCH_JULIAN = 2440587.5
+
+# Per child_vaccination row
+_ROW_COLUMNS = {
+    "id": np.int64,
+    "child_id": np.int64,
+    "vaccine": np.int16,
+    "period": np.int16,
+    "region": np.int16,
+    "gender": np.int8,
+    "due_day": np.int32,
+    "completed_day": np.int32,
+    "birth_day": np.int32,
+    "completed": np.bool_,
+}
+# Per child (registered counts)
+_CHILD_COLUMNS = {
+    "child_ids": np.int64,
+    "child_region": np.int16,
+}
+
+
+def _day_number(column):
+    """SQL expression: whole days since 1970-01-01 (NULL stays NULL)."""
+    return cast(func.julianday(func.date(column)) - _UNIX_EPOCH_JULIAN, Integer)
+
+
+def day_number(d: date) -> int:
+    return (d - date(1970, 1, 1)).days
+
+
+def _snapshot_root() -> Path:
+    raw = settings.analytics_snapshot_dir
+    p = Path(raw) if os.path.isabs(raw) else Path.cwd() / raw
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+class CoverageSnapshot:
+    """Loaded (memory-mapped) snapshot with vectorized analytics."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.meta = json.loads((directory / "meta.json").read_text())
+        self.vaccines: list[str] = self.meta["vaccines"]
+        self.periods: list[str] = self.meta["periods"]
+        self.genders: list[str] = self.meta["genders"]
+        self.cols = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r")
+            for name in (*_ROW_COLUMNS, *_CHILD_COLUMNS)
+        }
+        self.n_regions = int(self.meta["max_region"]) + 1
+
+    # --- helpers ---
+    def _code(self, values: list[str], name: str) -> int:
+        try:
+            return values.index(name)
+        except ValueError:
+            return -1
+
+    def _by_region(self, mask: np.ndarray) -> np.ndarray:
+        region = self.cols["region"]
+        sel = mask & (region != NO_REGION)
+        return np.bincount(region[sel], minlength=self.n_regions)
+
+    def _completed_mask(self, date_from: date | None, date_to: date | None) -> np.ndarray:
+        mask = np.asarray(self.cols["completed"], dtype=bool)
+        completed_day = self.cols["completed_day"]
+        if date_from is not None:
+            mask = mask & (completed_day >= day_number(date_from))
+        if date_to is not None:
+            mask = mask & (completed_day <= day_number(date_to)) & (completed_day != NO_DAY)
+        return mask
+
+    def _vaccine_mask(self, vaccine_name: str) -> np.ndarray:
+        return self.cols["vaccine"] == self._code(self.vaccines, vaccine_name)
+
+    # --- analytics ---
+    def registered_counts(self) -> dict[int, int]:
+        region = self.cols["child_region"]
+        counts = np.bincount(region[region != NO_REGION], minlength=self.n_regions)
+        return {r: int(n) for r, n in enumerate(counts) if n}
+
+    def coverage_counts(
+        self,
+        vaccine_name: str,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        mode: str = "registered_children",
+    ) -> dict[int, tuple[int, int]]:
+        """{region_id: (total_registered, vaccinated_count)}, same semantics as the SQL path."""
+        vaccine = self._vaccine_mask(vaccine_name)
+        vaccinated = self._by_region(vaccine & self._completed_mask(date_from, date_to))
+        if mode == "registered_children":
+            registered = self.registered_counts()
+            return {r: (registered.get(r, 0), int(vaccinated[r])) for r in range(self.n_regions) if registered.get(r) or vaccinated[r]}
+        totals = self._by_region(vaccine)
+        return {r: (int(totals[r]), int(vaccinated[r])) for r in range(self.n_regions) if totals[r]}
+
+    def region_detail(self, region_id: int, vaccine_name: str, today: date) -> dict:
+        """by_period, last_30_days_count and trend_weeks for one region and vaccine."""
+        rows = (self.cols["region"] == region_id) & self._vaccine_mask(vaccine_name)
+        period = self.cols["period"][rows]
+        completed = np.asarray(self.cols["completed"][rows], dtype=bool)
+        totals = np.bincount(period, minlength=len(self.periods))
+        done = np.bincount(period[completed], minlength=len(self.periods))
+        by_period = sorted(
+            ({"period_label": self.periods[p], "total": int(totals[p]), "completed": int(done[p])}
+             for p in np.flatnonzero(totals)),
+            key=lambda x: x["period_label"],
+        )
+        completed_day = self.cols["completed_day"][rows][completed]
+        t = day_number(today)
+        last_30 = int(np.count_nonzero(completed_day > t - 30))
+        trend_weeks = []
+        for i in range(3, -1, -1):
+            end = t - 7 * i
+            c = int(np.count_nonzero((completed_day > end - 7) & (completed_day <= end)))
+            trend_weeks.append({"week_end": (today - timedelta(weeks=i)).isoformat(), "completed_count": c})
+        return {"by_period": by_period, "last_30_days_count": last_30, "trend_weeks": trend_weeks}
+
+    def completed_by_region_vaccine(self) -> np.ndarray:
+        """Matrix [region, vaccine] of completed doses."""
+        region = self.cols["region"]
+        sel = np.asarray(self.cols["completed"], dtype=bool) & (region != NO_REGION)
+        flat = region[sel].astype(np.int64) * len(self.vaccines) + self.cols["vaccine"][sel]
+        counts = np.bincount(flat, minlength=self.n_regions * len(self.vaccines))
+        return counts.reshape(self.n_regions, len(self.vaccines))
+
+    def dropout(self, pairs: list[tuple[str, str]]) -> dict[int, dict[str, dict]]:
+        """{region_id: {"Penta1->Penta3": {first_dose, last_dose, dropout_rate}}}."""
+        done = self.completed_by_region_vaccine()
+        out: dict[int, dict[str, dict]] = {}
+        for first, last in pairs:
+            a, b = self._code(self.vaccines, first), self._code(self.vaccines, last)
+            for r in range(self.n_regions):
+                n1 = int(done[r, a]) if a >= 0 else 0
+                n2 = int(done[r, b]) if b >= 0 else 0
+                if not n1 and not n2:
+                    continue
+                out.setdefault(r, {})[f"{first}->{last}"] = {
+                    "first_dose": n1,
+                    "last_dose": n2,
+                    "dropout_rate": round((n1 - n2) / n1, 4) if n1 else None,
+                }
+        return out
+
+    def timeliness(self, on_time_days: int) -> dict[int, dict[str, dict]]:
+        """{region_id: {vaccine: {completed, on_time, on_time_rate}}}: completed within N days of due."""
+        region = self.cols["region"]
+        due_day = self.cols["due_day"]
+        completed_day = self.cols["completed_day"]
+        sel = (
+            np.asarray(self.cols["completed"], dtype=bool)
+            & (region != NO_REGION)
+            & (due_day != NO_DAY)
+            & (completed_day != NO_DAY)
+        )
+        on_time = sel & (completed_day - due_day <= on_time_days)
+        size = self.n_regions * len(self.vaccines)
+        flat = region.astype(np.int64) * len(self.vaccines) + self.cols["vaccine"]
+        done = np.bincount(flat[sel], minlength=size).reshape(self.n_regions, -1)
+        timely = np.bincount(flat[on_time], minlength=size).reshape(self.n_regions, -1)
+        out: dict[int, dict[str, dict]] = {}
+        for r, v in zip(*np.nonzero(done)):
+            out.setdefault(int(r), {})[self.vaccines[v]] = {
+                "completed": int(done[r, v]),
+                "on_time": int(timely[r, v]),
+                "on_time_rate": round(int(timely[r, v]) / int(done[r, v]), 4),
+            }
+        return out
+
+
+# --- building and refreshing ---
+def _fetch_rows(db: Session, after_id: int) -> dict[str, list]:
+    stmt = (
+        select(
+            ChildVaccination.id,
+            ChildVaccination.child_id,
+            ChildVaccination.vaccine_name,
+            ChildVaccination.period_label,
+            Child.effective_region_id,
+            Child.gender,
+            _day_number(ChildVaccination.due_date),
+            _day_number(ChildVaccination.completed_at),
+            _day_number(Child.birthdate),
+            ChildVaccination.completed,
+        )
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .where(ChildVaccination.id > after_id)
+        .order_by(ChildVaccination.id)
+    )
+    cols: dict[str, list] = {name: [] for name in _ROW_COLUMNS}
+    for partition in db.execute(stmt.execution_options(yield_per=_CHUNK_ROWS)).partitions():
+        for row in partition:
+            for name, value in zip(_ROW_COLUMNS, row):
+                cols[name].append(value)
+    return cols
+
+
+def _encode(values: list, codes: list[str]) -> np.ndarray:
+    index = {v: i for i, v in enumerate(codes)}
+    out = np.empty(len(values), dtype=np.int16)
+    for i, v in enumerate(values):
+        v = v or ""
+        if v not in index:
+            index[v] = len(codes)
+            codes.append(v)
+        out[i] = index[v]
+    return out
+
+
+def _to_arrays(raw: dict[str, list], meta: dict) -> dict[str, np.ndarray]:
+    n = len(raw["id"])
+
+    def days(values: list) -> np.ndarray:
+        return np.fromiter((NO_DAY if v is None else v for v in values), dtype=np.int32, count=n)
+
+    return {
+        "id": np.asarray(raw["id"], dtype=np.int64),
+        "child_id": np.asarray(raw["child_id"], dtype=np.int64),
+        "vaccine": _encode(raw["vaccine"], meta["vaccines"]),
+        "period": _encode(raw["period"], meta["periods"]),
+        "region": np.fromiter((NO_REGION if v is None else v for v in raw["region"]), dtype=np.int16, count=n),
+        "gender": _encode(raw["gender"], meta["genders"]).astype(np.int8),
+        "due_day": days(raw["due_day"]),
+        "completed_day": days(raw["completed_day"]),
+        "birth_day": days(raw["birth_day"]),
+        "completed": np.asarray(raw["completed"], dtype=np.bool_),
+    }
+
+
+def _fetch_children(db: Session, after_id: int) -> dict[str, np.ndarray]:
+    rows = db.execute(
+        select(Child.id, Child.effective_region_id).where(Child.id > after_id).order_by(Child.id)
+    ).all()
+    return {
+        "child_ids": np.asarray([r[0] for r in rows], dtype=np.int64),
+        "child_region": np.asarray([NO_REGION if r[1] is None else r[1] for r in rows], dtype=np.int16),
+    }
+
+
+def _patch_children(db: Session, columns: dict[str, np.ndarray], meta: dict, child_hw: int) -> bool:
+    """
+    Re-read region, gender and birthdate of the children already in the snapshot and copy them
+    onto their rows. There is no updated_at to go by, and a parent's move rewrites many children,
+    so all of them are read (one narrow pass over children, not child_vaccinations). Returns
+    False if the children are not the ones in the snapshot (ids reused after a delete).
+    """
+    rows = db.execute(
+        select(Child.id, Child.effective_region_id, Child.gender, _day_number(Child.birthdate))
+        .where(Child.id <= child_hw)
+        .order_by(Child.id)
+    ).all()
+    n = len(rows)
+    child_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    if not np.array_equal(child_ids, columns["child_ids"]):
+        return False
+    region = np.fromiter((NO_REGION if r[1] is None else r[1] for r in rows), dtype=np.int16, count=n)
+    gender = _encode([r[2] for r in rows], meta["genders"]).astype(np.int8)
+    birth_day = np.fromiter((NO_DAY if r[3] is None else r[3] for r in rows), dtype=np.int32, count=n)
+    columns["child_region"] = region
+    pos = np.searchsorted(child_ids, columns["child_id"])
+    columns["region"] = region[pos]
+    columns["gender"] = gender[pos]
+    columns["birth_day"] = birth_day[pos]
+    return True
+
+
+def _write_version(columns: dict[str, np.ndarray], meta: dict) -> Path:
+    """Write a new snapshot version and atomically point CURRENT at it."""
+    root = _snapshot_root()
+    name = f"v{time.time_ns()}"
+    tmp = root / f".{name}.tmp"
+    tmp.mkdir()
+    for col, arr in columns.items():
+        np.save(tmp / f"{col}.npy", arr)
+    (tmp / "meta.json").write_text(json.dumps(meta))
+    tmp.rename(root / name)
+    pointer = root / ".CURRENT.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, root / "CURRENT")
+    # Keep the previous version for readers that still have it mapped
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and p.name.startswith("v"))
+    for old in versions[:-2]:
+        shutil.rmtree(old, ignore_errors=True)
+    return root / name
+
+
+def _current_dir() -> Path | None:
+    root = _snapshot_root()
+    pointer = root / "CURRENT"
+    if not pointer.exists():
+        return None
+    directory = root / pointer.read_text().strip()
+    return directory if (directory / "meta.json").exists() else None
+
+
+def build_snapshot(db: Session) -> Path:
+    """Full rebuild from child_vaccinations and children."""
+    started = datetime.utcnow()
+    meta = {"vaccines": [], "periods": [], "genders": []}
+    columns = _to_arrays(_fetch_rows(db, 0), meta)
+    columns.update(_fetch_children(db, 0))
+    meta.update(_meta_after(columns, started))
+    return _write_version(columns, meta)
+
+
+def _meta_after(columns: dict[str, np.ndarray], started: datetime) -> dict:
+    regions = np.concatenate([columns["region"], columns["child_region"]])
+    return {
+        "high_water_id": int(columns["id"][-1]) if len(columns["id"]) else 0,
+        "child_high_water_id": int(columns["child_ids"][-1]) if len(columns["child_ids"]) else 0,
+        "rows": int(len(columns["id"])),
+        "children": int(len(columns["child_ids"])),
+        "max_region": int(regions.max()) if regions.size and regions.max() > 0 else 0,
+        "refreshed_at": started.isoformat(),
+    }
+
+
+def refresh_snapshot(db: Session) -> Path:
+    """
+    Incremental refresh: append rows/children with ids above the high-water marks, patch doses
+    completed since the last refresh and the region, gender and birthdate of existing children.
+    Falls back to a full rebuild if rows were deleted.
+    """
+    current = _current_dir()
+    if current is None:
+        return build_snapshot(db)
+    started = datetime.utcnow()
+    old = CoverageSnapshot(current)
+    meta = dict(old.meta)
+    hw, child_hw = meta["high_water_id"], meta["child_high_water_id"]
+
+    existing_rows = db.query(func.count(ChildVaccination.id)).filter(ChildVaccination.id <= hw).scalar()
+    existing_children = db.query(func.count(Child.id)).filter(Child.id <= child_hw).scalar()
+    if existing_rows != meta["rows"] or existing_children != meta["children"]:
+        return build_snapshot(db)
+
+    columns = {name: np.array(old.cols[name]) for name in (*_ROW_COLUMNS, *_CHILD_COLUMNS)}
+    if not _patch_children(db, columns, meta, child_hw):
+        return build_snapshot(db)
+
+    # Completions since the previous refresh (small margin for in-flight transactions)
+    since = datetime.fromisoformat(meta["refreshed_at"]) - timedelta(minutes=5)
+    changed = db.execute(
+        select(ChildVaccination.id, _day_number(ChildVaccination.completed_at))
+        .where(
+            ChildVaccination.id <= hw,
+            ChildVaccination.completed == True,
+            ChildVaccination.completed_at >= since,
+        )
+    ).all()
+    if changed:
+        ids = np.asarray([r[0] for r in changed], dtype=np.int64)
+        pos = np.searchsorted(columns["id"], ids)
+        columns["completed"][pos] = True
+        columns["completed_day"][pos] = [NO_DAY if r[1] is None else r[1] for r in changed]
+
+    new_rows = _to_arrays(_fetch_rows(db, hw), meta)
+    new_children = _fetch_children(db, child_hw)
+    for name in _ROW_COLUMNS:
+        columns[name] = np.concatenate([columns[name], new_rows[name]])
+    for name in _CHILD_COLUMNS:
+        columns[name] = np.concatenate([columns[name], new_children[name]])
+    meta.update(_meta_after(columns, started))
+    return _write_version(columns, meta)
+
+
+_loaded: CoverageSnapshot | None = None
+_load_lock = threading.Lock()
+
+
+def get_snapshot(db: Session) -> CoverageSnapshot:
+    """
+    Current snapshot, memory-mapped once per version. Built on first use; refreshed inline
+    when older than ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS (the scheduler normally keeps it fresh).
+    """
+    global _loaded
+    with _load_lock:
+        current = _current_dir()
+        if current is None:
+            current = build_snapshot(db)
+        else:
+            refreshed_at = datetime.fromisoformat(json.loads((current / "meta.json").read_text())["refreshed_at"])
+            if (datetime.utcnow() - refreshed_at).total_seconds() > settings.analytics_snapshot_max_age_seconds:
+                current = refresh_snapshot(db)
+        if _loaded is None or _loaded.directory != current:
+            _loaded = CoverageSnapshot(current)
+        return _loaded
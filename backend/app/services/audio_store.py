@@ -0,0 +1,102 @@
+"""
+Content-addressed store for synthesized reminder audio.
+
+Each MP3 is keyed by sha256(text, voice id, model id, language), written once to the
+reminder media directory as tts_<hash>.mp3 and shared by every ChildVaccination whose
+reminder_audio_path points at it. reminder_audio.ref_count counts those rows: callers
+acquire_audio() when they assign the path and release_audio() when they clear it; a file
+is deleted only when its count drops to zero. Paths not in the table (per-child files
+written before this store existed) are owned by one reminder and deleted on release.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from app.models.reminder_audio import ReminderAudio
+
+logger = logging.getLogger(__name__)
+
+
+def audio_key(text: str, voice_id: str, model_id: str, lang: str) -> str:
+    return hashlib.sha256(json.dumps([text, voice_id, model_id, lang]).encode("utf-8")).hexdigest()
+
+
+def find_audio(db: Session, key: str, media_root: Path) -> str | None:
+    """Stored file name for key, or None if never synthesized (or the file went missing)."""
+    row = db.query(ReminderAudio.path).filter(ReminderAudio.content_hash == key).first()
+    if row is None or not (media_root / row.path).exists():
+        return None
+    return row.path
+
+
+def write_audio_file(media_root: Path, key: str, audio: bytes) -> str:
+    """Write the MP3 atomically (no DB access, safe in a worker thread). Returns the file name."""
+    name = f"tts_{key}.mp3"
+    tmp = media_root / f".{name}.{os.getpid()}.tmp"
+    tmp.write_bytes(audio)
+    os.replace(tmp, media_root / name)
+    return name
+
+
+def register_audio(
+    db: Session, key: str, path: str, *, voice_id: str, model_id: str, lang: str, size_bytes: int
+) -> None:
+    """Record a written file (no-op if the key is known) and flush so acquire_audio sees it."""
+    if db.query(ReminderAudio.id).filter(ReminderAudio.content_hash == key).first():
+        return
+    db.add(ReminderAudio(
+        content_hash=key,
+        path=path,
+        voice_id=voice_id,
+        model_id=model_id,
+        lang=lang,
+        size_bytes=size_bytes,
+    ))
+    db.flush()
+
+
+def acquire_audio(db: Session, path: str, count: int = 1) -> None:
+    """count more vaccinations now reference path (atomic increment)."""
+    db.query(ReminderAudio).filter(ReminderAudio.path == path).update(
+        {ReminderAudio.ref_count: ReminderAudio.ref_count + count}, synchronize_session=False
+    )
+
+
+def release_audio(db: Session, paths: Iterable[str]) -> list[str]:
+    """
+    One reference dropped per item in paths (call when clearing reminder_audio_path or
+    deleting the vaccination). Returns the files no longer referenced; delete them with
+    remove_audio_files() after the commit.
+    """
+    counts = Counter(p for p in paths if p)
+    if not counts:
+        return []
+    rows = {r.path: r for r in db.query(ReminderAudio).filter(ReminderAudio.path.in_(counts))}
+    orphaned = []
+    for path, n in counts.items():
+        row = rows.get(path)
+        if row is None:
+            orphaned.append(path)
+            continue
+        db.query(ReminderAudio).filter(ReminderAudio.id == row.id).update(
+            {ReminderAudio.ref_count: ReminderAudio.ref_count - n}, synchronize_session=False
+        )
+        remaining = db.query(ReminderAudio.ref_count).filter(ReminderAudio.id == row.id).scalar()
+        if remaining <= 0:
+            db.query(ReminderAudio).filter(ReminderAudio.id == row.id).delete(synchronize_session=False)
+            orphaned.append(path)
+    return orphaned
+
+
+def remove_audio_files(media_root: Path, paths: Iterable[str]) -> None:
+    for path in paths:
+        try:
+            (media_root / path).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning("Could not delete reminder audio %s: %s", path, e)
@@ -1,21 +1,39 @@
 # Coverage aggregation per region for a vaccine
+import base64
 import json
-from datetime import date, datetime
-from typing import Literal
+import zlib
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any, Literal
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, distinct, func
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.database import SessionLocal
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
+from app.models.coverage_cube import CoverageCube
 from app.models.coverage_report import CoverageReport
-from app.models.parent import Parent
-from app.models.region import Region
-from app.models.vaccine_template import VaccineTemplate
+from app.models.coverage_rollup import CoverageRollup
+from app.models.daily_completion import DailyCompletion
+from app.services.reference_cache import RegionRef, get_reference_data
+from app.utils.cache import SWRCache
 
 TARGET_COVERAGE = 0.95
 YELLOW_THRESHOLD = 0.85
 CoverageMode = Literal["registered_children", "vaccination_records"]
+TimeBucket = Literal["day", "week", "month"]
+CubeDimension = Literal["region", "vaccine", "cohort", "gender"]
+# First -> last dose pairs of the same vaccine_group for dropout rates
+DROPOUT_PAIRS = (("Penta1", "Penta3"), ("VPO1", "VPO3"), ("RR1", "RR2"))
+DEFAULT_ON_TIME_DAYS = 28
+
+_coverage_cache = SWRCache(
+    ttl_seconds=settings.coverage_cache_ttl_seconds,
+    stale_seconds=settings.coverage_cache_stale_seconds,
+    max_entries=settings.coverage_cache_max_entries,
+)
 
 
 def get_coverage(
@@ -28,95 +46,694 @@ def get_coverage(
     refresh: bool = False,
     mode: CoverageMode = "registered_children",
 ) -> list[dict]:
-    """Per-region coverage: total_registered, vaccinated_count, coverage_pct, color."""
-    if db.query(VaccineTemplate).filter(VaccineTemplate.vaccine_name == vaccine_name).first() is None:
+    """
+    Per-region coverage: total_registered, vaccinated_count, coverage_pct, color.
+    Totals come from coverage_rollup (always current); with a date range, vaccinated counts
+    come from daily_completions running totals. With ANALYTICS_ENGINE=numpy both come from
+    the columnar snapshot instead (app.services.analytics_engine). Date-range results are cached in-process per
+    (vaccine, mode, date range); refresh=True recomputes from the raw tables and replaces
+    the cached entry.
+    """
+    if not get_reference_data(db).has_vaccine(vaccine_name):
         return []
 
-    if use_cache and not refresh:
-        cached = (
-            db.query(CoverageReport)
-            .filter(CoverageReport.vaccine_name == vaccine_name)
-            .order_by(CoverageReport.calculated_at.desc())
-            .first()
-        )
-        if cached:
-            return json.loads(cached.payload)
+    if refresh:
+        data = _compute_coverage(db, vaccine_name, date_from=date_from, date_to=date_to, mode=mode, refresh=True)
+        _coverage_cache.set((vaccine_name, mode, date_from, date_to), data)
+        return data
+
+    if date_from is None and date_to is None:
+        # The rollup is current and costs one small read; nothing to cache
+        return _compute_coverage(db, vaccine_name, mode=mode)
+
+    if not use_cache:
+        return _compute_coverage(db, vaccine_name, date_from=date_from, date_to=date_to, mode=mode)
+
+    return _coverage_cache.get(
+        (vaccine_name, mode, date_from, date_to),
+        lambda: _compute_coverage(db, vaccine_name, date_from=date_from, date_to=date_to, mode=mode),
+        revalidate=lambda: _in_new_session(
+            _compute_coverage, vaccine_name, date_from=date_from, date_to=date_to, mode=mode
+        ),
+    )
+
+
+def _compute_coverage(
+    db: Session,
+    vaccine_name: str,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    mode: CoverageMode = "registered_children",
+    refresh: bool = False,
+) -> list[dict]:
+    if not refresh and settings.analytics_engine == "numpy":
+        from app.services.analytics_engine import get_snapshot
+
+        counts = get_snapshot(db).coverage_counts(vaccine_name, date_from=date_from, date_to=date_to, mode=mode)
+        return _build_coverage(db, counts)
+    if not refresh:
+        counts = _rollup_counts(db, vaccine_name, mode=mode)
+        if counts is not None:
+            if date_from is not None or date_to is not None:
+                done = completions_between(db, date_from, date_to, vaccine_name=vaccine_name)
+                counts = {
+                    region_id: (total, done.get((region_id, vaccine_name), 0))
+                    for region_id, (total, _) in counts.items()
+                }
+            return _build_coverage(db, counts)
+    counts = _coverage_counts(db, vaccine_name, date_from=date_from, date_to=date_to, mode=mode)
+    return _build_coverage(db, counts)
+
+
+def _in_new_session(compute: Callable[..., Any], *args, **kwargs) -> Any:
+    """Background revalidation: run compute(db, ...) with its own session, never the request's."""
+    db = SessionLocal()
+    try:
+        return compute(db, *args, **kwargs)
+    finally:
+        db.close()
 
-    regions = db.query(Region).order_by(Region.id).all()
+
+def _build_coverage(db: Session, counts: dict[int, tuple[int, int]]) -> list[dict]:
+    """Coverage rows for every region from {region_id: (total_registered, vaccinated_count)}."""
     result = []
 
-    for region in regions:
-        if mode == "registered_children":
-            total_registered = (
-                db.query(Child)
-                .outerjoin(Parent, Child.parent_id == Parent.id)
-                .filter(
-                    or_(
-                        Child.region_id == region.id,
-                        and_(Child.region_id.is_(None), Parent.region_id == region.id),
-                    )
-                )
-                .count()
-            )
-        else:
-            total_registered = (
-                db.query(ChildVaccination)
-                .join(Child, ChildVaccination.child_id == Child.id)
-                .outerjoin(Parent, Child.parent_id == Parent.id)
-                .filter(
-                    ChildVaccination.vaccine_name == vaccine_name,
-                    or_(
-                        Child.region_id == region.id,
-                        and_(Child.region_id.is_(None), Parent.region_id == region.id),
-                    ),
-                )
-                .count()
-            )
+    for region in get_reference_data(db).regions:
+        total_registered, vaccinated_count = counts.get(region.id, (0, 0))
+        result.append({
+            "region_id": region.id,
+            "region_name": region.name,
+            "population_2024": region.population_2024,
+            "estimated_annual_births": region.estimated_annual_births,
+            **_coverage_figures(total_registered, vaccinated_count),
+        })
+
+    return result
+
+
+def _coverage_figures(total_registered: int, vaccinated_count: int) -> dict:
+    """Counts, coverage ratio and traffic-light color for one (region, vaccine) cell."""
+    if total_registered == 0:
+        coverage_pct = 0.0
+        color = "red"
+        note = "no_data"
+    else:
+        coverage_pct = round(vaccinated_count / total_registered, 4)
+        color = "green" if coverage_pct >= TARGET_COVERAGE else ("yellow" if coverage_pct >= YELLOW_THRESHOLD else "red")
+        note = None
+    return {
+        "total_registered": total_registered,
+        "vaccinated_count": vaccinated_count,
+        "coverage_pct": coverage_pct,
+        "coverage_pct_display": round(coverage_pct * 100, 2),
+        "color": color,
+        "note": note,
+    }
+
+
+def _rollup_counts(db: Session, vaccine_name: str, *, mode: CoverageMode) -> dict[int, tuple[int, int]] | None:
+    """Counts from the incrementally maintained coverage_rollup (None if not built for this vaccine)."""
+    rows = (
+        db.query(CoverageRollup)
+        .filter(CoverageRollup.vaccine_name == vaccine_name)
+        .all()
+    )
+    if not rows:
+        return None
+    if mode == "registered_children":
+        return {r.region_id: (r.registered, r.completed) for r in rows}
+    return {r.region_id: (r.record_total, r.completed) for r in rows}
 
+
+def _completed_filters(date_from: date | None, date_to: date | None) -> list:
+    """Conditions for a completed dose, optionally restricted to a completed_at window."""
+    conds = [ChildVaccination.completed == True]
+    if date_from:
+        conds.append(ChildVaccination.completed_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        conds.append(ChildVaccination.completed_at <= datetime.combine(date_to, datetime.max.time()))
+    return conds
+
+
+def _coverage_counts(
+    db: Session,
+    vaccine_name: str,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    mode: CoverageMode = "registered_children",
+) -> dict[int, tuple[int, int]]:
+    """
+    {region_id: (total_registered, vaccinated_count)} for all regions in one grouped query.
+    A child's region is children.effective_region_id (child's region, else the parent's).
+    """
+    region_col = Child.effective_region_id
+    completed = _completed_filters(date_from, date_to)
+
+    if mode == "registered_children":
+        # Children LEFT JOIN their completed dose: every child counts once as registered,
+        # matching dose rows count as vaccinated.
         q = (
-            db.query(ChildVaccination)
-            .join(Child, ChildVaccination.child_id == Child.id)
-            .outerjoin(Parent, Child.parent_id == Parent.id)
-            .filter(
-                ChildVaccination.vaccine_name == vaccine_name,
-                ChildVaccination.completed == True,
-                or_(
-                    Child.region_id == region.id,
-                    and_(Child.region_id.is_(None), Parent.region_id == region.id),
+            db.query(region_col, func.count(distinct(Child.id)), func.count(ChildVaccination.id))
+            .select_from(Child)
+            .outerjoin(
+                ChildVaccination,
+                and_(
+                    ChildVaccination.child_id == Child.id,
+                    ChildVaccination.vaccine_name == vaccine_name,
+                    *completed,
                 ),
             )
         )
-        if date_from:
-            q = q.filter(ChildVaccination.completed_at >= datetime.combine(date_from, datetime.min.time()))
-        if date_to:
-            q = q.filter(ChildVaccination.completed_at <= datetime.combine(date_to, datetime.max.time()))
-        vaccinated_count = q.count()
-
-        if total_registered == 0:
-            coverage_pct = 0.0
-            color = "red"
-            note = "no_data"
-        else:
-            coverage_pct = round(vaccinated_count / total_registered, 4)
-            color = "green" if coverage_pct >= TARGET_COVERAGE else ("yellow" if coverage_pct >= YELLOW_THRESHOLD else "red")
-            note = None
+    else:
+        q = (
+            db.query(
+                region_col,
+                func.count(ChildVaccination.id),
+                func.coalesce(func.sum(case((and_(*completed), 1), else_=0)), 0),
+            )
+            .select_from(ChildVaccination)
+            .join(Child, ChildVaccination.child_id == Child.id)
+            .filter(ChildVaccination.vaccine_name == vaccine_name)
+        )
 
-        result.append({
+    rows = q.group_by(region_col).all()
+    return {region_id: (int(total), int(vaccinated)) for region_id, total, vaccinated in rows if region_id is not None}
+
+
+def get_coverage_matrix(
+    db: Session,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+    mode: CoverageMode = "registered_children",
+) -> dict:
+    """
+    Coverage for every (region, vaccine) pair in one payload:
+    {"vaccines": [...schedule order], "regions": [{region fields, "coverage": {vaccine: cell}}]}.
+    Same sources and caching as get_coverage, with the whole matrix cached as one entry;
+    refresh=True runs one grouped scan of child_vaccinations instead.
+    """
+    key = ("matrix", mode, date_from, date_to)
+    if refresh:
+        data = _compute_matrix(db, date_from=date_from, date_to=date_to, mode=mode, refresh=True)
+        _coverage_cache.set(key, data)
+        return data
+
+    if date_from is None and date_to is None:
+        return _compute_matrix(db, mode=mode)
+
+    if not use_cache:
+        return _compute_matrix(db, date_from=date_from, date_to=date_to, mode=mode)
+
+    return _coverage_cache.get(
+        key,
+        lambda: _compute_matrix(db, date_from=date_from, date_to=date_to, mode=mode),
+        revalidate=lambda: _in_new_session(
+            _compute_matrix, date_from=date_from, date_to=date_to, mode=mode
+        ),
+    )
+
+
+def _compute_matrix(
+    db: Session,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    mode: CoverageMode = "registered_children",
+    refresh: bool = False,
+) -> dict:
+    ref = get_reference_data(db)
+    vaccines = list(ref.vaccine_names)
+
+    rollup = db.query(CoverageRollup).all() if not refresh else []
+    if rollup:
+        registered = {r.region_id: r.registered for r in rollup}
+        cells = {(r.region_id, r.vaccine_name): (r.record_total, r.completed) for r in rollup}
+        if date_from is not None or date_to is not None:
+            done = completions_between(db, date_from, date_to)
+            cells = {key: (total, done.get(key, 0)) for key, (total, _) in cells.items()}
+    else:
+        registered = registered_counts(db)
+        cells = region_vaccine_counts(db, date_from=date_from, date_to=date_to)
+
+    rows = []
+    for region in ref.regions:
+        coverage = {}
+        for vaccine_name in vaccines:
+            record_total, vaccinated = cells.get((region.id, vaccine_name), (0, 0))
+            total = registered.get(region.id, 0) if mode == "registered_children" else record_total
+            coverage[vaccine_name] = _coverage_figures(total, vaccinated)
+        rows.append({
             "region_id": region.id,
             "region_name": region.name,
             "population_2024": region.population_2024,
             "estimated_annual_births": region.estimated_annual_births,
-            "total_registered": total_registered,
-            "vaccinated_count": vaccinated_count,
-            "coverage_pct": coverage_pct,
-            "coverage_pct_display": round(coverage_pct * 100, 2),
-            "color": color,
-            "note": note,
+            "coverage": coverage,
         })
+    return {"vaccines": vaccines, "regions": rows}
+
+
+def _cumulative_completions(
+    db: Session,
+    day: date,
+    *,
+    vaccine_name: str | None = None,
+    region_id: int | None = None,
+) -> dict[tuple[int, str], int]:
+    """{(region_id, vaccine_name): completed doses on or before day} from daily_completions."""
+    latest = db.query(
+        DailyCompletion.region_id,
+        DailyCompletion.vaccine_name,
+        func.max(DailyCompletion.day).label("day"),
+    ).filter(DailyCompletion.day <= day)
+    if vaccine_name is not None:
+        latest = latest.filter(DailyCompletion.vaccine_name == vaccine_name)
+    if region_id is not None:
+        latest = latest.filter(DailyCompletion.region_id == region_id)
+    latest = latest.group_by(DailyCompletion.region_id, DailyCompletion.vaccine_name).subquery()
+    rows = (
+        db.query(DailyCompletion.region_id, DailyCompletion.vaccine_name, DailyCompletion.cumulative_count)
+        .join(
+            latest,
+            and_(
+                DailyCompletion.region_id == latest.c.region_id,
+                DailyCompletion.vaccine_name == latest.c.vaccine_name,
+                DailyCompletion.day == latest.c.day,
+            ),
+        )
+        .all()
+    )
+    return {(r, v): int(n) for r, v, n in rows}
+
+
+def completions_between(
+    db: Session,
+    date_from: date | None,
+    date_to: date | None,
+    *,
+    vaccine_name: str | None = None,
+    region_id: int | None = None,
+) -> dict[tuple[int, str], int]:
+    """
+    {(region_id, vaccine_name): doses completed in [date_from, date_to]} as the difference of
+    two running totals, independent of how many child_vaccinations rows exist.
+    """
+    upto = _cumulative_completions(db, date_to or date.max, vaccine_name=vaccine_name, region_id=region_id)
+    if date_from is None:
+        return upto
+    before = _cumulative_completions(
+        db, date_from - timedelta(days=1), vaccine_name=vaccine_name, region_id=region_id
+    )
+    return {key: n - before.get(key, 0) for key, n in upto.items()}
+
+
+def _bucket_starts(bucket: TimeBucket, date_from: date, date_to: date) -> list[date]:
+    """First day of every bucket overlapping [date_from, date_to] (weeks start on Monday)."""
+    if bucket == "day":
+        start, step = date_from, timedelta(days=1)
+    elif bucket == "week":
+        start, step = date_from - timedelta(days=date_from.weekday()), timedelta(weeks=1)
+    else:
+        start, step = date_from.replace(day=1), None
+    starts = []
+    while start <= date_to:
+        starts.append(start)
+        if step is not None:
+            start += step
+        else:
+            start = (start + timedelta(days=32)).replace(day=1)
+    return starts
 
-    return result
+
+def get_coverage_timeseries(
+    db: Session,
+    vaccine_names: list[str],
+    *,
+    date_from: date,
+    date_to: date,
+    bucket: TimeBucket = "week",
+    region_id: int | None = None,
+    mode: CoverageMode = "registered_children",
+) -> dict:
+    """
+    Completed doses and cumulative coverage per (region, vaccine) and time bucket.
+    One grouped query over daily_completions: days before date_from collapse into a single
+    baseline group, days in range are bucketed with SQL date functions.
+    """
+    if bucket == "day":
+        bucket_col = func.strftime("%Y-%m-%d", DailyCompletion.day)
+    elif bucket == "week":
+        bucket_col = func.date(DailyCompletion.day, "weekday 0", "-6 days")
+    else:
+        bucket_col = func.strftime("%Y-%m-01", DailyCompletion.day)
+    group_col = case((DailyCompletion.day < date_from, "baseline"), else_=bucket_col)
+
+    q = db.query(
+        DailyCompletion.region_id,
+        DailyCompletion.vaccine_name,
+        group_col,
+        func.sum(DailyCompletion.completed_count),
+    ).filter(
+        DailyCompletion.vaccine_name.in_(vaccine_names),
+        DailyCompletion.day <= date_to,
+    )
+    if region_id is not None:
+        q = q.filter(DailyCompletion.region_id == region_id)
+    rows = q.group_by(DailyCompletion.region_id, DailyCompletion.vaccine_name, group_col).all()
+
+    done: dict[tuple[int, str], dict[str, int]] = {}
+    for r_id, vaccine_name, key, n in rows:
+        done.setdefault((r_id, vaccine_name), {})[key] = int(n)
+
+    rollup = db.query(CoverageRollup).filter(CoverageRollup.vaccine_name.in_(vaccine_names)).all()
+    totals = {
+        (r.region_id, r.vaccine_name): r.registered if mode == "registered_children" else r.record_total
+        for r in rollup
+    }
+
+    starts = [d.isoformat() for d in _bucket_starts(bucket, date_from, date_to)]
+    regions = get_reference_data(db).regions
+    if region_id is not None:
+        regions = tuple(r for r in regions if r.id == region_id)
+    series = []
+    for region in regions:
+        for vaccine_name in vaccine_names:
+            counts = done.get((region.id, vaccine_name), {})
+            total = totals.get((region.id, vaccine_name), 0)
+            cumulative = counts.get("baseline", 0)
+            points = []
+            for start in starts:
+                n = counts.get(start, 0)
+                cumulative += n
+                points.append({
+                    "bucket_start": start,
+                    "completed_count": n,
+                    "cumulative_completed": cumulative,
+                    "coverage_pct": round(cumulative / total, 4) if total else 0.0,
+                })
+            series.append({
+                "region_id": region.id,
+                "region_name": region.name,
+                "vaccine_name": vaccine_name,
+                "total_registered": total,
+                "points": points,
+            })
+    return {
+        "bucket": bucket,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "mode": mode,
+        "series": series,
+    }
+
+
+def get_dropout(
+    db: Session,
+    *,
+    pairs: tuple[tuple[str, str], ...] = DROPOUT_PAIRS,
+    on_time_days: int = DEFAULT_ON_TIME_DAYS,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> dict:
+    """
+    Per-region dropout for each (first dose, last dose) pair of the same vaccine_group,
+    dropout_rate = (first - last) / first over completed doses, and timeliness per vaccine:
+    on_time = completed within on_time_days of due_date, over completed doses that have both
+    dates. Cached in the coverage cache per (pairs, on_time_days); refresh=True recomputes.
+    """
+    key = ("dropout", pairs, on_time_days)
+    if refresh or not use_cache:
+        data = _compute_dropout(db, pairs=pairs, on_time_days=on_time_days)
+        if refresh:
+            _coverage_cache.set(key, data)
+        return data
+    return _coverage_cache.get(
+        key,
+        lambda: _compute_dropout(db, pairs=pairs, on_time_days=on_time_days),
+        revalidate=lambda: _in_new_session(_compute_dropout, pairs=pairs, on_time_days=on_time_days),
+    )
+
+
+def _compute_dropout(db: Session, *, pairs: tuple[tuple[str, str], ...], on_time_days: int) -> dict:
+    ref = get_reference_data(db)
+    groups = {name: t.vaccine_group for name, t in ref.template_by_name.items()}
+    regions = ref.regions
+    if settings.analytics_engine == "numpy":
+        from app.services.analytics_engine import get_snapshot
+
+        snapshot = get_snapshot(db)
+        timeliness = snapshot.timeliness(on_time_days)
+        done = {}
+        for region_id, cells in snapshot.dropout(list(pairs)).items():
+            for first, last in pairs:
+                cell = cells.get(f"{first}->{last}")
+                if cell:
+                    done[(region_id, groups.get(first), first)] = cell["first_dose"]
+                    done[(region_id, groups.get(first), last)] = cell["last_dose"]
+        return _dropout_payload(regions, groups, pairs, on_time_days, done, timeliness)
+
+    # One grouped pass: completed, dated and on-time doses per (region, vaccine_group, vaccine)
+    region_col = Child.effective_region_id
+    completed = ChildVaccination.completed == True
+    dated = and_(completed, ChildVaccination.due_date.isnot(None), ChildVaccination.completed_at.isnot(None))
+    delay = func.julianday(func.date(ChildVaccination.completed_at)) - func.julianday(ChildVaccination.due_date)
+    rows = (
+        db.query(
+            region_col,
+            ChildVaccination.vaccine_group,
+            ChildVaccination.vaccine_name,
+            func.coalesce(func.sum(case((completed, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((dated, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((and_(dated, delay <= on_time_days), 1), else_=0)), 0),
+        )
+        .select_from(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(region_col.isnot(None))
+        .group_by(region_col, ChildVaccination.vaccine_group, ChildVaccination.vaccine_name)
+        .all()
+    )
+    done: dict[tuple[int, str, str], int] = {}
+    timeliness: dict[int, dict[str, dict]] = {}
+    for region_id, group, vaccine_name, n_completed, n_dated, n_on_time in rows:
+        done[(region_id, group, vaccine_name)] = int(n_completed)
+        if n_dated:
+            timeliness.setdefault(region_id, {})[vaccine_name] = {
+                "completed": int(n_dated),
+                "on_time": int(n_on_time),
+                "on_time_rate": round(int(n_on_time) / int(n_dated), 4),
+            }
+
+    return _dropout_payload(regions, groups, pairs, on_time_days, done, timeliness)
+
+
+def _dropout_payload(
+    regions: tuple[RegionRef, ...],
+    groups: dict[str, str],
+    pairs: tuple[tuple[str, str], ...],
+    on_time_days: int,
+    done: dict[tuple[int, str, str], int],
+    timeliness: dict[int, dict[str, dict]],
+) -> dict:
+    """Response for get_dropout from completed doses per (region, vaccine_group, vaccine)."""
+    out = []
+    for region in regions:
+        dropout = {}
+        for first, last in pairs:
+            group = groups.get(first)
+            n_first = done.get((region.id, group, first), 0)
+            n_last = done.get((region.id, group, last), 0)
+            dropout[f"{first}->{last}"] = {
+                "vaccine_group": group,
+                "first_dose": n_first,
+                "last_dose": n_last,
+                "dropout_rate": round((n_first - n_last) / n_first, 4) if n_first else None,
+            }
+        out.append({
+            "region_id": region.id,
+            "region_name": region.name,
+            "dropout": dropout,
+            "timeliness": timeliness.get(region.id, {}),
+        })
+    return {
+        "pairs": [f"{first}->{last}" for first, last in pairs],
+        "on_time_days": on_time_days,
+        "regions": out,
+    }
+
+
+def get_coverage_cube(
+    db: Session,
+    *,
+    group_by: tuple[CubeDimension, ...] = ("region",),
+    vaccine_name: str | None = None,
+    region_id: int | None = None,
+    gender: str | None = None,
+    cohort_from: str | None = None,
+    cohort_to: str | None = None,
+) -> dict:
+    """
+    Roll-up / drill-down over coverage_cube: total and completed doses (vaccination records)
+    summed over the dimensions not in group_by, after filtering on vaccine, region, gender
+    and birth cohort range ('YYYY-MM', inclusive). Never touches the raw tables.
+    """
+    columns = {
+        "region": CoverageCube.region_id,
+        "vaccine": CoverageCube.vaccine_name,
+        "cohort": CoverageCube.cohort_month,
+        "gender": CoverageCube.gender,
+    }
+    dims = [columns[d] for d in group_by]
+    q = db.query(*dims, func.sum(CoverageCube.total), func.sum(CoverageCube.completed))
+    if vaccine_name is not None:
+        q = q.filter(CoverageCube.vaccine_name == vaccine_name)
+    if region_id is not None:
+        q = q.filter(CoverageCube.region_id == region_id)
+    if gender is not None:
+        q = q.filter(CoverageCube.gender == gender)
+    if cohort_from is not None:
+        q = q.filter(CoverageCube.cohort_month >= cohort_from)
+    if cohort_to is not None:
+        q = q.filter(CoverageCube.cohort_month <= cohort_to)
+    if dims:
+        q = q.group_by(*dims).order_by(*dims)
+
+    region_names = {r.id: r.name for r in get_reference_data(db).regions}
+    keys = {"region": "region_id", "vaccine": "vaccine_name", "cohort": "cohort_month", "gender": "gender"}
+    cells = []
+    for row in q.all():
+        total, completed = int(row[-2] or 0), int(row[-1] or 0)
+        if not total:
+            continue
+        cell = {keys[d]: value for d, value in zip(group_by, row)}
+        if "region" in group_by:
+            cell["region_name"] = region_names.get(cell["region_id"])
+        cell.update(
+            total=total,
+            completed=completed,
+            coverage_pct=round(completed / total, 4),
+        )
+        cells.append(cell)
+    return {"group_by": list(group_by), "cells": cells}
+
+
+def registered_counts(db: Session) -> dict[int, int]:
+    """{region_id: registered children} in one grouped query."""
+    region_col = Child.effective_region_id
+    rows = (
+        db.query(region_col, func.count(Child.id))
+        .select_from(Child)
+        .group_by(region_col)
+        .all()
+    )
+    return {region_id: int(n) for region_id, n in rows if region_id is not None}
+
+
+def region_vaccine_counts(
+    db: Session,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> dict[tuple[int, str], tuple[int, int]]:
+    """
+    {(region_id, vaccine_name): (record_total, vaccinated_count)} from a single grouped scan of
+    child_vaccinations; vaccinated_count honours the completed_at window.
+    """
+    region_col = Child.effective_region_id
+    completed = _completed_filters(date_from, date_to)
+    rows = (
+        db.query(
+            region_col,
+            ChildVaccination.vaccine_name,
+            func.count(ChildVaccination.id),
+            func.coalesce(func.sum(case((and_(*completed), 1), else_=0)), 0),
+        )
+        .select_from(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .group_by(region_col, ChildVaccination.vaccine_name)
+        .all()
+    )
+    return {
+        (region_id, vaccine_name): (int(total), int(vaccinated))
+        for region_id, vaccine_name, total, vaccinated in rows
+        if region_id is not None
+    }
 
 
 def cache_coverage_report(db: Session, vaccine_name: str, payload: list[dict]) -> None:
-    db.add(CoverageReport(vaccine_name=vaccine_name, payload=json.dumps(payload)))
+    """Store a compressed coverage snapshot, then apply the retention policy for that vaccine."""
+    db.add(
+        CoverageReport(
+            vaccine_name=vaccine_name,
+            payload=_encode_payload(payload),
+            encoding="zlib",
+        )
+    )
     db.commit()
+    compact_coverage_reports(db, vaccine_name)
+
+
+def _encode_payload(payload: list[dict]) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+
+def _decode_payload(report: CoverageReport) -> list[dict]:
+    if report.encoding == "zlib":
+        return json.loads(zlib.decompress(base64.b64decode(report.payload)))
+    return json.loads(report.payload)
+
+
+def get_coverage_history(db: Session, vaccine_name: str, limit: int = 100) -> list[dict]:
+    """Retained snapshots for a vaccine, newest first."""
+    reports = (
+        db.query(CoverageReport)
+        .filter(CoverageReport.vaccine_name == vaccine_name)
+        .order_by(CoverageReport.calculated_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [{"calculated_at": r.calculated_at.isoformat(), "regions": _decode_payload(r)} for r in reports]
+
+
+def compact_coverage_reports(db: Session, vaccine_name: str, now: datetime | None = None) -> int:
+    """
+    Retention for one vaccine's snapshots: keep the newest coverage_report_keep_latest rows,
+    the newest row of each day within coverage_report_keep_daily_days, and the newest row of
+    each ISO week within coverage_report_keep_weekly_weeks. Deletes the rest; returns count.
+    """
+    now = now or datetime.utcnow()
+    daily_since = now - timedelta(days=settings.coverage_report_keep_daily_days)
+    weekly_since = now - timedelta(weeks=settings.coverage_report_keep_weekly_weeks)
+    rows = (
+        db.query(CoverageReport.id, CoverageReport.calculated_at)
+        .filter(CoverageReport.vaccine_name == vaccine_name)
+        .order_by(CoverageReport.calculated_at.desc())
+        .all()
+    )
+    keep: set[int] = {report_id for report_id, _ in rows[: settings.coverage_report_keep_latest]}
+    seen_days: set[date] = set()
+    seen_weeks: set[tuple[int, int]] = set()
+    for report_id, calculated_at in rows:
+        if calculated_at >= daily_since:
+            day = calculated_at.date()
+            if day not in seen_days:
+                seen_days.add(day)
+                keep.add(report_id)
+        elif calculated_at >= weekly_since:
+            year, week, _ = calculated_at.isocalendar()
+            if (year, week) not in seen_weeks:
+                seen_weeks.add((year, week))
+                keep.add(report_id)
+
+    stale_ids = [report_id for report_id, _ in rows if report_id not in keep]
+    for i in range(0, len(stale_ids), 500):
+        db.query(CoverageReport).filter(CoverageReport.id.in_(stale_ids[i : i + 500])).delete(
+            synchronize_session=False
+        )
+    if stale_ids:
+        db.commit()
+    return len(stale_ids)
@@ -0,0 +1,256 @@
+"""
+Vaccine demand forecast per (region, vaccine, week) and projected stock-out dates.
+
+Demand over the horizon has three parts:
+- registered: uncompleted doses already scheduled in child_vaccinations.due_date
+  (one grouped query), bucketed in weeks from today
+- overdue: uncompleted doses due in the last forecast_overdue_days (still to be given)
+- projected: doses for children not registered yet, from Region.estimated_annual_births.
+  A dose with offset o falls due in week w for children born in week w shifted back by o days.
+  Registered children of that birth month (coverage_cube) are subtracted, and the rest is
+  scaled by the 95% coverage target.
+The national weekly total (overdue counted in the first week) is run down against the
+stock on hand (national store plus regional ledger balances) to find the projected
+stock-out date.
+
+Cached forecasts are dropped when a write that changes them commits: stock movements and
+balances (receipts, transfers, administered doses), completions and scheduled doses.
+"""
+import calendar
+import math
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Integer, case, cast, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.coverage_cube import CoverageCube
+from app.models.national_stock import NationalStock
+from app.models.stock_balance import StockBalance
+from app.models.stock_movement import StockMovement
+from app.services.reference_cache import get_reference_data
+from app.services.stock_service import stock_balances
+from app.utils.cache import SWRCache
+
+TARGET_COVERAGE = 0.95
+OVERDUE = -1
+
+_forecast_cache = SWRCache(
+    ttl_seconds=settings.coverage_cache_ttl_seconds,
+    stale_seconds=settings.coverage_cache_stale_seconds,
+    max_entries=32,
+)
+
+
+def get_forecast(
+    db: Session,
+    *,
+    vaccine_name: str | None = None,
+    horizon_weeks: int | None = None,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> dict:
+    """
+    Weekly demand per vaccine (nationally and per region) and projected stock-out date.
+    The forecast for all vaccines is computed once per (day, horizon) and cached; vaccine_name
+    only filters the cached result.
+    """
+    horizon_weeks = horizon_weeks or settings.forecast_horizon_weeks
+    today = datetime.utcnow().date()
+    key = ("forecast", today, horizon_weeks)
+    if refresh or not use_cache:
+        data = _compute_forecast(db, today=today, horizon_weeks=horizon_weeks)
+        if refresh:
+            _forecast_cache.set(key, data)
+    else:
+        data = _forecast_cache.get(key, lambda: _compute_forecast(db, today=today, horizon_weeks=horizon_weeks))
+    if vaccine_name is None:
+        return data
+    return {**data, "vaccines": [v for v in data["vaccines"] if v["vaccine_name"] == vaccine_name]}
+
+
+def _registered_due(
+    db: Session, today: date, horizon_weeks: int
+) -> dict[tuple[int, str, int], int]:
+    """{(region_id, vaccine_name, week index or OVERDUE): uncompleted doses} in one grouped query."""
+    first_overdue = today - timedelta(days=settings.forecast_overdue_days)
+    end = today + timedelta(weeks=horizon_weeks)
+    days_ahead = func.julianday(ChildVaccination.due_date) - func.julianday(today.isoformat())
+    week_col = case((ChildVaccination.due_date < today, OVERDUE), else_=cast(days_ahead / 7, Integer))
+    rows = (
+        db.query(Child.effective_region_id, ChildVaccination.vaccine_name, week_col, func.count(ChildVaccination.id))
+        .select_from(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(
+            ChildVaccination.completed == False,
+            ChildVaccination.due_date >= first_overdue,
+            ChildVaccination.due_date < end,
+            Child.effective_region_id.isnot(None),
+        )
+        .group_by(Child.effective_region_id, ChildVaccination.vaccine_name, week_col)
+        .all()
+    )
+    return {(region_id, vaccine, int(week)): int(n) for region_id, vaccine, week, n in rows}
+
+
+def _month_key(d: date) -> str:
+    return d.strftime("%Y-%m")
+
+
+def _unregistered_per_day(
+    db: Session, births_per_year: dict[int, int]
+) -> dict[tuple[int, str, str], float]:
+    """
+    {(region_id, vaccine_name, 'YYYY-MM'): unregistered births per day} for past cohorts,
+    from expected monthly births minus the children registered in coverage_cube.
+    """
+    rows = (
+        db.query(CoverageCube.region_id, CoverageCube.vaccine_name, CoverageCube.cohort_month, func.sum(CoverageCube.total))
+        .group_by(CoverageCube.region_id, CoverageCube.vaccine_name, CoverageCube.cohort_month)
+        .all()
+    )
+    out = {}
+    for region_id, vaccine_name, cohort_month, registered in rows:
+        if not cohort_month or region_id not in births_per_year:
+            continue
+        year, month = (int(x) for x in cohort_month.split("-"))
+        days = calendar.monthrange(year, month)[1]
+        expected = births_per_year[region_id] / 365 * days
+        out[(region_id, vaccine_name, cohort_month)] = max(0.0, expected - int(registered or 0)) / days
+    return out
+
+
+def _compute_forecast(db: Session, *, today: date, horizon_weeks: int) -> dict:
+    ref = get_reference_data(db)
+    week_starts = [today + timedelta(weeks=w) for w in range(horizon_weeks)]
+    births_per_year = {r.id: r.estimated_annual_births for r in ref.regions}
+    registered = _registered_due(db, today, horizon_weeks)
+    unregistered = _unregistered_per_day(db, births_per_year)
+    balances = stock_balances(db)
+
+    vaccines = []
+    for vaccine_name in ref.vaccine_names:
+        offset = ref.template_by_name[vaccine_name].offset_days
+        national = [0.0] * horizon_weeks
+        national_registered = [0] * horizon_weeks
+        national_projected = [0.0] * horizon_weeks
+        overdue_total = 0
+        regions = []
+        for region in ref.regions:
+            per_day = births_per_year[region.id] / 365
+            overdue = registered.get((region.id, vaccine_name, OVERDUE), 0)
+            weekly = []
+            for w, start in enumerate(week_starts):
+                due = registered.get((region.id, vaccine_name, w), 0)
+                # Children born in [start - offset, start - offset + 7) reach this dose in week w
+                projected = 0.0
+                for d in range(7):
+                    birth = start + timedelta(days=d - offset)
+                    if birth >= today:
+                        projected += per_day
+                    else:
+                        projected += unregistered.get((region.id, vaccine_name, _month_key(birth)), per_day)
+                projected *= TARGET_COVERAGE
+                weekly.append({"registered_due": due, "projected": round(projected, 1)})
+                national_registered[w] += due
+                national_projected[w] += projected
+                national[w] += due + projected
+            overdue_total += overdue
+            regions.append({
+                "region_id": region.id,
+                "region_name": region.name,
+                "overdue": overdue,
+                "registered_due": sum(x["registered_due"] for x in weekly),
+                "projected": round(sum(x["projected"] for x in weekly), 1),
+                "weekly": weekly,
+            })
+
+        stock_row = ref.stock_by_vaccine.get(vaccine_name)
+        current_stock = (stock_row.current_stock if stock_row else 0) + sum(balances.get(vaccine_name, {}).values())
+        weekly_national = []
+        cumulative = 0.0
+        stockout = None
+        for w, start in enumerate(week_starts):
+            demand = national[w] + (overdue_total if w == 0 else 0)
+            if stockout is None and demand > 0 and cumulative + demand > current_stock:
+                days_covered = math.floor(7 * max(0.0, current_stock - cumulative) / demand)
+                stockout = start + timedelta(days=min(6, days_covered))
+            cumulative += demand
+            weekly_national.append({
+                "week_start": start.isoformat(),
+                "registered_due": national_registered[w],
+                "projected": round(national_projected[w], 1),
+                "total": math.ceil(demand),
+                "cumulative": math.ceil(cumulative),
+            })
+        vaccines.append({
+            "vaccine_name": vaccine_name,
+            "current_stock": current_stock,
+            "overdue": overdue_total,
+            "registered_due": sum(national_registered),
+            "projected": round(sum(national_projected), 1),
+            "total_demand": math.ceil(overdue_total + sum(national)),
+            "projected_stockout_date": stockout.isoformat() if stockout else None,
+            "weekly": weekly_national,
+            "regions": regions,
+        })
+    return {
+        "as_of": today.isoformat(),
+        "horizon_weeks": horizon_weeks,
+        "vaccines": vaccines,
+    }
+
+
+# --- invalidation on writes ---
+_STOCK_MODELS = (StockMovement, StockBalance, NationalStock)
+# Changes to these attributes move a dose in or out of the forecast, or to another region
+_FORECAST_ATTRIBUTES = {
+    ChildVaccination: ("completed", "due_date", "vaccine_name"),
+    Child: ("region_id", "effective_region_id"),
+}
+
+
+def invalidate_forecast() -> None:
+    """Drop every cached forecast; the next get_forecast() recomputes it."""
+    _forecast_cache.invalidate()
+
+
+def _changes_forecast(obj) -> bool:
+    attributes = _FORECAST_ATTRIBUTES.get(type(obj))
+    if attributes is None:
+        return False
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_forecast_writes(session: Session, _flush_context) -> None:
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, (*_STOCK_MODELS, ChildVaccination, Child)):
+            session.info["forecast_dirty"] = True
+            return
+    for obj in session.dirty:
+        if isinstance(obj, _STOCK_MODELS) or _changes_forecast(obj):
+            session.info["forecast_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_forecast_bulk_writes(state) -> None:
+    # Ledger balance updates and bulk vaccination updates skip the flush
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        if state.bind_mapper.class_ in (*_STOCK_MODELS, ChildVaccination, Child):
+            state.session.info["forecast_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("forecast_dirty", False):
+        invalidate_forecast()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("forecast_dirty", None)
@@ -0,0 +1,157 @@
+"""
+In-process cache of near-static reference data: vaccine templates, regions, national stock.
+
+get_reference_data() returns an immutable snapshot loaded with three small queries and
+reused until it is invalidated. Any committed ORM write to vaccine_templates, regions or
+national_stock (unit of work or bulk query update/delete) bumps the version through the
+session events below; seeders also call invalidate_reference_data() explicitly. Snapshots
+older than reference_cache_ttl_seconds are reloaded too, so writes made by another
+process (another worker, a CLI seeder) are picked up within the TTL.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.national_stock import NationalStock
+from app.models.region import Region
+from app.models.vaccine_template import VaccineTemplate
+
+_REFERENCE_MODELS = (VaccineTemplate, Region, NationalStock)
+
+
+@dataclass(frozen=True)
+class TemplateRef:
+    id: int
+    period_label: str
+    vaccine_name: str
+    vaccine_group: str
+    offset_days: int
+
+
+@dataclass(frozen=True)
+class RegionRef:
+    id: int
+    name: str
+    population_2024: int
+    estimated_annual_births: int
+    telegram_chat_id: str | None
+
+
+@dataclass(frozen=True)
+class StockRef:
+    vaccine_name: str
+    current_stock: int
+    updated_at: datetime | None
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """One consistent snapshot; treat the dicts as read-only."""
+
+    version: int
+    loaded_at: float
+    # Schedule order (offset_days, id)
+    templates: tuple[TemplateRef, ...]
+    # Distinct vaccine names in schedule order
+    vaccine_names: tuple[str, ...]
+    # First template per vaccine name
+    template_by_name: dict[str, TemplateRef]
+    # Ordered by id
+    regions: tuple[RegionRef, ...]
+    region_by_id: dict[int, RegionRef]
+    stock_by_vaccine: dict[str, StockRef]
+
+    def has_vaccine(self, vaccine_name: str) -> bool:
+        return vaccine_name in self.template_by_name
+
+
+_lock = threading.Lock()
+_version = 0
+_data: ReferenceData | None = None
+
+
+def invalidate_reference_data() -> None:
+    """Drop the cached snapshot; the next get_reference_data() reloads it."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def get_reference_data(db: Session) -> ReferenceData:
+    """Current reference snapshot (loaded on first use, after invalidation or after the TTL)."""
+    global _data
+    data = _data
+    if _is_current(data):
+        return data
+    with _lock:
+        if not _is_current(_data):
+            _data = _load(db, _version)
+        return _data
+
+
+def _is_current(data: ReferenceData | None) -> bool:
+    return (
+        data is not None
+        and data.version == _version
+        and time.monotonic() - data.loaded_at < settings.reference_cache_ttl_seconds
+    )
+
+
+def _load(db: Session, version: int) -> ReferenceData:
+    templates = tuple(
+        TemplateRef(t.id, t.period_label, t.vaccine_name, t.vaccine_group, t.offset_days)
+        for t in db.query(VaccineTemplate).order_by(VaccineTemplate.offset_days, VaccineTemplate.id)
+    )
+    template_by_name: dict[str, TemplateRef] = {}
+    for t in templates:
+        template_by_name.setdefault(t.vaccine_name, t)
+    regions = tuple(
+        RegionRef(r.id, r.name, r.population_2024, r.estimated_annual_births, r.telegram_chat_id)
+        for r in db.query(Region).order_by(Region.id)
+    )
+    stock: dict[str, StockRef] = {}
+    for s in db.query(NationalStock).order_by(NationalStock.id):
+        stock.setdefault(s.vaccine_name, StockRef(s.vaccine_name, s.current_stock, s.updated_at))
+    return ReferenceData(
+        version=version,
+        loaded_at=time.monotonic(),
+        templates=templates,
+        vaccine_names=tuple(template_by_name),
+        template_by_name=template_by_name,
+        regions=regions,
+        region_by_id={r.id: r for r in regions},
+        stock_by_vaccine=stock,
+    )
+
+
+# --- invalidation on writes ---
+@event.listens_for(Session, "after_flush")
+def _mark_reference_writes(session: Session, _flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _REFERENCE_MODELS):
+            session.info["reference_data_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_reference_bulk_writes(state) -> None:
+    # db.query(Model).update()/delete() and update()/delete() statements skip the flush
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        if state.bind_mapper.class_ in _REFERENCE_MODELS:
+            state.session.info["reference_data_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("reference_data_dirty", False):
+        invalidate_reference_data()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("reference_data_dirty", None)
@@ -0,0 +1,341 @@
+"""
+Durable reminder outbox.
+
+Each due (child, period_label, due_date) reminder group becomes one reminder_jobs row,
+keyed by an idempotency key so a group has one job however often it is enqueued. Workers claim jobs in batches
+with a lease (one conditional UPDATE, so two workers never hold the same job), send them
+through reminder_service.send_reminder_groups and mark them done. A failed job is retried
+with exponential backoff until reminder_job_max_attempts; a job whose worker died or
+stalled is reclaimed once its lease expires.
+
+A lease lasts at least one pipeline phase of the batch (reminder_job_group_seconds per
+group and scarcest provider slot) and is renewed before each phase. Right before delivery
+the worker renews it again and drops the groups whose jobs were taken over meanwhile, so a
+reclaimed job is delivered by one worker only. Re-running a job after that is safe:
+vaccinations marked reminder_sent are skipped, and so are channels already recorded as
+sent in reminder_deliveries.
+
+Worker: python -m app.services.reminder_outbox [--once] [--enqueue]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, bindparam, or_, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+import app.models  # noqa: F401  (all mappers, for the standalone worker)
+from app.models.child_vaccination import ChildVaccination
+from app.models.reminder_job import ReminderJob
+from app.services.reminder_service import (
+    GroupKey,
+    ReminderLeaseLost,
+    due_vaccinations_query,
+    reminder_mailer,
+    send_reminder_groups,
+)
+from app.services.smtp_pool import SMTPPool
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(child_id: int, period_label: str, due_date) -> str:
+    return f"{child_id}:{period_label}:{due_date.isoformat()}"
+
+
+def _due_group_keys(db: Session, child_id: int | None = None):
+    """
+    Due (child_id, period_label, due_date) group keys in key order, reminder_scan_batch_size
+    per window. Each window is its own keyset query, so the caller may commit between windows.
+    """
+    key = (ChildVaccination.child_id, ChildVaccination.period_label, ChildVaccination.due_date)
+    batch = settings.reminder_scan_batch_size
+    last = None
+    while True:
+        q = due_vaccinations_query(db, child_id).with_entities(*key).distinct().order_by(*key)
+        if last is not None:
+            q = q.filter(tuple_(*key) > tuple_(*last))
+        window = q.limit(batch).all()
+        if window:
+            yield window
+        if len(window) < batch:
+            return
+        last = window[-1]
+
+
+def enqueue_due_reminders(db: Session, child_id: int | None = None) -> int:
+    """
+    One job per due reminder group not enqueued yet. Streams the due groups window by
+    window and commits once per window. Returns jobs created or revived.
+    """
+    created = 0
+    for window in _due_group_keys(db, child_id):
+        now = datetime.utcnow()
+        rows = [
+            {
+                "idempotency_key": idempotency_key(child, period, due),
+                "child_id": child,
+                "period_label": period,
+                "due_date": due,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for child, period, due in window
+        ]
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(rows), 500):
+            stmt = insert(ReminderJob).values(rows[i:i + 500])
+            # A done job whose vaccinations are due and unsent again was reset on purpose
+            # (e.g. scripts/reset_reminder_for_test.py): revive it. Pending, leased and
+            # failed jobs are left alone.
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["idempotency_key"],
+                set_={"status": "pending", "attempts": 0, "next_attempt_at": now, "result": None, "updated_at": now},
+                where=ReminderJob.status == "done",
+            )
+            created += db.execute(stmt).rowcount
+        db.commit()
+    return created
+
+
+def _claimable(now: datetime):
+    return and_(
+        ReminderJob.next_attempt_at <= now,
+        or_(
+            ReminderJob.status == "pending",
+            and_(ReminderJob.status == "leased", ReminderJob.lease_expires_at < now),
+        ),
+    )
+
+
+def _lease_seconds(jobs: int) -> int:
+    """Lease for a batch of jobs: one pipeline phase, each group waiting for the scarcest provider slots."""
+    slots = max(
+        1,
+        min(settings.reminder_tts_concurrency, settings.reminder_smtp_concurrency, settings.reminder_twilio_concurrency),
+    )
+    return max(settings.reminder_job_lease_seconds, math.ceil(jobs / slots) * settings.reminder_job_group_seconds)
+
+
+def claim_jobs(db: Session, owner: str, limit: int, child_id: int | None = None) -> list[ReminderJob]:
+    """Lease up to limit due jobs to owner (commits). Each claim counts as one attempt."""
+    now = datetime.utcnow()
+    candidates = select(ReminderJob.id).where(_claimable(now))
+    if child_id is not None:
+        candidates = candidates.where(ReminderJob.child_id == child_id)
+    candidates = candidates.order_by(ReminderJob.next_attempt_at, ReminderJob.id).limit(limit)
+    db.execute(
+        update(ReminderJob)
+        # Re-checked in the UPDATE itself: a job another worker leased in between is skipped
+        .where(ReminderJob.id.in_(candidates.scalar_subquery()), _claimable(now))
+        .values(
+            status="leased",
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=_lease_seconds(limit)),
+            attempts=ReminderJob.attempts + 1,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return (
+        db.query(ReminderJob)
+        .filter(ReminderJob.status == "leased", ReminderJob.lease_owner == owner)
+        .order_by(ReminderJob.id)
+        .all()
+    )
+
+
+def _hold_leases(db: Session, owner: str, job_ids: dict[GroupKey, int]) -> set[GroupKey]:
+    """
+    Extend owner's leases on job_ids for one more phase (commits). Returns the group keys
+    whose jobs owner still holds; a job another worker reclaimed is not renewed.
+    """
+    if not job_ids:
+        return set()
+    now = datetime.utcnow()
+    ids = list(job_ids.values())
+    held_by_owner = and_(ReminderJob.id.in_(ids), ReminderJob.status == "leased", ReminderJob.lease_owner == owner)
+    db.execute(
+        update(ReminderJob)
+        .where(held_by_owner)
+        .values(lease_expires_at=now + timedelta(seconds=_lease_seconds(len(ids))), updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    held = {job_id for (job_id,) in db.query(ReminderJob.id).filter(held_by_owner)}
+    return {key for key, job_id in job_ids.items() if job_id in held}
+
+
+def _backoff(attempts: int) -> timedelta:
+    seconds = settings.reminder_job_backoff_seconds * 2 ** max(0, attempts - 1)
+    return timedelta(seconds=min(seconds, settings.reminder_job_backoff_max_seconds))
+
+
+def _finish(db: Session, owner: str, outcomes: list[dict[str, Any]]) -> None:
+    """Record job outcomes in one executemany UPDATE, each only while we still hold its lease."""
+    if not outcomes:
+        return
+    jobs = ReminderJob.__table__
+    # An expired lease may have been taken over by another worker: that row is left alone
+    db.execute(
+        update(jobs)
+        .where(jobs.c.id == bindparam("job_id"), jobs.c.status == "leased", jobs.c.lease_owner == owner)
+        .values(
+            status=bindparam("new_status"),
+            last_error=bindparam("new_error"),
+            result=bindparam("new_result"),
+            next_attempt_at=bindparam("new_next_attempt_at"),
+            lease_owner=None,
+            lease_expires_at=None,
+            updated_at=datetime.utcnow(),
+        ),
+        outcomes,
+    )
+
+
+def process_jobs(
+    db: Session, jobs: list[ReminderJob], owner: str, mailer: SMTPPool | None = None
+) -> list[dict[str, Any]]:
+    """
+    Send the leased jobs' reminder groups and record each outcome. The leases are renewed
+    before each pipeline phase; groups whose job another worker took over are skipped.
+    Returns the sent items.
+    """
+    if not jobs:
+        return []
+    # Read before the lease renewal commits (and expires the jobs)
+    job_ids = {(job.child_id, job.period_label, job.due_date): job.id for job in jobs}
+    jobs_state = [(job.id, job.child_id, job.period_label, job.due_date, job.attempts) for job in jobs]
+    wanted = _hold_leases(db, owner, job_ids)
+    if not wanted:
+        return []
+    jobs_state = [j for j in jobs_state if (j[1], j[2], j[3]) in wanted]
+    child_ids = {child_id for child_id, _, _ in wanted}
+    # Child and parent come with the rows (one query), ordered so groups are contiguous
+    vaccinations = [
+        v
+        for v in due_vaccinations_query(db)
+        .filter(ChildVaccination.child_id.in_(child_ids))
+        .order_by(ChildVaccination.child_id, ChildVaccination.period_label, ChildVaccination.due_date, ChildVaccination.id)
+        if (v.child_id, v.period_label, v.due_date) in wanted
+    ]
+    results = send_reminder_groups(
+        db, vaccinations, mailer, hold=lambda session, keys: _hold_leases(session, owner, {k: job_ids[k] for k in keys})
+    )
+
+    sent = []
+    outcomes = []
+    now = datetime.utcnow()
+    for job_id, child_id, period_label, due_date, attempts in jobs_state:
+        result = results.get((child_id, period_label, due_date))
+        if isinstance(result, ReminderLeaseLost):
+            # The job is another worker's now; its outcome is theirs to record
+            continue
+        outcome = {"job_id": job_id, "new_result": None, "new_error": None, "new_next_attempt_at": now}
+        if isinstance(result, BaseException):
+            outcome["new_error"] = repr(result)
+            if attempts >= settings.reminder_job_max_attempts:
+                outcome["new_status"] = "failed"
+            else:
+                outcome["new_status"] = "pending"
+                outcome["new_next_attempt_at"] = now + _backoff(attempts)
+        else:
+            # None: nothing left to send (completed, already sent, or child deleted)
+            outcome["new_status"] = "done"
+            if result:
+                outcome["new_result"] = json.dumps(result)
+                sent.append(result)
+        outcomes.append(outcome)
+    _finish(db, owner, outcomes)
+    db.commit()
+    return sent
+
+
+def drain(db: Session, owner: str, child_id: int | None = None) -> list[dict[str, Any]]:
+    """Claim and process batches until no job is due (one SMTP pool throughout). Returns the sent items."""
+    sent: list[dict[str, Any]] = []
+    with reminder_mailer() as mailer:
+        while jobs := claim_jobs(db, owner, settings.reminder_job_batch_size, child_id=child_id):
+            sent.extend(process_jobs(db, jobs, owner, mailer))
+    return sent
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def check_and_send_reminders(db: Session) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Enqueue all due reminder groups. Without a worker (reminder_worker_enabled false) also
+    drain the outbox in this call. Returns (jobs enqueued, reminders sent now).
+    """
+    enqueued = enqueue_due_reminders(db)
+    if settings.reminder_worker_enabled:
+        return enqueued, []
+    return enqueued, drain(db, _owner())
+
+
+def check_and_send_reminders_for_child(db: Session, child_id: int) -> list[dict[str, Any]]:
+    """
+    Enqueue (and, without a worker, send) reminders for a single child's due/overdue vaccinations.
+    Call this right after adding a child so that any vaccines already due get their voice created immediately.
+    """
+    enqueue_due_reminders(db, child_id)
+    if settings.reminder_worker_enabled:
+        return []
+    return drain(db, _owner(), child_id=child_id)
+
+
+def run_worker(*, once: bool = False, enqueue: bool = False) -> None:
+    """Poll the outbox and send due jobs; several workers can run side by side."""
+    owner = _owner()
+    logger.info("Reminder worker %s started", owner)
+    # SMTP sessions stay open between batches; the pool reconnects if the server dropped them
+    with reminder_mailer() as mailer:
+        while True:
+            db = SessionLocal()
+            try:
+                if enqueue:
+                    enqueue_due_reminders(db)
+                jobs = claim_jobs(db, owner, settings.reminder_job_batch_size)
+                sent = process_jobs(db, jobs, owner, mailer)
+            except Exception:
+                # e.g. "database is locked": keep polling; jobs leased by this poll are
+                # reclaimed once their lease expires
+                logger.exception("Reminder worker %s: poll failed", owner)
+                db.rollback()
+                if once:
+                    return
+                time.sleep(settings.reminder_worker_poll_seconds)
+                continue
+            finally:
+                db.close()
+            if jobs:
+                logger.info("Reminder worker %s: %d jobs, %d reminders sent", owner, len(jobs), len(sent))
+            if once:
+                return
+            if not jobs:
+                time.sleep(settings.reminder_worker_poll_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send reminder jobs from the reminder_jobs outbox.")
+    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    parser.add_argument("--enqueue", action="store_true", help="Also enqueue due reminders on every poll")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_worker(once=args.once, enqueue=args.enqueue)
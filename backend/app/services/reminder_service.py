@@ -1,6 +1,14 @@
 """Vaccine reminder service: AI text (Minimax), voice (ElevenLabs), store, email, SMS."""
+import asyncio
+import json
 import logging
-from datetime import date, timedelta
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import partial
 
 # Month names in English for AI-readable date in prompts (e.g. "23 March 2023")
 _MONTH_NAMES = (
@@ -19,16 +27,31 @@ from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import os
-import smtplib
 from pathlib import Path
 from typing import Any
 
 import requests
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, contains_eager
 
 from app.config import settings
 from app.models.child import Child
 from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+from app.models.reminder_delivery import ReminderDelivery
+from app.models.reminder_text_template import ReminderTextTemplate
+from app.services.audio_store import (
+    acquire_audio,
+    audio_key,
+    find_audio,
+    register_audio,
+    release_audio,
+    remove_audio_files,
+    write_audio_file,
+)
+from app.services import twilio_client
+from app.services.smtp_pool import SMTPPool
+from app.services.twilio_client import TwilioResult
 
 
 def _media_dir() -> Path:
@@ -126,46 +149,89 @@ def _generate_reminder_text_minimax(
         return fallback
 
 
-def _generate_reminder_text_for_period(
+# Placeholders in cached period templates, substituted per child
+CHILD_NAME_PLACEHOLDER = "{child_name}"
+DUE_DATE_PLACEHOLDER = "{due_date}"
+
+
+def _fallback_period_text(
     lang: str, child_name: str, period_label: str, vaccine_names: list[str], due_date: date
 ) -> str:
-    """Generate one reminder text for a period with multiple vaccines (one voice per period)."""
-    due_date_str = _format_date_readable(due_date)
-    lang = lang if lang in ("ar", "fr", "en") else "fr"
-    vaccine_list = ", ".join(vaccine_names)
-    fallback = _FALLBACK_REMINDERS_PERIOD.get(lang, _FALLBACK_REMINDERS_PERIOD["fr"]).format(
+    return _FALLBACK_REMINDERS_PERIOD.get(lang, _FALLBACK_REMINDERS_PERIOD["fr"]).format(
         child_name=child_name,
         period_label=period_label,
-        vaccine_list=vaccine_list,
-        due_date_str=due_date_str,
+        vaccine_list=", ".join(vaccine_names),
+        due_date_str=_format_date_readable(due_date),
     )
-    if not settings.minimax_api_key or len(vaccine_names) == 0:
-        return fallback
+
+
+def _render_period_template(template: str, child_name: str, due_date: date) -> str:
+    return template.replace(CHILD_NAME_PLACEHOLDER, child_name).replace(
+        DUE_DATE_PLACEHOLDER, _format_date_readable(due_date)
+    )
+
+
+def _is_valid_period_template(template: str) -> bool:
+    """Names the child through the placeholder and has no other {...} left for the model to invent."""
+    if CHILD_NAME_PLACEHOLDER not in template:
+        return False
+    rest = template.replace(CHILD_NAME_PLACEHOLDER, "").replace(DUE_DATE_PLACEHOLDER, "")
+    return "{" not in rest and "}" not in rest
+
+
+_LANGUAGE_NAMES = {
+    "ar": "Arabic Fusha (Modern Standard Arabic only)",
+    "fr": "French only",
+    "en": "English only",
+}
+
+
+def _parse_template_array(content: str, count: int) -> list[str | None]:
+    """JSON array of count strings from a model reply (code fences / <think> allowed); [None]*count if unusable."""
+    content = re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL)
+    start, end = content.find("["), content.rfind("]")
+    try:
+        items = json.loads(content[start:end + 1]) if start != -1 and end > start else None
+    except ValueError:
+        items = None
+    if not isinstance(items, list) or len(items) != count:
+        return [None] * count
+    return [
+        item.strip() if isinstance(item, str) and _is_valid_period_template(item.strip()) else None
+        for item in items
+    ]
+
+
+def _generate_period_templates_minimax(
+    lang: str, periods: list[tuple[str, list[str]]]
+) -> list[str | None]:
+    """
+    Minimax reminder texts for several periods of one language in one call (one voice per
+    period), written with {child_name} and {due_date} placeholders so each can be reused
+    for every child. periods is [(period_label, vaccine_names)]; the result is aligned with
+    it, None where Minimax is not configured, fails, or returns an unusable item.
+    """
+    if not settings.minimax_api_key or not periods:
+        return [None] * len(periods)
     url = f"{settings.minimax_base_url.rstrip('/')}/v1/text/chatcompletion_v2"
     headers = {
         "Authorization": f"Bearer {settings.minimax_api_key}",
         "Content-Type": "application/json",
     }
-    vaccines_str = ", ".join(vaccine_names)
-    if lang == "ar":
-        prompt = (
-            f"Generate a short, polite reminder in Arabic Fusha for a parent "
-            f"that their child {child_name} needs the following vaccines for period {period_label}: {vaccines_str}. "
-            f"Due date: {due_date_str}. One or two sentences only. Use only Modern Standard Arabic."
-        )
-    elif lang == "fr":
-        prompt = (
-            f"Génère un court rappel poli en français pour un parent : son enfant {child_name} "
-            f"doit recevoir les vaccins suivants pour la période {period_label} : {vaccines_str}. "
-            f"Date prévue : {due_date_str}. Une ou deux phrases seulement. En français uniquement."
-        )
-    else:
-        prompt = (
-            f"Generate a short, polite reminder in English for a parent "
-            f"that their child {child_name} is due for the following vaccines for {period_label}: {vaccines_str}. "
-            f"Due date: {due_date_str}. One or two sentences only. Use only English."
-        )
-    system = "You write very short reminders for parents about child vaccines."
+    child, due = CHILD_NAME_PLACEHOLDER, DUE_DATE_PLACEHOLDER
+    listing = "\n".join(
+        f"{i}. Period {period_label}: {', '.join(vaccine_names)}"
+        for i, (period_label, vaccine_names) in enumerate(periods, start=1)
+    )
+    prompt = (
+        f"For each numbered item below, write a short, polite reminder for a parent that their child "
+        f"{child} needs the listed vaccines for that period. Due date: {due}. One or two sentences "
+        f"each, in {_LANGUAGE_NAMES.get(lang, _LANGUAGE_NAMES['fr'])}. Write {child} and {due} exactly "
+        f"as shown; they are replaced later.\n"
+        f"Reply with a JSON array of {len(periods)} strings in the same order, and nothing else.\n\n"
+        f"{listing}"
+    )
+    system = "You write very short reminders for parents about child vaccines. You reply with JSON only."
     payload: dict[str, Any] = {
         "model": settings.minimax_model,
         "messages": [
@@ -174,23 +240,27 @@ def _generate_reminder_text_for_period(
         ],
     }
     try:
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        resp = requests.post(url, json=payload, headers=headers, timeout=30 + 5 * len(periods))
         resp.raise_for_status()
         data = resp.json()
         base = data.get("base_resp") or {}
         if base.get("status_code") not in (0, None):
-            return fallback
+            return [None] * len(periods)
         choices = data.get("choices") or []
-        if choices:
-            msg = choices[0].get("message")
-            if isinstance(msg, dict):
-                content = msg.get("content") or ""
-                if isinstance(content, str) and content.strip():
-                    return content.strip()
-        return fallback
+        msg = choices[0].get("message") if choices else None
+        content = msg.get("content") if isinstance(msg, dict) else None
+        if not isinstance(content, str):
+            return [None] * len(periods)
+        templates = _parse_template_array(content, len(periods))
+        if None in templates:
+            logger.warning(
+                "Minimax batch (%s): %d of %d reminders unusable. Using fallback for those.",
+                lang, templates.count(None), len(periods),
+            )
+        return templates
     except Exception as e:
-        logger.warning("Minimax request failed for period reminder: %s. Using fallback.", e)
-        return fallback
+        logger.warning("Minimax request failed for period reminders: %s. Using fallback.", e)
+        return [None] * len(periods)
 
 
 def _get_voice_id_for_lang(lang: str) -> str:
@@ -202,9 +272,13 @@ def _get_voice_id_for_lang(lang: str) -> str:
     return settings.elevenlabs_voice_id
 
 
+def _voice_enabled() -> bool:
+    return bool(settings.reminder_send_voice and settings.elevenlabs_api_key)
+
+
 def _generate_voice_elevenlabs(text: str, lang: str = "fr") -> bytes | None:
     """Generate voice from text via ElevenLabs using the voice ID for the given language. Returns audio bytes or None."""
-    if not settings.reminder_send_voice or not settings.elevenlabs_api_key:
+    if not _voice_enabled():
         return None
     voice_id = _get_voice_id_for_lang(lang)
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
@@ -214,6 +288,8 @@ def _generate_voice_elevenlabs(text: str, lang: str = "fr") -> bytes | None:
         "xi-api-key": settings.elevenlabs_api_key,
     }
     payload = {"text": text}
+    if settings.elevenlabs_model_id:
+        payload["model_id"] = settings.elevenlabs_model_id
     try:
         resp = requests.post(url, json=payload, headers=headers, timeout=30)
         resp.raise_for_status()
@@ -231,25 +307,20 @@ def _save_reminder_audio(vaccination_id: int, audio: bytes) -> str:
     return safe_name
 
 
-def _save_reminder_audio_period(child_id: int, period_label: str, due: date, audio: bytes) -> str:
-    """Save one audio per period; return relative path (e.g. child_1_Semaine_4_20260114.mp3)."""
-    root = _media_dir()
-    safe_period = "".join(c if c.isalnum() or c in " _-" else "_" for c in period_label).strip()[:40]
-    safe_name = f"child_{child_id}_{safe_period}_{due.isoformat().replace('-', '')}.mp3"
-    file_path = root / safe_name
-    file_path.write_bytes(audio)
-    return safe_name
+def _email_configured() -> bool:
+    return bool(settings.email_reminders_enabled and settings.smtp_host and (settings.smtp_from or settings.smtp_user))
 
 
 def _send_email_with_attachment(
+    mailer: SMTPPool,
     to_email: str,
     subject: str,
     body_text: str,
     attachment_path: Path | None,
     attachment_filename: str = "reminder.mp3",
 ) -> bool:
-    """Send email via SMTP with optional MP3 attachment. Returns True if sent."""
-    if not settings.email_reminders_enabled or not settings.smtp_host or not settings.smtp_user:
+    """Send email through the run's SMTP pool with optional MP3 attachment. Returns True if sent."""
+    if not _email_configured():
         return False
     msg = MIMEMultipart()
     msg["Subject"] = subject
@@ -261,31 +332,18 @@ def _send_email_with_attachment(
             part = MIMEApplication(f.read(), _subtype="mpeg")
         part.add_header("Content-Disposition", "attachment", filename=attachment_filename)
         msg.attach(part)
-    try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(msg["From"], to_email, msg.as_string())
-        return True
-    except Exception:
-        return False
+    return mailer.send(msg, msg["From"], [to_email])
 
 
-def _send_sms_twilio(to_phone: str | None, text: str) -> bool:
-    """Send SMS via Twilio. Returns True if sent."""
+def _send_sms_twilio(to_phone: str | None, text: str) -> TwilioResult | None:
+    """Send SMS via the shared Twilio client. None if SMS is off or there is no phone."""
     if not settings.twilio_sms_enabled or not to_phone or not settings.twilio_account_sid:
-        return False
+        return None
     try:
-        from twilio.rest import Client
-        client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-        client.messages.create(
-            body=text,
-            from_=settings.twilio_phone_number,
-            to=to_phone,
-        )
-        return True
-    except Exception:
-        return False
+        return twilio_client.send_sms(to_phone, text)
+    except Exception as e:
+        logger.warning("Twilio SMS failed: %s", e)
+        return TwilioResult("failed", error=str(e))
 
 
 def _normalize_phone_e164(phone: str | None) -> str | None:
@@ -304,31 +362,26 @@ def _normalize_phone_e164(phone: str | None) -> str | None:
     return "+" + s if s.isdigit() else None
 
 
-def _send_voice_call_twilio(to_phone: str | None, vaccination_id: int) -> bool:
-    """Place an outbound Twilio voice call to play the reminder (TwiML URL). Returns True if call initiated."""
+def _send_voice_call_twilio(to_phone: str | None, vaccination_id: int) -> TwilioResult | None:
+    """Place an outbound Twilio voice call to play the reminder (TwiML URL). None if calls are off or not configured."""
     if not settings.twilio_voice_enabled or not settings.twilio_account_sid or not settings.twilio_auth_token:
-        return False
+        return None
     if not settings.twilio_phone_number or not settings.app_base_url:
         logger.warning("Twilio voice: twilio_phone_number or app_base_url not set")
-        return False
+        return None
     normalized = _normalize_phone_e164(to_phone)
     if not normalized:
-        return False
+        return None
     twiml_url = f"{settings.app_base_url.rstrip('/')}/reminders/twiml/{vaccination_id}"
     try:
-        from twilio.rest import Client
-        client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-        client.calls.create(
-            to=normalized,
-            from_=settings.twilio_phone_number,
-            url=twiml_url,
-            method="GET",
-        )
-        logger.info("Twilio voice call initiated to %s for vaccination_id=%s", normalized, vaccination_id)
-        return True
+        result = twilio_client.place_call(normalized, twiml_url)
     except Exception as e:
-        logger.warning("Twilio voice call failed: %s", e)
-        return False
+        result = TwilioResult("failed", error=str(e))
+    if result.status == "sent":
+        logger.info("Twilio voice call initiated to %s for vaccination_id=%s", normalized, vaccination_id)
+    else:
+        logger.warning("Twilio voice call failed (%s): %s", result.status, result.error)
+    return result
 
 
 def get_twiml_for_vaccination(db: Session, vaccination_id: int) -> str:
@@ -369,136 +422,498 @@ def get_twiml_for_vaccination(db: Session, vaccination_id: int) -> str:
 REMINDABLE_DAYS = 7
 
 
-def _process_reminders_for_vaccinations(
-    db: Session,
-    vaccinations: list[ChildVaccination],
-    media_root: Path,
-) -> list[dict[str, Any]]:
+@dataclass
+class _ReminderGroup:
+    """One (child, period, due_date) reminder; plain fields are safe to use off the loop thread."""
+
+    vaccinations: list[ChildVaccination]
+    vaccination_ids: list[int]
+    first_vaccination_id: int
+    child_id: int
+    child_name: str
+    period_label: str
+    due_date: date
+    vaccine_names: list[str]
+    lang: str
+    email: str | None
+    phone: str | None
+
+
+@dataclass
+class _ProviderLimits:
+    llm: asyncio.Semaphore
+    tts: asyncio.Semaphore
+    smtp: asyncio.Semaphore
+    twilio: asyncio.Semaphore
+
+    @classmethod
+    def from_settings(cls) -> "_ProviderLimits":
+        return cls(
+            llm=asyncio.Semaphore(settings.reminder_llm_concurrency),
+            tts=asyncio.Semaphore(settings.reminder_tts_concurrency),
+            smtp=asyncio.Semaphore(settings.reminder_smtp_concurrency),
+            twilio=asyncio.Semaphore(settings.reminder_twilio_concurrency),
+        )
+
+    @property
+    def total(self) -> int:
+        return (
+            settings.reminder_llm_concurrency
+            + settings.reminder_tts_concurrency
+            + settings.reminder_smtp_concurrency
+            + settings.reminder_twilio_concurrency
+        )
+
+
+# Worker threads of the running pipeline (set by _process_groups; None: the loop's default)
+_executor: ContextVar[ThreadPoolExecutor | None] = ContextVar("reminder_executor", default=None)
+
+
+async def _in_thread(func, *args, **kwargs):
+    """Run a blocking call on the pipeline's worker threads."""
+    return await asyncio.get_running_loop().run_in_executor(_executor.get(), partial(func, *args, **kwargs))
+
+
+async def _call(limit: asyncio.Semaphore, func, *args, **kwargs):
+    """Run a blocking provider call in a worker thread, holding one slot of the provider's limit."""
+    async with limit:
+        return await _in_thread(func, *args, **kwargs)
+
+
+TemplateKey = tuple[str, str, str, str]  # (lang, period_label, sorted vaccine names, model)
+
+
+class _TextCache:
     """
-    Group vaccinations by (child_id, period_label, due_date). For each group generate
-    one combined text, one audio, assign same path to all vacs in group, send one email/SMS/call.
-    Returns list of sent items (one per period group).
+    Period reminder texts for one pipeline run. Minimax templates are stored per
+    (lang, period_label, sorted vaccine names, model) in reminder_text_templates and reused
+    until reminder_text_template_ttl_hours old. prefetch() generates every missing or
+    stale template of the run up front, reminder_llm_batch_size keys per Minimax call.
     """
-    today = date.today()
-    sent: list[dict[str, Any]] = []
 
-    # Group by (child_id, period_label, due_date)
-    groups: dict[tuple[int, str, date], list[ChildVaccination]] = {}
+    def __init__(self, db: Session, limit: asyncio.Semaphore):
+        self._db = db
+        self._limit = limit
+        self._templates: dict[TemplateKey, str] = {}
+
+    @staticmethod
+    def _key(group: _ReminderGroup) -> TemplateKey:
+        return (group.lang, group.period_label, ", ".join(sorted(group.vaccine_names)), settings.minimax_model)
+
+    async def prefetch(self, groups: list[_ReminderGroup]) -> None:
+        if not settings.minimax_api_key:
+            return
+        names_by_key = {self._key(g): sorted(g.vaccine_names) for g in groups if g.vaccine_names}
+        keys = set(names_by_key)
+        if not keys:
+            return
+        rows = {
+            (r.lang, r.period_label, r.vaccine_names, r.model): r
+            for r in self._db.query(ReminderTextTemplate).filter(
+                ReminderTextTemplate.model == settings.minimax_model,
+                ReminderTextTemplate.lang.in_({k[0] for k in keys}),
+            )
+        }
+        max_age = timedelta(hours=settings.reminder_text_template_ttl_hours)
+        now = datetime.utcnow()
+        missing: dict[str, list[TemplateKey]] = {}
+        for key in sorted(keys):
+            row = rows.get(key)
+            if row is not None:
+                # A stale template is kept as the fallback if regenerating it fails
+                self._templates[key] = row.template
+                if now - row.generated_at < max_age:
+                    continue
+            missing.setdefault(key[0], []).append(key)
+        if not missing:
+            return
+
+        size = max(1, settings.reminder_llm_batch_size)
+        batches = [
+            (lang, lang_keys[i:i + size])
+            for lang, lang_keys in missing.items()
+            for i in range(0, len(lang_keys), size)
+        ]
+        results = await asyncio.gather(*(
+            _call(
+                self._limit,
+                _generate_period_templates_minimax,
+                lang,
+                [(key[1], names_by_key[key]) for key in batch],
+            )
+            for lang, batch in batches
+        ))
+        generated = []
+        for (_lang, batch), templates in zip(batches, results):
+            for key, template in zip(batch, templates):
+                if template is None:
+                    continue
+                lang, period_label, vaccine_names, model = key
+                generated.append({
+                    "lang": lang,
+                    "period_label": period_label,
+                    "vaccine_names": vaccine_names,
+                    "model": model,
+                    "template": template,
+                    "generated_at": now,
+                })
+                self._templates[key] = template
+        # Upsert: another worker may have stored the same key since it was read above
+        for i in range(0, len(generated), 500):
+            stmt = insert(ReminderTextTemplate).values(generated[i:i + 500])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["lang", "period_label", "vaccine_names", "model"],
+                set_={"template": stmt.excluded.template, "generated_at": stmt.excluded.generated_at},
+            )
+            self._db.execute(stmt)
+        # No commit here: it would expire the loaded vaccinations and reload them row by row.
+        # The phase 1 commit stores the templates.
+
+    def get(self, group: _ReminderGroup) -> str:
+        template = self._templates.get(self._key(group))
+        if template is None:
+            return _fallback_period_text(
+                group.lang, group.child_name, group.period_label, group.vaccine_names, group.due_date
+            )
+        return _render_period_template(template, group.child_name, group.due_date)
+
+
+class _AudioCache:
+    """
+    Reminder audio for one pipeline run, through the content-addressed store (audio_store):
+    a stored file is reused, and groups with the same text, voice, model and language that
+    run at the same time share one ElevenLabs call.
+    """
+
+    def __init__(self, db: Session, media_root: Path, limit: asyncio.Semaphore):
+        self._db = db
+        self._media_root = media_root
+        self._limit = limit
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get(self, text: str, lang: str) -> str | None:
+        """File name in the media dir, or None if voice is off or synthesis failed."""
+        if not _voice_enabled():
+            return None
+        voice_id = _get_voice_id_for_lang(lang)
+        key = audio_key(text, voice_id, settings.elevenlabs_model_id, lang)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_or_synthesize(key, text, lang, voice_id))
+            self._inflight[key] = task
+        return await task
+
+    async def _load_or_synthesize(self, key: str, text: str, lang: str, voice_id: str) -> str | None:
+        path = find_audio(self._db, key, self._media_root)
+        if path is not None:
+            return path
+        audio = await _call(self._limit, _generate_voice_elevenlabs, text, lang)
+        if audio is None:
+            return None
+        path = await _in_thread(write_audio_file, self._media_root, key, audio)
+        register_audio(
+            self._db,
+            key,
+            path,
+            voice_id=voice_id,
+            model_id=settings.elevenlabs_model_id,
+            lang=lang,
+            size_bytes=len(audio),
+        )
+        return path
+
+
+def _group_vaccinations(vaccinations: list[ChildVaccination]) -> list[_ReminderGroup]:
+    """Group by (child_id, period_label, due_date), loading child/parent fields up front."""
+    today = date.today()
+    by_key: dict[tuple[int, str, date], list[ChildVaccination]] = {}
     for vac in vaccinations:
         due = vac.due_date or today
-        key = (vac.child_id, vac.period_label, due)
-        if key not in groups:
-            groups[key] = []
-        groups[key].append(vac)
-
-    for (_child_id, period_label, due_date), group in groups.items():
-        vac0 = group[0]
-        child = vac0.child
+        by_key.setdefault((vac.child_id, vac.period_label, due), []).append(vac)
+
+    groups = []
+    for (child_id, period_label, due_date), group in by_key.items():
+        child = group[0].child
         parent = child.parent
-        child_name = child.name
-        vaccine_names = [v.vaccine_name for v in group]
         lang = (parent.preferred_language or "fr").strip().lower() or "fr"
         if lang not in ("ar", "fr", "en"):
             lang = "fr"
+        groups.append(_ReminderGroup(
+            vaccinations=group,
+            vaccination_ids=[v.id for v in group],
+            first_vaccination_id=group[0].id,
+            child_id=child_id,
+            child_name=child.name,
+            period_label=period_label,
+            due_date=due_date,
+            vaccine_names=[v.vaccine_name for v in group],
+            lang=lang,
+            email=parent.email,
+            phone=parent.phone_number,
+        ))
+    return groups
+
+
+GroupKey = tuple[int, str, date]  # (child_id, period_label, due_date)
+
+
+class ReminderDeferred(Exception):
+    """A Twilio channel was still throttled after retries; the group is left unsent to retry later."""
+
+
+class ReminderLeaseLost(Exception):
+    """Another outbox worker took over the group's job before delivery; it is not sent here."""
+
+
+# hold(db, group keys) -> keys this caller may still deliver (e.g. outbox leases still held)
+DeliveryHold = Callable[[Session, list[GroupKey]], set[GroupKey]]
+
+
+def _delivered_channels(db: Session, groups: list[_ReminderGroup]) -> dict[GroupKey, set[str]]:
+    """Channels already sent per group key (from earlier attempts), one query per 500 children."""
+    wanted = {(g.child_id, g.period_label, g.due_date) for g in groups}
+    child_ids = sorted({g.child_id for g in groups})
+    out: dict[GroupKey, set[str]] = {}
+    for i in range(0, len(child_ids), 500):
+        rows = db.query(
+            ReminderDelivery.child_id, ReminderDelivery.period_label, ReminderDelivery.due_date, ReminderDelivery.channel
+        ).filter(ReminderDelivery.child_id.in_(child_ids[i:i + 500]), ReminderDelivery.status == "sent")
+        for child_id, period_label, due_date, channel in rows:
+            if (child_id, period_label, due_date) in wanted:
+                out.setdefault((child_id, period_label, due_date), set()).add(channel)
+    return out
+
+
+async def _prepare_group(
+    db: Session,
+    group: _ReminderGroup,
+    text_cache: _TextCache,
+    audio_cache: _AudioCache,
+    orphaned: list[str],
+) -> tuple[str, str | None]:
+    """
+    Phase 1 for one group: text, and the voice assigned to its vaccinations. Audio files
+    no longer referenced are appended to orphaned. Returns (text, reminder_audio_path).
+    """
+    try:
+        text = text_cache.get(group)
+    except Exception:
+        text = _fallback_period_text(
+            group.lang, group.child_name, group.period_label, group.vaccine_names, group.due_date
+        )
+
+    reminder_audio_path = await audio_cache.get(text, group.lang)
+    if reminder_audio_path is not None:
+        # No await in this block: other groups never see it half applied
+        replaced = [v.reminder_audio_path for v in group.vaccinations if v.reminder_audio_path]
+        for v in group.vaccinations:
+            v.voice_sent = True
+            v.reminder_audio_path = reminder_audio_path
+        acquire_audio(db, reminder_audio_path, len(group.vaccinations))
+        orphaned.extend(release_audio(db, replaced))
+    return text, reminder_audio_path
+
+
+async def _deliver_group(
+    db: Session,
+    group: _ReminderGroup,
+    text: str,
+    reminder_audio_path: str | None,
+    media_root: Path,
+    mailer: SMTPPool,
+    limits: _ProviderLimits,
+    delivered: set[str],
+) -> dict[str, Any]:
+    """
+    Phase 2 for one group: email/SMS/call and delivery rows (reminder_sent is set for the
+    whole batch by _process_groups). The audio path is already committed, so Twilio's TwiML
+    fetch for a call can read it.
+    """
+    vac0_id = group.first_vaccination_id
+    # Channels already delivered on an earlier attempt of this group are not sent again
+    sends: dict[str, tuple[str, Any]] = {}
+    if settings.email_reminders_enabled and group.email and "email" not in delivered:
+        subject = f"Rappel vaccins: {group.period_label} pour {group.child_name}"
+        full_path = media_root / reminder_audio_path if reminder_audio_path else None
+        sends["email"] = (group.email, _call(
+            limits.smtp,
+            _send_email_with_attachment,
+            mailer,
+            group.email,
+            subject,
+            text,
+            full_path if full_path and full_path.exists() else None,
+            attachment_filename=f"rappel_{group.period_label}_{group.child_name}.mp3".replace(" ", "_"),
+        ))
+    if settings.twilio_sms_enabled and group.phone and "sms" not in delivered:
+        sends["sms"] = (group.phone, _call(limits.twilio, _send_sms_twilio, group.phone, text))
+    if settings.twilio_voice_enabled and group.phone and "voice" not in delivered:
+        sends["voice"] = (group.phone, _call(limits.twilio, _send_voice_call_twilio, group.phone, vac0_id))
+    outcomes = await asyncio.gather(*(send for _, send in sends.values()))
+
+    deferred = []
+    for (channel, (recipient, _)), outcome in zip(sends.items(), outcomes):
+        if outcome is None:
+            continue
+        if isinstance(outcome, bool):
+            outcome = TwilioResult("sent" if outcome else "failed", attempts=1)
+        db.add(ReminderDelivery(
+            child_id=group.child_id,
+            period_label=group.period_label,
+            due_date=group.due_date,
+            child_vaccination_id=vac0_id,
+            channel=channel,
+            recipient=recipient,
+            status=outcome.status,
+            provider_id=outcome.provider_id,
+            attempts=outcome.attempts,
+            error=outcome.error,
+        ))
+        if outcome.status == "deferred":
+            deferred.append(channel)
+    if deferred:
+        # Throttled past the in-process retries: keep the group unsent so the outbox retries it
+        raise ReminderDeferred(f"{', '.join(deferred)} throttled for child {group.child_id} {group.period_label}")
+
+    item: dict[str, Any] = {
+        "child_name": group.child_name,
+        "vaccine_name": ", ".join(group.vaccine_names),
+        "vaccine_names": group.vaccine_names,
+        "period_label": group.period_label,
+        "due_date": str(group.due_date),
+        "text": text,
+    }
+    if reminder_audio_path:
+        item["reminder_audio_path"] = reminder_audio_path
+        item["audio_url"] = f"/reminders/audio/{vac0_id}"
+    return item
 
+
+async def _process_groups(
+    db: Session,
+    groups: list[_ReminderGroup],
+    media_root: Path,
+    mailer: SMTPPool,
+    hold: DeliveryHold | None = None,
+) -> list[dict[str, Any] | BaseException]:
+    """
+    Run all groups concurrently; one sent item or exception per group, in order. Two phases,
+    each committed once as a whole (no commit while groups are in flight): texts and voices,
+    then deliveries. Between them hold() (if given) says which groups may still be delivered.
+    """
+    limits = _ProviderLimits.from_settings()
+    # Enough worker threads for every provider slot to be busy at once; shut down after the run
+    with ThreadPoolExecutor(max_workers=limits.total + 1) as executor:
+        token = _executor.set(executor)
         try:
-            text = _generate_reminder_text_for_period(
-                lang, child_name, period_label, vaccine_names, due_date
+            text_cache = _TextCache(db, limits.llm)
+            audio_cache = _AudioCache(db, media_root, limits.tts)
+            await text_cache.prefetch(groups)
+            orphaned: list[str] = []
+            results: list[Any] = await asyncio.gather(
+                *(_prepare_group(db, g, text_cache, audio_cache, orphaned) for g in groups),
+                return_exceptions=True,
             )
-        except Exception:
-            vaccine_list = ", ".join(vaccine_names)
-            text = _FALLBACK_REMINDERS_PERIOD.get(lang, _FALLBACK_REMINDERS_PERIOD["fr"]).format(
-                child_name=child_name,
-                period_label=period_label,
-                vaccine_list=vaccine_list,
-                due_date_str=_format_date_readable(due_date),
+            db.commit()
+            remove_audio_files(media_root, orphaned)
+
+            if hold is not None:
+                held = hold(db, [(g.child_id, g.period_label, g.due_date) for g in groups])
+                for i, g in enumerate(groups):
+                    if (g.child_id, g.period_label, g.due_date) not in held and not isinstance(results[i], BaseException):
+                        results[i] = ReminderLeaseLost(f"child {g.child_id} {g.period_label} taken over before delivery")
+            delivered = _delivered_channels(db, groups)
+            ready = [i for i, prepared in enumerate(results) if not isinstance(prepared, BaseException)]
+            outcomes = await asyncio.gather(
+                *(
+                    _deliver_group(
+                        db, groups[i], *results[i], media_root, mailer, limits,
+                        delivered.get((groups[i].child_id, groups[i].period_label, groups[i].due_date), set()),
+                    )
+                    for i in ready
+                ),
+                return_exceptions=True,
             )
-
-        audio = _generate_voice_elevenlabs(text, lang)
-        reminder_audio_path: str | None = None
-        if audio is not None:
-            reminder_audio_path = _save_reminder_audio_period(
-                vac0.child_id, period_label, due_date, audio
-            )
-            for v in group:
-                v.voice_sent = True
-                v.reminder_audio_path = reminder_audio_path
-            full_path = media_root / reminder_audio_path
-            if settings.email_reminders_enabled and parent.email:
-                subject = f"Rappel vaccins: {period_label} pour {child_name}"
-                _send_email_with_attachment(
-                    parent.email,
-                    subject,
-                    text,
-                    full_path if full_path.exists() else None,
-                    attachment_filename=f"rappel_{period_label}_{child_name}.mp3".replace(" ", "_"),
+            sent_ids = []
+            for i, outcome in zip(ready, outcomes):
+                results[i] = outcome
+                if not isinstance(outcome, BaseException):
+                    sent_ids.extend(groups[i].vaccination_ids)
+            # Bulk UPDATE: the phase 1 commit expired the loaded vaccinations
+            for j in range(0, len(sent_ids), 500):
+                db.query(ChildVaccination).filter(ChildVaccination.id.in_(sent_ids[j:j + 500])).update(
+                    {ChildVaccination.reminder_sent: True}, synchronize_session=False
                 )
-        else:
-            if settings.email_reminders_enabled and parent.email:
-                subject = f"Rappel vaccins: {period_label} pour {child_name}"
-                _send_email_with_attachment(parent.email, subject, text, None)
-
-        _send_sms_twilio(parent.phone_number, text)
-        if settings.twilio_voice_enabled:
-            _send_voice_call_twilio(parent.phone_number, vac0.id)
-
-        for v in group:
-            v.reminder_sent = True
-        db.commit()
-
-        item: dict[str, Any] = {
-            "child_name": child_name,
-            "vaccine_name": ", ".join(vaccine_names),
-            "vaccine_names": vaccine_names,
-            "period_label": period_label,
-            "due_date": str(due_date),
-            "text": text,
-        }
-        if reminder_audio_path:
-            item["reminder_audio_path"] = reminder_audio_path
-            item["audio_url"] = f"/reminders/audio/{vac0.id}"
-        sent.append(item)
-    return sent
+            db.commit()
+            return results
+        finally:
+            _executor.reset(token)
+
+
+def _run_pipeline(coro):
+    """asyncio.run, or on a private loop in a worker thread if this thread already runs a loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def reminder_mailer() -> SMTPPool:
+    """SMTP pool sized to the SMTP concurrency limit; share it across send_reminder_groups calls and close it."""
+    return SMTPPool(settings.reminder_smtp_concurrency)
 
 
-def check_and_send_reminders(db: Session) -> list[dict[str, Any]]:
+def send_reminder_groups(
+    db: Session,
+    vaccinations: list[ChildVaccination],
+    mailer: SMTPPool | None = None,
+    *,
+    hold: DeliveryHold | None = None,
+) -> dict[GroupKey, dict[str, Any] | BaseException]:
     """
-    Fetch all remindable, unsent, due vaccinations; generate text (Minimax), optionally
-    voice (ElevenLabs), save audio to disk, send email with attachment and/or SMS,
-    mark reminder_sent/voice_sent, return list of sent reminders with audio_url.
-    Only includes vaccinations whose due_date is in [today - REMINDABLE_DAYS, today].
+    Group vaccinations by (child_id, period_label, due_date). For each group generate
+    one combined text, one audio, assign same path to all vacs in group, send one email/SMS/call,
+    and mark the group reminder_sent. Groups run concurrently on an asyncio loop; blocking
+    provider calls go to worker threads, bounded per provider (reminder_*_concurrency).
+    Commits twice per batch: after texts and voices (a call's TwiML fetch reads the audio path), then after deliveries.
+    Emails go through mailer (reused SMTP sessions); without one, a pool is opened for this call.
+    hold(db, keys), called after the first commit, returns the groups that may still be
+    delivered (the outbox re-checks its leases); the others end with ReminderLeaseLost.
+    Returns {group key: sent item, or the exception that stopped the group (nothing marked sent)}.
     """
-    today = date.today()
-    cutoff = today - timedelta(days=REMINDABLE_DAYS)
-    media_root = _media_dir()
-    q = (
-        db.query(ChildVaccination)
-        .join(Child, ChildVaccination.child_id == Child.id)
-        .filter(
-            ChildVaccination.completed.is_(False),
-            ChildVaccination.reminder_sent.is_(False),
-            ChildVaccination.due_date.isnot(None),
-            ChildVaccination.due_date <= today,
-            ChildVaccination.due_date >= cutoff,
-        )
-    )
-    vaccinations = q.all()
-    return _process_reminders_for_vaccinations(db, vaccinations, media_root)
+    groups = _group_vaccinations(vaccinations)
+    if not groups:
+        return {}
+    if mailer is None:
+        with reminder_mailer() as own_mailer:
+            return send_reminder_groups(db, vaccinations, own_mailer, hold=hold)
+    results = _run_pipeline(_process_groups(db, groups, _media_dir(), mailer, hold))
+    out: dict[GroupKey, dict[str, Any] | BaseException] = {}
+    for group, result in zip(groups, results):
+        if isinstance(result, BaseException):
+            logger.warning(
+                "Reminder for child_id=%s period=%s failed: %s", group.child_id, group.period_label, result
+            )
+        out[(group.child_id, group.period_label, group.due_date)] = result
+    return out
 
 
-def check_and_send_reminders_for_child(db: Session, child_id: int) -> list[dict[str, Any]]:
+def due_vaccinations_query(db: Session, child_id: int | None = None):
     """
-    Generate and send reminders (including voice) for a single child's due/overdue vaccinations.
-    Call this right after adding a child so that any vaccines already due get their voice created immediately.
+    Remindable, unsent, uncompleted vaccinations whose due_date is in
+    [today - REMINDABLE_DAYS, today] (optionally for one child), with child and parent
+    loaded by the same query (no per-group lazy loads).
     """
     today = date.today()
     cutoff = today - timedelta(days=REMINDABLE_DAYS)
-    media_root = _media_dir()
     q = (
         db.query(ChildVaccination)
         .join(Child, ChildVaccination.child_id == Child.id)
+        .join(Parent, Child.parent_id == Parent.id)
+        .options(contains_eager(ChildVaccination.child).contains_eager(Child.parent))
         .filter(
-            Child.id == child_id,
             ChildVaccination.completed.is_(False),
             ChildVaccination.reminder_sent.is_(False),
             ChildVaccination.due_date.isnot(None),
@@ -506,5 +921,6 @@ def check_and_send_reminders_for_child(db: Session, child_id: int) -> list[dict[
             ChildVaccination.due_date >= cutoff,
         )
     )
-    vaccinations = q.all()
-    return _process_reminders_for_vaccinations(db, vaccinations, media_root)
+    if child_id is not None:
+        q = q.filter(Child.id == child_id)
+    return q
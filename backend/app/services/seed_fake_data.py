@@ -13,6 +13,7 @@ from app.models.child_vaccination import ChildVaccination
 from app.models.region import Region
 from app.models.vaccine_template import VaccineTemplate
 from app.models.national_stock import NationalStock
+from app.services.reference_cache import invalidate_reference_data
 from app.utils.security import hash_password
 
 DEMO_PASSWORD = "Demo123!"  # same for all demo accounts
@@ -228,6 +229,7 @@ def _seed_fake_data() -> dict:
             else:
                 db.add(NationalStock(vaccine_name=vname, current_stock=stock))
         db.commit()
+        invalidate_reference_data()
 
         return {
             "skipped": False,
@@ -2,6 +2,7 @@
 from app.database import SessionLocal
 from app.models.national_stock import NationalStock
 from app.models.vaccine_template import VaccineTemplate
+from app.services.reference_cache import invalidate_reference_data
 
 
 def seed_national_stock() -> int:
@@ -21,6 +22,8 @@ def seed_national_stock() -> int:
                 db.add(NationalStock(vaccine_name=vaccine_name, current_stock=0))
                 inserted += 1
         db.commit()
+        if inserted:
+            invalidate_reference_data()
         return inserted
     finally:
         db.close()
@@ -1,6 +1,7 @@
 """Seed 12 Moroccan regions (population 2024, estimated annual births)."""
 from app.database import SessionLocal
 from app.models.region import Region
+from app.services.reference_cache import invalidate_reference_data
 
 # Exact numbers from requirements (name, population_2024, estimated_annual_births)
 MOROCCO_REGIONS = [
@@ -37,6 +38,7 @@ def seed_regions() -> int:
                 )
             )
         db.commit()
+        invalidate_reference_data()
         return len(MOROCCO_REGIONS)
     finally:
         db.close()
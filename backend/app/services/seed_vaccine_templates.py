@@ -5,6 +5,7 @@ from app.models.vaccine_template import VaccineTemplate
 from app.models.child_vaccination import ChildVaccination
 from app.models.child import Child
 from app.models.parent import Parent
+from app.services.reference_cache import invalidate_reference_data
 
 # Schedule: (period_label, vaccine_name, vaccine_group, offset_days)
 # offset_days = days after birth
@@ -94,6 +95,7 @@ def seed_vaccine_templates() -> int:
                 )
             )
         db.commit()
+        invalidate_reference_data()
         return len(SCHEDULE)
     finally:
         db.close()
@@ -0,0 +1,156 @@
+"""
+Pool of reusable SMTP sessions for a reminder run.
+
+Up to `size` connections are opened lazily (connect, optional STARTTLS, optional login)
+and reused for many messages; a worker thread borrows one per send. A connection that
+fails (dropped by the server, idle timeout, network error) is discarded and the message
+is retried once on a fresh connection. send() reports success per message.
+
+Works against any SMTP server, including a local stand-in without TLS or auth
+(SMTP_STARTTLS=false, empty SMTP_USER), e.g. `python -m aiosmtpd -n -l localhost:1025`.
+"""
+import logging
+import queue
+import smtplib
+import threading
+from email.message import Message
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """Bounded pool of SMTP sessions shared by the worker threads of one reminder run."""
+
+    def __init__(
+        self,
+        size: int,
+        *,
+        host: str | None = None,
+        port: int | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        starttls: bool | None = None,
+        timeout: float | None = None,
+    ):
+        self.size = max(1, size)
+        self.host = host if host is not None else settings.smtp_host
+        self.port = port if port is not None else settings.smtp_port
+        self.user = user if user is not None else settings.smtp_user
+        self.password = password if password is not None else settings.smtp_password
+        self.starttls = starttls if starttls is not None else settings.smtp_starttls
+        self.timeout = timeout if timeout is not None else settings.smtp_timeout_seconds
+        self._idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.sent = 0
+        self.failed = 0
+        self.connections_opened = 0
+
+    def __enter__(self) -> "SMTPPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            _quit(server)
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return server
+
+    def _acquire(self) -> smtplib.SMTP:
+        """An idle session, or a new one; blocks while all `size` sessions are in use."""
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, server: smtplib.SMTP | None) -> None:
+        """Return a session for reuse (None: it was discarded)."""
+        if server is not None:
+            if self._closed:
+                _quit(server)
+            else:
+                self._idle.put(server)
+        self._slots.release()
+
+    def _drop(self, server: smtplib.SMTP) -> None:
+        """Broken session (disconnected, timed out): close it; the send is retried on a new one."""
+        _quit(server)
+        self._release(None)
+
+    def send(self, msg: Message, from_addr: str, to_addrs: list[str]) -> bool:
+        """Send one message; True if the server accepted it for at least one recipient."""
+        for attempt in (1, 2):
+            try:
+                server = self._acquire()
+            except Exception as e:
+                logger.warning("SMTP connect to %s:%s failed: %s", self.host, self.port, e)
+                break
+            try:
+                refused = server.sendmail(from_addr, to_addrs, msg.as_string())
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                self._drop(server)
+                if attempt == 2:
+                    logger.warning("SMTP send to %s failed after reconnect: %s", to_addrs, e)
+                continue
+            except smtplib.SMTPException as e:
+                # Rejected message (recipients, data); the session itself is still usable.
+                # Caught before OSError, of which SMTPException is a subclass.
+                self._release(server)
+                logger.warning("SMTP send to %s rejected: %s", to_addrs, e)
+                break
+            except OSError as e:
+                self._drop(server)
+                if attempt == 2:
+                    logger.warning("SMTP send to %s failed after reconnect: %s", to_addrs, e)
+                continue
+            self._release(server)
+            ok = len(refused) < len(to_addrs)
+            with self._lock:
+                self.sent += ok
+                self.failed += not ok
+            return ok
+        with self._lock:
+            self.failed += 1
+        return False
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            _quit(server)
+        if self.sent or self.failed:
+            logger.info(
+                "SMTP pool: %d sent, %d failed over %d connections", self.sent, self.failed, self.connections_opened
+            )
+
+
+def _quit(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
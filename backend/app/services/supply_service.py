@@ -1,17 +1,29 @@
 """
 Vaccine supply: projected need per region (95% target, 10% buffer), national stock, shortage/surplus.
+Stock is the national store plus the regional balances of the stock ledger (stock_service).
 """
 from __future__ import annotations
 
 import math
+from typing import Literal
+
 from sqlalchemy.orm import Session
 
-from app.models.national_stock import NationalStock
-from app.models.region import Region
-from app.models.vaccine_template import VaccineTemplate
+from app.services.coverage_service import get_coverage_matrix
+from app.services.forecast_service import get_forecast
+from app.services.reference_cache import ReferenceData, get_reference_data
+from app.services.stock_service import stock_balances
 
 TARGET_COVERAGE = 0.95
 BUFFER_FACTOR = 1.10
+SupplyAllocation = Literal["proportional", "priority"]
+# Regions with the lowest coverage are served first under priority allocation
+COLOUR_PRIORITY = ("red", "yellow", "green")
+
+
+def _projected_stockout(db: Session, vaccine_name: str) -> str | None:
+    forecast = get_forecast(db, vaccine_name=vaccine_name)
+    return forecast["vaccines"][0]["projected_stockout_date"] if forecast["vaccines"] else None
 
 
 def get_supply(db: Session, vaccine_name: str) -> dict:
@@ -23,14 +35,26 @@ def get_supply(db: Session, vaccine_name: str) -> dict:
     - ProjectedNeed_with_buffer = ceil(ProjectedNeed_adjusted * 1.10)
     - If current_stock >= sum(ProjectedNeed_raw) then surplus; else shortage.
     """
-    if db.query(VaccineTemplate).filter(VaccineTemplate.vaccine_name == vaccine_name).first() is None:
+    ref = get_reference_data(db)
+    if not ref.has_vaccine(vaccine_name):
         return {"regions": [], "national": {}, "data_quality_warning": False}
+    result = _vaccine_supply(ref, vaccine_name, stock_balances(db).get(vaccine_name, {}))
+    # From the cached due-date forecast (see forecast_service)
+    result["national"]["projected_stockout_date"] = _projected_stockout(db, vaccine_name)
+    return result
 
-    stock_row = db.query(NationalStock).filter(NationalStock.vaccine_name == vaccine_name).first()
-    current_stock = stock_row.current_stock if stock_row else 0
+
+def _vaccine_supply(ref: ReferenceData, vaccine_name: str, regional_stock: dict[int, int]) -> dict:
+    """
+    get_supply figures for one vaccine from the reference snapshot and the regional
+    balances {region_id: doses} (no queries).
+    """
+    stock_row = ref.stock_by_vaccine.get(vaccine_name)
+    national_store = stock_row.current_stock if stock_row else 0
+    current_stock = national_store + sum(regional_stock.values())
     data_quality_warning = stock_row is None
 
-    regions = db.query(Region).order_by(Region.id).all()
+    regions = ref.regions
     regions_data = []
     projected_need_raw_total = 0
 
@@ -64,6 +88,7 @@ def get_supply(db: Session, vaccine_name: str) -> dict:
             "projected_need": projected_need_raw,
             "with_buffer": with_buffer,
             "current_stock": current_stock,
+            "region_stock": regional_stock.get(region.id, 0),
             "shortage_or_surplus": shortage_or_surplus,
         })
 
@@ -77,6 +102,7 @@ def get_supply(db: Session, vaccine_name: str) -> dict:
 
     national = {
         "current_stock": current_stock,
+        "national_store": national_store,
         "projected_need_total": need_total,
         "projected_need_with_buffer_total": need_with_buffer_total,
         "surplus": surplus,
@@ -88,3 +114,86 @@ def get_supply(db: Session, vaccine_name: str) -> dict:
         "national": national,
         "data_quality_warning": data_quality_warning,
     }
+
+
+def allocate_largest_remainder(amount: int, needs: dict[int, int]) -> dict[int, int]:
+    """
+    Split amount (at most sum(needs)) across keys in proportion to need, in whole doses:
+    floor of each quota, then the leftover doses go to the largest fractional parts.
+    """
+    total_need = sum(needs.values())
+    amount = min(amount, total_need)
+    if amount <= 0 or total_need <= 0:
+        return {k: 0 for k in needs}
+    quotas = {k: amount * n / total_need for k, n in needs.items()}
+    shares = {k: math.floor(q) for k, q in quotas.items()}
+    leftover = amount - sum(shares.values())
+    for k in sorted(quotas, key=lambda k: (shares[k] - quotas[k], k))[:leftover]:
+        shares[k] += 1
+    return shares
+
+
+def allocate_by_priority(amount: int, needs: dict[int, int], tiers: list[list[int]]) -> dict[int, int]:
+    """
+    Serve tiers in order (e.g. red, yellow, green regions): each tier gets its full need
+    while stock lasts; the tier where stock runs out is shared by largest remainder.
+    """
+    shares = {k: 0 for k in needs}
+    remaining = amount
+    for tier in tiers:
+        tier_needs = {k: needs[k] for k in tier if k in needs}
+        tier_shares = allocate_largest_remainder(remaining, tier_needs)
+        shares.update(tier_shares)
+        remaining -= sum(tier_shares.values())
+        if remaining <= 0:
+            break
+    return shares
+
+
+def get_supply_all(db: Session, allocation: SupplyAllocation = "proportional") -> dict:
+    """
+    Supply for every vaccine in one batch, with the national store (doses not distributed
+    yet) allocated across regions against each region's net need, projected need minus
+    the region's own balance:
+    - proportional: by net need (largest remainder, whole doses)
+    - priority: red regions first, then yellow, then green (coverage colour from the
+      coverage matrix), proportional within the tier where stock runs out
+    Uses the reference snapshot, the stock balances, one coverage matrix read and the
+    cached forecast.
+    """
+    ref = get_reference_data(db)
+    colours = {}
+    if allocation == "priority":
+        matrix = get_coverage_matrix(db)
+        colours = {
+            (row["region_id"], vaccine_name): cell["color"]
+            for row in matrix["regions"]
+            for vaccine_name, cell in row["coverage"].items()
+        }
+    balances = stock_balances(db)
+    stockouts = {v["vaccine_name"]: v["projected_stockout_date"] for v in get_forecast(db)["vaccines"]}
+
+    vaccines = []
+    for vaccine_name in ref.vaccine_names:
+        result = _vaccine_supply(ref, vaccine_name, balances.get(vaccine_name, {}))
+        national_store = result["national"]["national_store"]
+        # Doses a region already holds cover its own need first; a negative balance adds to it
+        needs = {r["region_id"]: max(0, r["projected_need"] - r["region_stock"]) for r in result["regions"]}
+        if allocation == "priority":
+            tiers = [
+                [rid for rid in needs if colours.get((rid, vaccine_name), "red") == colour]
+                for colour in COLOUR_PRIORITY
+            ]
+            shares = allocate_by_priority(national_store, needs, tiers)
+        else:
+            shares = allocate_largest_remainder(national_store, needs)
+        for r in result["regions"]:
+            r["net_need"] = needs[r["region_id"]]
+            r["allocated"] = shares[r["region_id"]]
+            r["unmet_need"] = r["net_need"] - r["allocated"]
+            if allocation == "priority":
+                r["coverage_color"] = colours.get((r["region_id"], vaccine_name), "red")
+        result["national"]["allocated_total"] = sum(shares.values())
+        result["national"]["projected_stockout_date"] = stockouts.get(vaccine_name)
+        vaccines.append({"vaccine_name": vaccine_name, **result})
+    return {"allocation": allocation, "vaccines": vaccines}
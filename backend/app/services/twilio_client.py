@@ -0,0 +1,166 @@
+"""
+Process-wide Twilio client for reminder SMS and voice calls.
+
+One twilio.rest.Client (one HTTP session, so connections are reused) is shared by every
+worker thread. Each create request is paced by a token bucket per kind (messages per
+second, calls per second) and retried on 429 and 5xx, waiting Retry-After when Twilio
+sends it and backing off exponentially otherwise. send_sms() and place_call() never
+raise: they return a TwilioResult that callers record per reminder.
+"""
+import email.utils
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Twilio did not act on the request (rate limited or unavailable): safe to send again
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available (rate <= 0: unpaced)."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), None if absent."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class _PacedHttpClient:
+    """Wraps TwilioHttpClient: paces message/call creation and retries 429/5xx responses."""
+
+    def __init__(self, inner: Any, buckets: dict[str, TokenBucket]):
+        self._inner = inner
+        self._buckets = buckets  # URL suffix -> bucket
+        self._local = threading.local()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    @property
+    def last_attempts(self) -> int:
+        """HTTP attempts of this thread's last request."""
+        return getattr(self._local, "attempts", 0)
+
+    def _bucket(self, method: str, url: str) -> TokenBucket | None:
+        if method.upper() != "POST":
+            return None
+        for suffix, bucket in self._buckets.items():
+            if url.endswith(suffix):
+                return bucket
+        return None
+
+    def request(self, method: str, url: str, *args, **kwargs):
+        bucket = self._bucket(method, url)
+        attempt = 0
+        while True:
+            attempt += 1
+            if bucket is not None:
+                bucket.acquire()
+            self._local.attempts = attempt
+            response = self._inner.request(method, url, *args, **kwargs)
+            if response.status_code not in _RETRY_STATUSES or attempt > settings.twilio_max_retries:
+                return response
+            delay = _retry_after(response.headers)
+            if delay is None:
+                delay = settings.twilio_retry_backoff_seconds * 2 ** (attempt - 1)
+            if delay > settings.twilio_retry_max_wait_seconds:
+                # Too long to hold a worker thread; the reminder job is retried later instead
+                return response
+            logger.info("Twilio %s %s: HTTP %s, retrying in %.1fs", method, url, response.status_code, delay)
+            time.sleep(delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared twilio.rest.Client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from twilio.http.http_client import TwilioHttpClient
+            from twilio.rest import Client
+
+            http_client = _PacedHttpClient(
+                TwilioHttpClient(timeout=settings.twilio_timeout_seconds),
+                {
+                    "/Messages.json": TokenBucket(settings.twilio_sms_per_second),
+                    "/Calls.json": TokenBucket(settings.twilio_calls_per_second),
+                },
+            )
+            _client = Client(settings.twilio_account_sid, settings.twilio_auth_token, http_client=http_client)
+        return _client
+
+
+@dataclass
+class TwilioResult:
+    status: str  # sent | failed | deferred (throttled or unavailable; send again later)
+    provider_id: str | None = None
+    attempts: int = 0
+    error: str | None = None
+
+
+def _create(resource: str, **params) -> TwilioResult:
+    from twilio.base.exceptions import TwilioRestException
+
+    client = get_client()
+    try:
+        created = getattr(client, resource).create(**params)
+    except TwilioRestException as e:
+        status = "deferred" if e.status in _RETRY_STATUSES else "failed"
+        return TwilioResult(status, attempts=client.http_client.last_attempts, error=f"HTTP {e.status}: {e.msg}")
+    except Exception as e:
+        # Network error: unknown whether Twilio acted on it, so it is not resent automatically
+        return TwilioResult("failed", attempts=client.http_client.last_attempts, error=str(e))
+    return TwilioResult("sent", provider_id=created.sid, attempts=client.http_client.last_attempts)
+
+
+def send_sms(to: str, body: str) -> TwilioResult:
+    return _create("messages", body=body, from_=settings.twilio_phone_number, to=to)
+
+
+def place_call(to: str, twiml_url: str) -> TwilioResult:
+    return _create("calls", to=to, from_=settings.twilio_phone_number, url=twiml_url, method="GET")
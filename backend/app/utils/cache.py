@@ -0,0 +1,83 @@
+"""In-process TTL cache with LRU eviction and stale-while-revalidate."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SWRCache:
+    """
+    Thread-safe cache for expensive computed values.
+
+    - Fresh entries (age < ttl_seconds) are returned as is.
+    - Stale entries (age < ttl_seconds + stale_seconds) are returned immediately while a single
+      background thread recomputes them (stale-while-revalidate).
+    - Older entries and misses are computed inline by the caller.
+    - At most max_entries keys are kept; the least recently used key is evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        *,
+        revalidate: Callable[[], Any] | None = None,
+    ) -> Any:
+        """
+        Return the cached value for key. compute() runs inline on a miss; revalidate() runs in a
+        background thread to refresh a stale entry (it must not share the caller's DB session).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = now - stored_at
+                if age < self.ttl_seconds + self.stale_seconds:
+                    self._entries.move_to_end(key)
+                    if age >= self.ttl_seconds and revalidate is not None and key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._revalidate, args=(key, revalidate), daemon=True
+                        ).start()
+                    return value
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> None:
+        """Drop all entries, or only those whose key matches predicate."""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def _revalidate(self, key: Hashable, revalidate: Callable[[], Any]) -> None:
+        try:
+            self.set(key, revalidate())
+        except Exception as e:
+            logger.warning("Cache revalidation failed for %r: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Benchmark the analytics services and routes on deterministic synthetic databases.
+
+Builds (once, cached under --data-dir) one SQLite database per size with N children spread
+over the 12 seeded regions by estimated births, a full PNI schedule per child and
+region-dependent completion rates, then times each case and reports p50/p95 latency (ms),
+SQL queries per call and peak RSS (MB) as JSON.
+
+Run from backend dir:
+    python scripts/benchmark.py                                   # 10k, 100k, 1M -> bench_results.json
+    python scripts/benchmark.py --sizes 10000 --repeat 20
+    python scripts/benchmark.py --sizes 10000 --compare bench_baseline.json   # exit 1 on regression
+
+Each size is built and measured in its own subprocess (settings and the engine are bound to
+DATABASE_URL at import time, and peak RSS is per process).
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEED = 20240601
+CHUNK_CHILDREN = 10_000
+CHILDREN_PER_PARENT = (1, 2, 2, 3, 4)
+BENCH_PARENT_EMAIL = "bench.parent.1@example.ma"
+BENCH_VACCINE = "Penta3"
+BENCH_REGION_ID = 6
+
+
+# --- building ---
+def _build(size: int) -> None:
+    """Populate the (empty) database at DATABASE_URL with `size` children."""
+    import app.main  # noqa: F401  (create tables, seed templates / regions / stock / admin)
+    from sqlalchemy import func, insert, select
+
+    from app.database import SessionLocal, engine
+    from app.models.child import Child
+    from app.models.child_vaccination import ChildVaccination
+    from app.models.parent import Parent
+    from app.models.vaccine_template import VaccineTemplate
+    from app.services.aggregate_service import ensure_coverage_aggregates
+    from app.services.seed_fake_data import REGION_COVERAGE
+    from app.services.seed_regions import MOROCCO_REGIONS
+    from app.utils.security import hash_password
+
+    rng = random.Random(SEED)
+    db = SessionLocal()
+    templates = [
+        (t.vaccine_name, t.vaccine_group, t.period_label, t.offset_days)
+        for t in db.query(VaccineTemplate).order_by(VaccineTemplate.offset_days).all()
+    ]
+    db.close()
+
+    region_ids = list(range(1, len(MOROCCO_REGIONS) + 1))
+    region_weights = [births for _, _, births in MOROCCO_REGIONS]
+    pw_hash = hash_password("Bench123!")
+    today = date.today()
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        # The seeded admin is a parents row too
+        first_parent_id = conn.execute(select(func.max(Parent.id))).scalar() or 0
+        parent_id, child_id = first_parent_id, 0
+        while child_id < size:
+            parents, children, vaccinations = [], [], []
+            target = min(size, child_id + CHUNK_CHILDREN)
+            while child_id < target:
+                parent_id += 1
+                region_id = rng.choices(region_ids, region_weights)[0]
+                parents.append({
+                    "id": parent_id,
+                    "name": f"Parent {parent_id}",
+                    "email": f"bench.parent.{parent_id - first_parent_id}@example.ma",
+                    "password_hash": pw_hash,
+                    "phone_number": f"+212 6{parent_id % 100_000_000:08d}",
+                    "preferred_language": rng.choice(("ar", "fr", "en")),
+                    "is_admin": False,
+                    "region_id": region_id,
+                    "created_at": now,
+                })
+                for _ in range(min(rng.choice(CHILDREN_PER_PARENT), target - child_id)):
+                    child_id += 1
+                    birthdate = today - timedelta(days=rng.randint(0, 6 * 365))
+                    # Most children inherit the parent's region (region_id NULL)
+                    own_region = region_id if rng.random() < 0.3 else None
+                    children.append({
+                        "id": child_id,
+                        "parent_id": parent_id,
+                        "name": f"Child {child_id}",
+                        "birthdate": birthdate,
+                        "gender": rng.choice(("M", "F")),
+                        "region_id": own_region,
+                        "effective_region_id": region_id,
+                        "created_at": now,
+                    })
+                    coverage = REGION_COVERAGE.get(region_id, 0.85)
+                    for name, group, period, offset in templates:
+                        due = birthdate + timedelta(days=offset)
+                        completed = due <= today and rng.random() < coverage
+                        vaccinations.append({
+                            "child_id": child_id,
+                            "vaccine_name": name,
+                            "vaccine_group": group,
+                            "period_label": period,
+                            "due_date": due,
+                            "completed": completed,
+                            "completed_at": (
+                                datetime.combine(due, datetime.min.time()) + timedelta(days=rng.randint(0, 21))
+                                if completed else None
+                            ),
+                            "remindable": due >= today - timedelta(days=7),
+                            "reminder_sent": False,
+                            "voice_sent": False,
+                            "reminder_audio_path": (
+                                f"reminder_{child_id}_{offset}.mp3"
+                                if not completed and due <= today and rng.random() < 0.5 else None
+                            ),
+                        })
+            conn.execute(insert(Parent.__table__), parents)
+            conn.execute(insert(Child.__table__), children)
+            conn.execute(insert(ChildVaccination.__table__), vaccinations)
+            print(f"  {child_id:,}/{size:,} children", file=sys.stderr)
+    ensure_coverage_aggregates(force=True)
+
+
+# --- measuring ---
+def _cases():
+    """(name, fn(db)) for every benchmarked service and route."""
+    from fastapi.testclient import TestClient
+
+    from app.config import settings
+    from app.main import app
+    from app.services.coverage_service import get_coverage, get_coverage_matrix
+    from app.services.supply_service import get_supply
+    from app.utils.security import create_access_token
+
+    client = TestClient(app)
+    admin = {"Authorization": "Bearer " + create_access_token({"sub": settings.admin_email})}
+    parent = {"Authorization": "Bearer " + create_access_token({"sub": BENCH_PARENT_EMAIL})}
+    year_ago = date.today() - timedelta(days=365)
+
+    def route(path: str, headers: dict):
+        def call(_db):
+            r = client.get(path, headers=headers)
+            r.raise_for_status()
+        return call
+
+    return [
+        ("get_coverage", lambda db: get_coverage(db, BENCH_VACCINE)),
+        ("get_coverage_date_range", lambda db: get_coverage(db, BENCH_VACCINE, date_from=year_ago, date_to=date.today(), use_cache=False)),
+        ("get_coverage_refresh", lambda db: get_coverage(db, BENCH_VACCINE, refresh=True)),
+        ("get_coverage_matrix", lambda db: get_coverage_matrix(db, use_cache=False)),
+        ("get_supply", lambda db: get_supply(db, BENCH_VACCINE)),
+        ("route_admin_coverage", route(f"/admin/coverage?vaccine={BENCH_VACCINE}", admin)),
+        ("route_admin_region_detail", route(f"/admin/region/{BENCH_REGION_ID}/detail?vaccine={BENCH_VACCINE}", admin)),
+        ("route_list_notifications", route("/notifications", parent)),
+    ]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _percentile(samples: list[float], pct: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def _measure(repeat: int) -> dict:
+    from sqlalchemy import event
+
+    from app.database import SessionLocal, engine
+
+    queries = 0
+
+    def count(*_args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    results = {}
+    for name, fn in _cases():
+        db = SessionLocal()
+        try:
+            fn(db)  # warm-up (imports, first connection, page cache)
+            samples = []
+            per_call = 0
+            for _ in range(repeat):
+                db.expire_all()
+                queries = 0
+                start = time.perf_counter()
+                fn(db)
+                samples.append((time.perf_counter() - start) * 1000)
+                per_call = max(per_call, queries)
+        finally:
+            db.close()
+        results[name] = {
+            "p50_ms": round(_percentile(samples, 50), 2),
+            "p95_ms": round(_percentile(samples, 95), 2),
+            "queries": per_call,
+            # Process peak so far: cases run in order, so growth is attributable to this case
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+        print(f"  {name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+# --- driver ---
+def _db_path(data_dir: Path, size: int) -> Path:
+    return data_dir / f"bench_{size}_{SEED}.db"
+
+
+def _child(args: list[str], db_path: Path) -> None:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SEED_FAKE_DATA="false")
+    subprocess.run([sys.executable, __file__, *args], env=env, cwd=BACKEND_DIR, check=True)
+
+
+def run(sizes: list[int], repeat: int, data_dir: Path, rebuild: bool) -> dict:
+    data_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "seed": SEED,
+        "repeat": repeat,
+        "sizes": {},
+    }
+    for size in sizes:
+        path = _db_path(data_dir, size)
+        if rebuild and path.exists():
+            path.unlink()
+        if not path.exists():
+            print(f"Building {path.name} ...", file=sys.stderr)
+            tmp = path.with_suffix(".building")
+            tmp.unlink(missing_ok=True)
+            _child(["--build-size", str(size)], tmp)
+            tmp.rename(path)
+        print(f"Measuring {size:,} children ...", file=sys.stderr)
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as out:
+            _child(["--measure", "--repeat", str(repeat), "--result", out.name], path)
+            report["sizes"][str(size)] = json.load(out)
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_ms: float) -> list[str]:
+    """Regressions of report against baseline: slower p95, more queries or more memory."""
+    problems = []
+    for size, cases in report["sizes"].items():
+        for name, now in cases.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            if now["p95_ms"] > base["p95_ms"] * (1 + tolerance) and now["p95_ms"] - base["p95_ms"] > min_ms:
+                problems.append(f"{size} {name}: p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+            if now["queries"] > base["queries"]:
+                problems.append(f"{size} {name}: queries {base['queries']} -> {now['queries']}")
+            if now["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                problems.append(f"{size} {name}: peak RSS {base['peak_rss_mb']} -> {now['peak_rss_mb']} MB")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=10, help="timed calls per case")
+    parser.add_argument("--data-dir", type=Path, default=BACKEND_DIR / "bench_data")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild cached synthetic databases")
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="baseline JSON; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="ignore p95 slowdowns below this")
+    # Internal (subprocess) modes
+    parser.add_argument("--build-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--result", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.build_size:
+        _build(args.build_size)
+        return 0
+    if args.measure:
+        args.result.write_text(json.dumps(_measure(args.repeat)))
+        return 0
+
+    report = run(args.sizes, args.repeat, args.data_dir, args.rebuild)
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.out}")
+    if args.compare:
+        problems = compare(report, json.loads(args.compare.read_text()), args.tolerance, args.min_ms)
+        for p in problems:
+            print("REGRESSION", p)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
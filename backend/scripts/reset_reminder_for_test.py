@@ -11,7 +11,11 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
+import app.models  # noqa: F401
 from app.models.child_vaccination import ChildVaccination
+from app.models.reminder_delivery import ReminderDelivery
+from app.services.audio_store import release_audio, remove_audio_files
+from app.services.reminder_service import _media_dir
 
 REMINDABLE_DAYS = 7
 
@@ -35,10 +39,18 @@ def main():
             print("No due vaccination in remindable window (due_date between today-7 and today).")
             print("Add a child with birthdate in the past so a vaccine is due, then run this again.")
             return 1
+        orphaned = release_audio(db, [vac.reminder_audio_path] if vac.reminder_audio_path else [])
         vac.reminder_sent = False
         vac.voice_sent = False
         vac.reminder_audio_path = None
+        # Delivered channels are skipped when a group is resent; forget them so all go out again
+        db.query(ReminderDelivery).filter(
+            ReminderDelivery.child_id == vac.child_id,
+            ReminderDelivery.period_label == vac.period_label,
+            ReminderDelivery.due_date == vac.due_date,
+        ).delete(synchronize_session=False)
         db.commit()
+        remove_audio_files(_media_dir(), orphaned)
         print(f"Reset vaccination id={vac.id} ({vac.vaccine_name}, due {vac.due_date}).")
         print("Now run: curl http://localhost:8000/reminders/send")
         print(f"Then play: http://localhost:8000/reminders/audio/{vac.id}")
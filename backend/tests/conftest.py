@@ -0,0 +1,82 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database seeded with the demo data.
+
+Run from the backend dir: python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="jelba-tests-")
+# Set before app.config is imported; environment variables win over a developer's .env
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_tmp}/vaccines.db",
+    SEED_FAKE_DATA="true",
+    REMINDER_MEDIA_DIR=f"{_tmp}/media",
+    MINIMAX_API_KEY="",
+    ELEVENLABS_API_KEY="",
+    REMINDER_SEND_VOICE="false",
+    REMINDER_WORKER_ENABLED="false",
+    EMAIL_REMINDERS_ENABLED="false",
+    TWILIO_SMS_ENABLED="false",
+    TWILIO_VOICE_ENABLED="false",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal, engine
+from app.models.parent import Parent
+from app.services.coverage_service import _coverage_cache
+from app.services.forecast_service import invalidate_forecast
+from app.services.reference_cache import invalidate_reference_data
+from app.utils.security import create_access_token
+
+# The seeded database, copied back after every test
+_database = os.path.join(_tmp, "vaccines.db")
+_seeded = os.path.join(_tmp, "seeded.db")
+shutil.copyfile(_database, _seeded)
+
+
+@pytest.fixture(autouse=True)
+def _restore_database():
+    """Tests commit freely: each one starts from the seeded database and empty caches."""
+    yield
+    engine.dispose()
+    shutil.copyfile(_seeded, _database)
+    invalidate_reference_data()
+    _coverage_cache.invalidate()
+    invalidate_forecast()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def parent(db) -> Parent:
+    """A demo parent with a region (not the admin)."""
+    return (
+        db.query(Parent)
+        .filter(Parent.region_id.isnot(None), Parent.is_admin.is_(False))
+        .order_by(Parent.id)
+        .first()
+    )
+
+
+def auth_headers(parent: Parent) -> dict[str, str]:
+    return {"Authorization": "Bearer " + create_access_token({"sub": parent.email})}
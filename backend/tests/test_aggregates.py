@@ -0,0 +1,109 @@
+"""Incremental coverage aggregates must always equal a full rebuild_* from the raw tables."""
+from datetime import date, timedelta
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.coverage_cube import CoverageCube
+from app.models.coverage_rollup import CoverageRollup
+from app.models.daily_completion import DailyCompletion
+from app.models.region import Region
+from app.services.aggregate_service import (
+    rebuild_coverage_cube,
+    rebuild_coverage_rollup,
+    rebuild_daily_completions,
+)
+
+from conftest import auth_headers
+
+
+def _snapshot(db) -> dict:
+    """Aggregate contents, ignoring all-zero rows (a rebuild does not write them)."""
+    db.expire_all()
+    rollup = {
+        (r.region_id, r.vaccine_name): (r.record_total, r.completed)
+        for r in db.query(CoverageRollup)
+        if r.record_total or r.completed
+    }
+    registered = {r.region_id: r.registered for r in db.query(CoverageRollup) if r.record_total}
+    daily = {
+        (d.region_id, d.vaccine_name, d.day): (d.completed_count, d.cumulative_count)
+        for d in db.query(DailyCompletion)
+        if d.completed_count
+    }
+    cube = {
+        (c.region_id, c.vaccine_name, c.cohort_month, c.gender): (c.total, c.completed)
+        for c in db.query(CoverageCube)
+        if c.total or c.completed
+    }
+    return {"rollup": rollup, "registered": registered, "daily": daily, "cube": cube}
+
+
+def assert_matches_rebuild(db) -> None:
+    incremental = _snapshot(db)
+    rebuild_coverage_rollup(db)
+    rebuild_daily_completions(db)
+    rebuild_coverage_cube(db)
+    assert incremental == _snapshot(db)
+
+
+def test_child_lifecycle_matches_rebuild(client, db, parent):
+    headers = auth_headers(parent)
+    assert_matches_rebuild(db)
+
+    resp = client.post(
+        "/children/",
+        json={"name": "Test Child", "birthdate": str(date.today() - timedelta(days=200)), "gender": "F"},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    child_id = resp.json()["id"]
+    assert_matches_rebuild(db)
+
+    vaccination_id = (
+        db.query(ChildVaccination.id).filter(ChildVaccination.child_id == child_id).order_by(ChildVaccination.id).first()
+    )[0]
+    assert client.patch(f"/vaccinations/{vaccination_id}/complete", headers=headers).status_code == 200
+    assert_matches_rebuild(db)
+
+    assert client.put(f"/children/{child_id}", json={"gender": "M"}, headers=headers).status_code == 200
+    assert_matches_rebuild(db)
+
+    assert client.delete(f"/children/{child_id}", headers=headers).status_code == 200
+    assert_matches_rebuild(db)
+
+
+def test_parent_region_change_moves_inheriting_children(client, db, parent):
+    headers = auth_headers(parent)
+    resp = client.post(
+        "/children/",
+        json={"name": "Inheriting Child", "birthdate": str(date.today() - timedelta(days=400)), "gender": "M"},
+        headers=headers,
+    )
+    child_id = resp.json()["id"]
+    vaccination_id = (
+        db.query(ChildVaccination.id).filter(ChildVaccination.child_id == child_id).order_by(ChildVaccination.id).first()
+    )[0]
+    client.patch(f"/vaccinations/{vaccination_id}/complete", headers=headers)
+    # Follow the parent's region instead of a region of its own (same effective region)
+    child = db.get(Child, child_id)
+    child.region_id = None
+    db.commit()
+    assert_matches_rebuild(db)
+
+    old_region = parent.region_id
+    new_region = db.query(Region.id).filter(Region.id != old_region).order_by(Region.id).first()[0]
+    resp = client.patch("/auth/me", json={"region_id": new_region}, headers=headers)
+    assert resp.status_code == 200 and resp.json()["region_id"] == new_region
+    db.expire_all()
+    assert db.get(Child, child_id).effective_region_id == new_region
+    assert_matches_rebuild(db)
+
+    # Other profile edits leave the region and children alone
+    resp = client.patch("/auth/me", json={"preferred_language": "ar"}, headers=headers)
+    assert resp.json()["region_id"] == new_region
+    assert client.patch("/auth/me", json={"region_id": 999}, headers=headers).status_code == 404
+    db.expire_all()
+    assert db.get(Child, child_id).effective_region_id == new_region
+
+    assert client.patch("/auth/me", json={"region_id": old_region}, headers=headers).status_code == 200
+    assert_matches_rebuild(db)
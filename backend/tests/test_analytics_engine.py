@@ -0,0 +1,113 @@
+"""NumPy analytics snapshot: after incremental refreshes it must answer like the SQL path."""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.region import Region
+from app.routes.admin import _region_detail_sql
+from app.services.analytics_engine import CoverageSnapshot, build_snapshot, get_snapshot, refresh_snapshot
+from app.services.coverage_service import DROPOUT_PAIRS, _compute_coverage, _compute_dropout
+
+from conftest import auth_headers
+
+VACCINES = ("BCG", "Penta1", "Penta3")
+
+
+@pytest.fixture
+def numpy_engine(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "analytics_engine", "numpy")
+    monkeypatch.setattr(settings, "analytics_snapshot_dir", str(tmp_path))
+
+
+def _rows(snapshot: CoverageSnapshot) -> dict:
+    """Snapshot contents keyed by ids, with codes decoded (a rebuild may number them differently)."""
+    cols = snapshot.cols
+    rows = {
+        int(cols["id"][i]): (
+            int(cols["child_id"][i]),
+            snapshot.vaccines[cols["vaccine"][i]],
+            snapshot.periods[cols["period"][i]],
+            int(cols["region"][i]),
+            snapshot.genders[cols["gender"][i]],
+            int(cols["due_day"][i]),
+            int(cols["completed_day"][i]),
+            int(cols["birth_day"][i]),
+            bool(cols["completed"][i]),
+        )
+        for i in range(len(cols["id"]))
+    }
+    children = dict(zip(cols["child_ids"].tolist(), cols["child_region"].tolist()))
+    return {"rows": rows, "children": children}
+
+
+def assert_engines_agree(db, monkeypatch) -> None:
+    db.expire_all()
+    refreshed = CoverageSnapshot(refresh_snapshot(db))
+    assert _rows(refreshed) == _rows(CoverageSnapshot(build_snapshot(db)))
+    snapshot = get_snapshot(db)
+
+    today = datetime.utcnow().date()
+    ranges = [(None, None), (today - timedelta(days=90), today), (None, today - timedelta(days=365))]
+    for vaccine in VACCINES:
+        for mode in ("registered_children", "vaccination_records"):
+            for date_from, date_to in ranges:
+                args = dict(date_from=date_from, date_to=date_to, mode=mode)
+                assert _compute_coverage(db, vaccine, **args) == _compute_coverage(db, vaccine, refresh=True, **args)
+        for region_id in (r for (r,) in db.query(Region.id)):
+            detail = snapshot.region_detail(region_id, vaccine, today)
+            by_period, last_30, trend_weeks = _region_detail_sql(db, region_id, vaccine, today)
+            assert detail == {"by_period": by_period, "last_30_days_count": last_30, "trend_weeks": trend_weeks}
+
+    numpy_dropout = _compute_dropout(db, pairs=DROPOUT_PAIRS, on_time_days=28)
+    monkeypatch.setattr(settings, "analytics_engine", "sql")
+    assert numpy_dropout == _compute_dropout(db, pairs=DROPOUT_PAIRS, on_time_days=28)
+    monkeypatch.setattr(settings, "analytics_engine", "numpy")
+
+
+def test_refreshed_snapshot_matches_sql(client, db, parent, numpy_engine, monkeypatch):
+    headers = auth_headers(parent)
+    child = (
+        db.query(Child)
+        .join(ChildVaccination, ChildVaccination.child_id == Child.id)
+        .filter(Child.parent_id == parent.id, ChildVaccination.completed.is_(False))
+        .order_by(Child.id)
+        .first()
+    )
+    # Follow the parent's region (same effective region) so a move below rewrites its rows
+    child.region_id = None
+    db.commit()
+    assert_engines_agree(db, monkeypatch)
+
+    resp = client.post(
+        "/children/",
+        json={"name": "Snapshot Child", "birthdate": str(date.today() - timedelta(days=120)), "gender": "F"},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    assert_engines_agree(db, monkeypatch)
+
+    vaccination_id = (
+        db.query(ChildVaccination.id)
+        .filter(ChildVaccination.child_id == child.id, ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .first()
+    )[0]
+    assert client.patch(f"/vaccinations/{vaccination_id}/complete", headers=headers).status_code == 200
+    assert_engines_agree(db, monkeypatch)
+
+    new_region = db.query(Region.id).filter(Region.id != parent.region_id).order_by(Region.id).first()[0]
+    assert client.patch("/auth/me", json={"region_id": new_region}, headers=headers).status_code == 200
+    assert_engines_agree(db, monkeypatch)
+    cols = get_snapshot(db).cols
+    assert cols["child_region"][np.searchsorted(cols["child_ids"], child.id)] == new_region
+
+    gender = "M" if child.gender != "M" else "F"
+    assert client.put(f"/children/{child.id}", json={"gender": gender}, headers=headers).status_code == 200
+    assert_engines_agree(db, monkeypatch)
+
+    assert client.delete(f"/children/{resp.json()['id']}", headers=headers).status_code == 200
+    assert_engines_agree(db, monkeypatch)
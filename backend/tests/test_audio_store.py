@@ -0,0 +1,109 @@
+"""Content-addressed reminder audio: one file per text, reference counted, deleted at zero."""
+import asyncio
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func
+
+from app.config import settings
+from app.models.child_vaccination import ChildVaccination
+from app.models.reminder_audio import ReminderAudio
+from app.services import reminder_service
+from app.services.audio_store import (
+    acquire_audio,
+    audio_key,
+    register_audio,
+    release_audio,
+    remove_audio_files,
+    write_audio_file,
+)
+from app.services.reminder_service import _AudioCache, due_vaccinations_query, send_reminder_groups
+
+
+@pytest.fixture
+def voice(monkeypatch, tmp_path) -> list[str]:
+    """Voice on, ElevenLabs stubbed; returns the texts synthesized."""
+    synthesized = []
+
+    def generate(text, lang="fr"):
+        synthesized.append(text)
+        return b"ID3" + text.encode()
+
+    monkeypatch.setattr(settings, "reminder_send_voice", True)
+    monkeypatch.setattr(settings, "elevenlabs_api_key", "test-key")
+    monkeypatch.setattr(settings, "reminder_media_dir", str(tmp_path))
+    monkeypatch.setattr(reminder_service, "_generate_voice_elevenlabs", generate)
+    return synthesized
+
+
+def _store(db, media_root: Path, text: str) -> str:
+    key = audio_key(text, "voice", "model", "fr")
+    path = write_audio_file(media_root, key, text.encode())
+    register_audio(db, key, path, voice_id="voice", model_id="model", lang="fr", size_bytes=len(text))
+    return path
+
+
+def _ref_count(db, path: str) -> int | None:
+    return db.query(ReminderAudio.ref_count).filter(ReminderAudio.path == path).scalar()
+
+
+def test_same_text_is_synthesized_once(db, voice, tmp_path):
+    async def run(cache):
+        return await asyncio.gather(cache.get("Rappel Amina", "fr"), cache.get("Rappel Amina", "fr"))
+
+    first = asyncio.run(run(_AudioCache(db, tmp_path, asyncio.Semaphore(2))))
+    # A later run finds the stored file
+    second = asyncio.run(run(_AudioCache(db, tmp_path, asyncio.Semaphore(2))))
+
+    assert voice == ["Rappel Amina"]
+    assert len(set(first + second)) == 1
+    assert [p.name for p in tmp_path.iterdir()] == [first[0]]
+
+
+def test_file_is_deleted_when_last_reference_is_released(db, tmp_path):
+    path = _store(db, tmp_path, "Rappel Amina")
+    acquire_audio(db, path, 3)
+    assert _ref_count(db, path) == 3
+
+    assert release_audio(db, [path, path]) == []
+    assert _ref_count(db, path) == 1
+    orphaned = release_audio(db, [path, None])
+    assert orphaned == [path]
+    assert _ref_count(db, path) is None
+
+    db.commit()
+    remove_audio_files(tmp_path, orphaned)
+    assert not (tmp_path / path).exists()
+
+
+def test_legacy_path_is_owned_by_one_reminder(db, tmp_path):
+    (tmp_path / "reminder_12_fr.mp3").write_bytes(b"ID3")
+    shared = _store(db, tmp_path, "Rappel Amina")
+    acquire_audio(db, shared, 2)
+
+    orphaned = release_audio(db, ["reminder_12_fr.mp3", shared])
+    assert orphaned == ["reminder_12_fr.mp3"]
+    assert _ref_count(db, shared) == 1
+    remove_audio_files(tmp_path, orphaned)
+    assert not (tmp_path / "reminder_12_fr.mp3").exists()
+    assert (tmp_path / shared).exists()
+
+
+def test_reference_counts_match_vaccinations_after_a_run(db, voice):
+    ids = [vid for (vid,) in db.query(ChildVaccination.id).filter(ChildVaccination.completed.is_(False)).limit(30)]
+    db.query(ChildVaccination).filter(ChildVaccination.id.in_(ids)).update(
+        {ChildVaccination.due_date: date.today(), ChildVaccination.reminder_sent: False}, synchronize_session=False
+    )
+    db.commit()
+    send_reminder_groups(db, due_vaccinations_query(db).filter(ChildVaccination.id.in_(ids)).all())
+
+    references = dict(
+        db.query(ChildVaccination.reminder_audio_path, func.count())
+        .filter(ChildVaccination.reminder_audio_path.isnot(None))
+        .group_by(ChildVaccination.reminder_audio_path)
+        .all()
+    )
+    counts = dict(db.query(ReminderAudio.path, ReminderAudio.ref_count).all())
+    assert references
+    assert counts == references
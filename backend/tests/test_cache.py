@@ -0,0 +1,60 @@
+"""SWRCache: fresh hits, stale-while-revalidate, LRU eviction and invalidation."""
+import threading
+import time
+
+from app.utils.cache import SWRCache
+
+
+def test_fresh_entry_is_not_recomputed():
+    cache = SWRCache(ttl_seconds=60, stale_seconds=60, max_entries=10)
+    calls = []
+    assert cache.get("k", lambda: calls.append(1) or "v1") == "v1"
+    assert cache.get("k", lambda: calls.append(1) or "v2") == "v1"
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_revalidating_once():
+    cache = SWRCache(ttl_seconds=0.01, stale_seconds=60, max_entries=10)
+    cache.set("k", "old")
+    time.sleep(0.02)
+    done = threading.Event()
+    revalidations = []
+
+    def revalidate():
+        revalidations.append(1)
+        done.wait(1)
+        return "new"
+
+    assert cache.get("k", lambda: "inline", revalidate=revalidate) == "old"
+    # A second stale read does not start another refresh
+    assert cache.get("k", lambda: "inline", revalidate=revalidate) == "old"
+    done.set()
+    for _ in range(100):
+        if cache.get("k", lambda: "inline") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get("k", lambda: "inline") == "new"
+    assert len(revalidations) == 1
+
+
+def test_expired_entry_is_recomputed_inline():
+    cache = SWRCache(ttl_seconds=0.01, stale_seconds=0.01, max_entries=10)
+    cache.set("k", "old")
+    time.sleep(0.03)
+    assert cache.get("k", lambda: "new") == "new"
+
+
+def test_lru_eviction_and_invalidate():
+    cache = SWRCache(ttl_seconds=60, stale_seconds=0, max_entries=2)
+    cache.set(("a", 1), 1)
+    cache.set(("b", 1), 2)
+    cache.get(("a", 1), lambda: None)  # a is now most recently used
+    cache.set(("c", 1), 3)
+    assert cache.get(("a", 1), lambda: "miss") == 1
+    assert cache.get(("c", 1), lambda: "miss") == 3
+    assert cache.get(("b", 1), lambda: "miss") == "miss"
+
+    cache.invalidate(lambda key: key[0] == "b")
+    assert cache.get(("b", 1), lambda: "recomputed") == "recomputed"
+    cache.invalidate()
+    assert cache.get(("b", 1), lambda: "again") == "again"
@@ -0,0 +1,105 @@
+"""Per-region coverage: every read path must equal a recount of the raw rows."""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.services.coverage_service import get_coverage
+from app.services.reference_cache import get_reference_data
+
+from conftest import auth_headers
+
+MODES = ("registered_children", "vaccination_records")
+
+
+def _raw_counts(db, vaccine_name: str, mode: str, date_from: date | None, date_to: date | None) -> dict:
+    """{region_id: (total, vaccinated)} recounted in Python from children and child_vaccinations."""
+    region_of = dict(db.query(Child.id, Child.effective_region_id))
+    registered = Counter(r for r in region_of.values() if r is not None)
+    records, vaccinated = Counter(), Counter()
+    rows = db.query(ChildVaccination.child_id, ChildVaccination.completed, ChildVaccination.completed_at).filter(
+        ChildVaccination.vaccine_name == vaccine_name
+    )
+    for child_id, completed, completed_at in rows:
+        region = region_of[child_id]
+        if region is None:
+            continue
+        records[region] += 1
+        if not completed:
+            continue
+        if date_from is not None or date_to is not None:
+            if completed_at is None:
+                continue
+            if date_from is not None and completed_at.date() < date_from:
+                continue
+            if date_to is not None and completed_at.date() > date_to:
+                continue
+        vaccinated[region] += 1
+    totals = registered if mode == "registered_children" else records
+    return {r: (totals[r], vaccinated[r]) for r in set(totals) | set(vaccinated)}
+
+
+def _counts(rows: list[dict]) -> dict:
+    return {
+        row["region_id"]: (row["total_registered"], row["vaccinated_count"])
+        for row in rows
+        if row["total_registered"] or row["vaccinated_count"]
+    }
+
+
+def _date_ranges(db) -> list[tuple[date | None, date | None]]:
+    """Open, one-sided, closed and single-day windows around real completion days, ending today."""
+    days = sorted({
+        completed_at.date()
+        for (completed_at,) in db.query(ChildVaccination.completed_at).filter(ChildVaccination.completed_at.isnot(None))
+    })
+    quarter, mid, today = days[len(days) // 4], days[len(days) // 2], datetime.utcnow().date()
+    return [(None, None), (mid, None), (None, mid), (quarter, mid), (mid, mid), (mid, today), (today, today)]
+
+
+@pytest.fixture
+def completed_today(client, db, parent) -> None:
+    """One dose completed through the API now (seeded completions are all at midnight)."""
+    vaccination_id = (
+        db.query(ChildVaccination.id)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.parent_id == parent.id, ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .first()
+    )[0]
+    assert client.patch(f"/vaccinations/{vaccination_id}/complete", headers=auth_headers(parent)).status_code == 200
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_grouped_recompute_matches_raw_rows(db, completed_today, mode):
+    for date_from, date_to in _date_ranges(db):
+        for vaccine_name in get_reference_data(db).vaccine_names:
+            rows = get_coverage(db, vaccine_name, date_from=date_from, date_to=date_to, refresh=True, mode=mode)
+            assert _counts(rows) == _raw_counts(db, vaccine_name, mode, date_from, date_to)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_rollup_matches_raw_rows(client, db, parent, completed_today, mode):
+    headers = auth_headers(parent)
+    resp = client.post(
+        "/children/",
+        json={"name": "Rollup Child", "birthdate": str(date.today() - timedelta(days=300)), "gender": "M"},
+        headers=headers,
+    )
+    assert resp.status_code == 201
+    deleted = db.query(Child.id).filter(Child.parent_id == parent.id).order_by(Child.id).first()[0]
+    assert client.delete(f"/children/{deleted}", headers=headers).status_code == 200
+
+    db.expire_all()
+    for vaccine_name in get_reference_data(db).vaccine_names:
+        assert _counts(get_coverage(db, vaccine_name, mode=mode)) == _raw_counts(db, vaccine_name, mode, None, None)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_date_ranges_from_daily_completions_match_raw_rows(db, completed_today, mode):
+    for date_from, date_to in _date_ranges(db)[1:]:
+        for vaccine_name in get_reference_data(db).vaccine_names:
+            rows = get_coverage(db, vaccine_name, date_from=date_from, date_to=date_to, use_cache=False, mode=mode)
+            assert _counts(rows) == _raw_counts(db, vaccine_name, mode, date_from, date_to)
@@ -0,0 +1,48 @@
+"""Regions x vaccines matrix: each cell is the get_coverage row for that region and vaccine."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+from app.services.coverage_service import get_coverage
+
+from conftest import auth_headers
+
+
+@pytest.fixture
+def admin_headers(db) -> dict[str, str]:
+    return auth_headers(db.query(Parent).filter(Parent.is_admin.is_(True)).first())
+
+
+@pytest.mark.parametrize("mode", ["registered_children", "vaccination_records"])
+def test_matrix_rows_match_get_coverage(client, db, parent, admin_headers, mode):
+    # A dose completed now, so the windows ending today are not empty
+    vaccination_id = (
+        db.query(ChildVaccination.id)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.parent_id == parent.id, ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .first()
+    )[0]
+    assert client.patch(f"/vaccinations/{vaccination_id}/complete", headers=auth_headers(parent)).status_code == 200
+
+    today = datetime.utcnow().date()
+    windows = [(None, None), (today - timedelta(days=400), None), (None, today - timedelta(days=400)), (today, today)]
+    for date_from, date_to in windows:
+        params = {"mode": mode, "date_from": date_from, "date_to": date_to}
+        for refresh in (False, True):
+            resp = client.get(
+                "/admin/coverage/matrix",
+                params={k: v for k, v in {**params, "refresh": refresh}.items() if v is not None},
+                headers=admin_headers,
+            )
+            assert resp.status_code == 200
+            matrix = resp.json()
+            for vaccine_name in matrix["vaccines"]:
+                cells = [
+                    {**{k: v for k, v in row.items() if k != "coverage"}, **row["coverage"][vaccine_name]}
+                    for row in matrix["regions"]
+                ]
+                assert cells == get_coverage(db, vaccine_name, use_cache=False, **params)
@@ -0,0 +1,92 @@
+"""Coverage time series: bucketed counts and cumulative coverage equal a recount of the raw rows."""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+
+from conftest import auth_headers
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _raw_series(db, date_from: date, date_to: date, bucket: str, mode: str) -> dict:
+    """{(region_id, vaccine_name): (total, [(bucket_start, completed, cumulative)])} from the raw rows."""
+    region_of = dict(db.query(Child.id, Child.effective_region_id))
+    registered = Counter(r for r in region_of.values() if r is not None)
+    records, baseline, done = Counter(), Counter(), Counter()
+    rows = db.query(
+        ChildVaccination.child_id, ChildVaccination.vaccine_name, ChildVaccination.completed, ChildVaccination.completed_at
+    )
+    for child_id, vaccine_name, completed, completed_at in rows:
+        region = region_of[child_id]
+        if region is None:
+            continue
+        records[(region, vaccine_name)] += 1
+        if not completed or completed_at is None:
+            continue
+        day = completed_at.date()
+        if day < date_from:
+            baseline[(region, vaccine_name)] += 1
+        elif day <= date_to:
+            done[(region, vaccine_name, _bucket_start(day, bucket))] += 1
+
+    starts = sorted({_bucket_start(date_from + timedelta(days=i), bucket) for i in range((date_to - date_from).days + 1)})
+    series = {}
+    for region, vaccine_name in records:
+        cumulative = baseline[(region, vaccine_name)]
+        points = []
+        for start in starts:
+            n = done[(region, vaccine_name, start)]
+            cumulative += n
+            points.append((start.isoformat(), n, cumulative))
+        total = registered[region] if mode == "registered_children" else records[(region, vaccine_name)]
+        series[(region, vaccine_name)] = (total, points)
+    return series
+
+
+@pytest.mark.parametrize("bucket,days", [("day", 45), ("week", 200), ("month", 800)])
+@pytest.mark.parametrize("mode", ["registered_children", "vaccination_records"])
+def test_timeseries_matches_raw_rows(client, db, parent, bucket, days, mode):
+    # A dose completed now lands in the last bucket
+    vaccination_id = (
+        db.query(ChildVaccination.id)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.parent_id == parent.id, ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .first()
+    )[0]
+    assert client.patch(f"/vaccinations/{vaccination_id}/complete", headers=auth_headers(parent)).status_code == 200
+
+    admin = db.query(Parent).filter(Parent.is_admin.is_(True)).first()
+    date_to = datetime.utcnow().date()
+    date_from = date_to - timedelta(days=days)
+    resp = client.get(
+        "/admin/coverage/timeseries",
+        params={"bucket": bucket, "date_from": str(date_from), "date_to": str(date_to), "mode": mode},
+        headers=auth_headers(admin),
+    )
+    assert resp.status_code == 200
+
+    expected = _raw_series(db, date_from, date_to, bucket, mode)
+    checked = 0
+    for s in resp.json()["series"]:
+        total, points = expected.get((s["region_id"], s["vaccine_name"]), (0, None))
+        assert s["total_registered"] == total
+        got = [(p["bucket_start"], p["completed_count"], p["cumulative_completed"]) for p in s["points"]]
+        if points is None:
+            assert all(p[1:] == (0, 0) for p in got)
+            continue
+        assert got == points
+        assert [p["coverage_pct"] for p in s["points"]] == [round(c / total, 4) if total else 0.0 for _, _, c in points]
+        checked += 1
+    assert checked == len(expected)
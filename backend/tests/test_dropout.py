@@ -0,0 +1,63 @@
+"""Dropout and timeliness analytics equal a recount of the raw rows."""
+from collections import Counter
+
+import pytest
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+
+from conftest import auth_headers
+
+
+def _raw(db, on_time_days: int) -> tuple[Counter, dict]:
+    """Completed doses per (region, vaccine) and {region: {vaccine: timeliness}} from the raw rows."""
+    region_of = dict(db.query(Child.id, Child.effective_region_id))
+    done, dated, on_time = Counter(), Counter(), Counter()
+    rows = db.query(
+        ChildVaccination.child_id, ChildVaccination.vaccine_name, ChildVaccination.due_date, ChildVaccination.completed_at
+    ).filter(ChildVaccination.completed.is_(True))
+    for child_id, vaccine_name, due_date, completed_at in rows:
+        region = region_of[child_id]
+        if region is None:
+            continue
+        done[(region, vaccine_name)] += 1
+        if due_date is not None and completed_at is not None:
+            dated[(region, vaccine_name)] += 1
+            on_time[(region, vaccine_name)] += (completed_at.date() - due_date).days <= on_time_days
+    timeliness = {}
+    for (region, vaccine_name), n in dated.items():
+        timeliness.setdefault(region, {})[vaccine_name] = {
+            "completed": n,
+            "on_time": on_time[(region, vaccine_name)],
+            "on_time_rate": round(on_time[(region, vaccine_name)] / n, 4),
+        }
+    return done, timeliness
+
+
+@pytest.mark.parametrize("on_time_days", [0, 7, 28])
+def test_dropout_matches_raw_rows(client, db, on_time_days):
+    admin = db.query(Parent).filter(Parent.is_admin.is_(True)).first()
+    done, timeliness = _raw(db, on_time_days)
+    pairs = [("Penta1", "Penta3"), ("VPO1", "VPO3"), ("RR1", "RR2")]
+    for params, expected_pairs in (
+        ({}, pairs),
+        ({"pair": ["Penta1:Penta2", "VPO1:VPO3"]}, [("Penta1", "Penta2"), ("VPO1", "VPO3")]),
+    ):
+        for refresh in (False, True):
+            resp = client.get(
+                "/admin/analytics/dropout",
+                params={**params, "on_time_days": on_time_days, "refresh": refresh},
+                headers=auth_headers(admin),
+            )
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["pairs"] == [f"{a}->{b}" for a, b in expected_pairs]
+            for region in body["regions"]:
+                r = region["region_id"]
+                for first, last in expected_pairs:
+                    cell = region["dropout"][f"{first}->{last}"]
+                    n1, n2 = done[(r, first)], done[(r, last)]
+                    assert (cell["first_dose"], cell["last_dose"]) == (n1, n2)
+                    assert cell["dropout_rate"] == (round((n1 - n2) / n1, 4) if n1 else None)
+                assert region["timeliness"] == timeliness.get(r, {})
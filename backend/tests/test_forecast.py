@@ -0,0 +1,91 @@
+"""Dose demand forecast: registered demand matches the raw rows; cached forecasts follow writes."""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.services.forecast_service import get_forecast
+from app.services.stock_service import record_receipt, transfer_stock
+
+from conftest import auth_headers
+
+
+def _by_vaccine(forecast: dict) -> dict:
+    return {v["vaccine_name"]: v for v in forecast["vaccines"]}
+
+
+@pytest.fixture
+def due_child(client, parent) -> int:
+    """A newborn whose first doses fall in the horizon (the seeded completions are random)."""
+    resp = client.post(
+        "/children/",
+        json={"name": "Forecast Child", "birthdate": str(date.today() - timedelta(days=20)), "gender": "F"},
+        headers=auth_headers(parent),
+    )
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def test_registered_demand_matches_raw_rows(db, due_child):
+    today = datetime.utcnow().date()
+    horizon = settings.forecast_horizon_weeks
+    first_overdue = today - timedelta(days=settings.forecast_overdue_days)
+    due, overdue = Counter(), Counter()
+    rows = (
+        db.query(ChildVaccination.vaccine_name, ChildVaccination.due_date)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(ChildVaccination.completed.is_(False), Child.effective_region_id.isnot(None))
+    )
+    for vaccine_name, due_date in rows:
+        if due_date is None or not first_overdue <= due_date < today + timedelta(weeks=horizon):
+            continue
+        (overdue if due_date < today else due)[vaccine_name] += 1
+
+    forecast = _by_vaccine(get_forecast(db, use_cache=False))
+    assert sum(due.values()) > 0
+    for vaccine_name, v in forecast.items():
+        assert v["registered_due"] == due[vaccine_name]
+        assert v["overdue"] == overdue[vaccine_name]
+        assert v["registered_due"] == sum(r["registered_due"] for r in v["regions"])
+    # The cached forecast is the same computation
+    assert get_forecast(db) == get_forecast(db, use_cache=False)
+
+
+def test_cached_forecast_follows_stock_movements(db):
+    vaccine_name = "BCG"
+    before = _by_vaccine(get_forecast(db))[vaccine_name]["current_stock"]
+
+    record_receipt(db, vaccine_name, 1000)
+    db.commit()
+    assert _by_vaccine(get_forecast(db))[vaccine_name]["current_stock"] == before + 1000
+
+    # A transfer moves stock without changing the total, and a rolled back receipt is not counted
+    assert transfer_stock(db, vaccine_name, 400, from_region_id=None, to_region_id=1)
+    db.commit()
+    record_receipt(db, vaccine_name, 50)
+    db.rollback()
+    assert _by_vaccine(get_forecast(db))[vaccine_name]["current_stock"] == before + 1000
+
+
+def test_cached_forecast_follows_completions(client, db, parent, due_child):
+    today = datetime.utcnow().date()
+    vaccination = (
+        db.query(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(
+            ChildVaccination.child_id == due_child,
+            ChildVaccination.completed.is_(False),
+            ChildVaccination.due_date >= today,
+            ChildVaccination.due_date < today + timedelta(weeks=settings.forecast_horizon_weeks),
+            Child.effective_region_id.isnot(None),
+        )
+        .first()
+    )
+    before = _by_vaccine(get_forecast(db))[vaccination.vaccine_name]["registered_due"]
+
+    resp = client.patch(f"/vaccinations/{vaccination.id}/complete", headers=auth_headers(parent))
+    assert resp.status_code == 200
+    assert _by_vaccine(get_forecast(db))[vaccination.vaccine_name]["registered_due"] == before - 1
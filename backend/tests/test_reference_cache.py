@@ -0,0 +1,53 @@
+"""Reference data snapshot is reused until a committed write to its tables invalidates it."""
+from app.models.region import Region
+from app.models.vaccine_template import VaccineTemplate
+from app.services.reference_cache import get_reference_data
+
+
+def test_snapshot_is_reused_without_writes(db):
+    assert get_reference_data(db) is get_reference_data(db)
+
+
+def test_region_write_invalidates_after_commit(db):
+    region = db.query(Region).order_by(Region.id).first()
+    original = region.name
+    before = get_reference_data(db)
+    try:
+        region.name = original + " (test)"
+        db.flush()
+        # Not committed yet: the snapshot stays
+        assert get_reference_data(db) is before
+        db.commit()
+        after = get_reference_data(db)
+        assert after is not before
+        assert after.region_by_id[region.id].name == original + " (test)"
+    finally:
+        region.name = original
+        db.commit()
+    assert get_reference_data(db).region_by_id[region.id].name == original
+
+
+def test_bulk_template_update_invalidates(db):
+    template = db.query(VaccineTemplate).order_by(VaccineTemplate.id).first()
+    template_id, offset_days = template.id, template.offset_days
+    before = get_reference_data(db)
+    db.query(VaccineTemplate).filter(VaccineTemplate.id == template_id).update(
+        {VaccineTemplate.offset_days: VaccineTemplate.offset_days + 1}, synchronize_session=False
+    )
+    db.commit()
+    after = get_reference_data(db)
+    assert after is not before
+    assert next(t for t in after.templates if t.id == template_id).offset_days == offset_days + 1
+    db.query(VaccineTemplate).filter(VaccineTemplate.id == template_id).update(
+        {VaccineTemplate.offset_days: VaccineTemplate.offset_days - 1}, synchronize_session=False
+    )
+    db.commit()
+
+
+def test_rolled_back_write_keeps_snapshot(db):
+    before = get_reference_data(db)
+    region = db.query(Region).order_by(Region.id).first()
+    region.name = region.name + " (rolled back)"
+    db.flush()
+    db.rollback()
+    assert get_reference_data(db) is before
@@ -0,0 +1,104 @@
+"""Region detail and the keyset-paginated children list equal a recount of the raw rows."""
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+from app.models.region import Region
+
+from conftest import auth_headers
+
+
+@pytest.fixture
+def admin_headers(db) -> dict[str, str]:
+    return auth_headers(db.query(Parent).filter(Parent.is_admin.is_(True)).first())
+
+
+def _pages(client, headers, region_id: int, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor is not None else {})}
+        page = client.get(f"/admin/region/{region_id}/children", params=query, headers=headers).json()
+        assert len(page["items"]) <= params["limit"]
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+        assert cursor == page["items"][-1]["id"]
+
+
+def test_children_pages_cover_the_region(client, db, admin_headers):
+    for (region_id,) in db.query(Region.id):
+        children = db.query(Child).filter(Child.effective_region_id == region_id).order_by(Child.id).all()
+        expected = [{"id": c.id, "name": c.name, "birthdate": str(c.birthdate)} for c in children]
+        assert _pages(client, admin_headers, region_id, limit=2) == expected
+        assert _pages(client, admin_headers, region_id, limit=500) == expected
+        named = [c for c in expected if "a" in c["name"].lower()]
+        assert _pages(client, admin_headers, region_id, limit=1, name="A") == named
+
+
+def test_region_detail_matches_raw_rows(client, db, parent, admin_headers):
+    # A dose completed now shows in the last 30 days and the current week
+    vaccination = (
+        db.query(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(Child.parent_id == parent.id, ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .first()
+    )
+    assert client.patch(f"/vaccinations/{vaccination.id}/complete", headers=auth_headers(parent)).status_code == 200
+    # And doses completed on the window edges (the detail reads the raw rows)
+    today = datetime.utcnow().date()
+    edges = [today - timedelta(days=n) for n in (7, 8, 14, 21, 28, 29, 30)]
+    completed = (
+        db.query(ChildVaccination)
+        .join(Child, ChildVaccination.child_id == Child.id)
+        .filter(
+            Child.effective_region_id == parent.region_id,
+            ChildVaccination.vaccine_name == vaccination.vaccine_name,
+            ChildVaccination.completed.is_(True),
+            ChildVaccination.id != vaccination.id,
+        )
+        .limit(len(edges))
+    )
+    for row, day in zip(completed, edges):
+        row.completed_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=15)
+    db.commit()
+
+    region_of = dict(db.query(Child.id, Child.effective_region_id))
+    registered = Counter(r for r in region_of.values() if r is not None)
+    rows = db.query(
+        ChildVaccination.child_id,
+        ChildVaccination.period_label,
+        ChildVaccination.completed,
+        ChildVaccination.completed_at,
+    )
+    for vaccine_name in ("BCG", "Penta3", vaccination.vaccine_name):
+        for (region_id,) in db.query(Region.id):
+            totals, done, days = Counter(), Counter(), []
+            for child_id, period_label, completed, completed_at in rows.filter(ChildVaccination.vaccine_name == vaccine_name):
+                if region_of[child_id] != region_id:
+                    continue
+                totals[period_label] += 1
+                if completed:
+                    done[period_label] += 1
+                    if completed_at is not None:
+                        days.append(completed_at.date())
+            detail = client.get(
+                f"/admin/region/{region_id}/detail", params={"vaccine": vaccine_name}, headers=admin_headers
+            ).json()
+            assert detail["registered_count"] == registered[region_id]
+            if not registered[region_id]:
+                continue
+            assert detail["by_period"] == [
+                {"period_label": p, "total": totals[p], "completed": done[p]} for p in sorted(totals)
+            ]
+            assert detail["last_30_days_count"] == sum(d > today - timedelta(days=30) for d in days)
+            week_ends = [today - timedelta(weeks=i) for i in range(3, -1, -1)]
+            assert detail["trend_weeks"] == [
+                {"week_end": end.isoformat(), "completed_count": sum(end - timedelta(days=7) < d <= end for d in days)}
+                for end in week_ends
+            ]
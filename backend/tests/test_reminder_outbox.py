@@ -0,0 +1,161 @@
+"""Reminder outbox: one job per group, disjoint leases, a reclaimed job is sent once, even mid-batch."""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.parent import Parent
+from app.models.reminder_delivery import ReminderDelivery
+from app.models.reminder_job import ReminderJob
+from app.services import reminder_outbox, reminder_service
+from app.services.reminder_outbox import claim_jobs, enqueue_due_reminders, idempotency_key, process_jobs
+from app.services.twilio_client import TwilioResult
+
+
+@pytest.fixture
+def due_group(db) -> ReminderJob:
+    """One child with exactly one due reminder group, enqueued as one pending job."""
+    vaccination = (
+        db.query(ChildVaccination)
+        .filter(ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id.desc())
+        .first()
+    )
+    db.query(ChildVaccination).filter(
+        ChildVaccination.child_id == vaccination.child_id, ChildVaccination.id != vaccination.id
+    ).update({ChildVaccination.reminder_sent: True}, synchronize_session=False)
+    vaccination.due_date = date.today()
+    vaccination.reminder_sent = False
+    db.commit()
+    enqueue_due_reminders(db, vaccination.child_id)
+    return (
+        db.query(ReminderJob)
+        .filter_by(idempotency_key=idempotency_key(vaccination.child_id, vaccination.period_label, date.today()))
+        .one()
+    )
+
+
+@pytest.fixture
+def workers():
+    sessions = SessionLocal(), SessionLocal()
+    yield sessions
+    for session in sessions:
+        session.close()
+
+
+def test_enqueue_is_idempotent(db, due_group):
+    assert enqueue_due_reminders(db, due_group.child_id) == 0
+    assert db.query(ReminderJob).filter(ReminderJob.child_id == due_group.child_id).count() == 1
+
+
+def test_job_claimed_by_two_workers_is_sent_once(db, due_group, workers):
+    w1, w2 = workers
+    child_id = due_group.child_id
+    jobs1 = claim_jobs(w1, "w1", 10, child_id=child_id)
+    assert [job.id for job in jobs1] == [due_group.id]
+    # Leased: the second worker gets nothing
+    assert claim_jobs(w2, "w2", 10, child_id=child_id) == []
+
+    # w1 stalls past its lease; w2 reclaims the job and sends it
+    db.query(ReminderJob).filter_by(id=due_group.id).update(
+        {ReminderJob.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+    )
+    db.commit()
+    jobs2 = claim_jobs(w2, "w2", 10, child_id=child_id)
+    assert [job.id for job in jobs2] == [due_group.id]
+    sent = process_jobs(w2, jobs2, "w2")
+    # w1 wakes up: the vaccination is already marked sent and the job is no longer its lease
+    sent += process_jobs(w1, jobs1, "w1")
+
+    assert len(sent) == 1
+    db.expire_all()
+    job = db.get(ReminderJob, due_group.id)
+    assert job.status == "done"
+    assert job.attempts == 2
+    assert job.lease_owner is None
+    assert job.result is not None
+
+
+def _expire_lease(job_id: int) -> None:
+    session = SessionLocal()
+    try:
+        session.query(ReminderJob).filter_by(id=job_id).update(
+            {ReminderJob.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_lease_lost_mid_batch_is_not_delivered(db, due_group, workers, monkeypatch):
+    w1, w2 = workers
+    child = db.get(Child, due_group.child_id)
+    db.get(Parent, child.parent_id).phone_number = "+212600000000"
+    db.commit()
+    sms = []
+
+    def send_sms(phone, text):
+        sms.append(phone)
+        return TwilioResult("sent", provider_id=f"SM{len(sms)}", attempts=1)
+
+    takeover = []
+
+    def generate_voice(text, lang="fr"):
+        if not takeover:
+            takeover.append(None)
+            # w1 stalls in phase 1 past its lease: w2 reclaims the job and sends it meanwhile
+            _expire_lease(due_group.id)
+            jobs2 = claim_jobs(w2, "w2", 10, child_id=due_group.child_id)
+            takeover[0] = process_jobs(w2, jobs2, "w2")
+        return b"ID3" + text.encode()
+
+    monkeypatch.setattr(settings, "twilio_sms_enabled", True)
+    monkeypatch.setattr(settings, "reminder_send_voice", True)
+    monkeypatch.setattr(settings, "elevenlabs_api_key", "test-key")
+    monkeypatch.setattr(reminder_service, "_send_sms_twilio", send_sms)
+    monkeypatch.setattr(reminder_service, "_generate_voice_elevenlabs", generate_voice)
+
+    jobs1 = claim_jobs(w1, "w1", 10, child_id=due_group.child_id)
+    sent = process_jobs(w1, jobs1, "w1")
+
+    assert len(takeover) == 1 and len(takeover[0]) == 1
+    # w1 re-checked its lease before delivering: nothing sent twice
+    assert sent == []
+    assert sms == ["+212600000000"]
+    db.expire_all()
+    assert db.query(ReminderDelivery).filter_by(child_id=due_group.child_id).count() == 1
+    job = db.get(ReminderJob, due_group.id)
+    assert job.status == "done"
+    assert job.result is not None
+
+
+def test_lease_covers_a_phase_of_the_batch(monkeypatch):
+    monkeypatch.setattr(settings, "reminder_job_lease_seconds", 300)
+    monkeypatch.setattr(settings, "reminder_job_group_seconds", 60)
+    monkeypatch.setattr(settings, "reminder_tts_concurrency", 2)
+    monkeypatch.setattr(settings, "reminder_smtp_concurrency", 2)
+    monkeypatch.setattr(settings, "reminder_twilio_concurrency", 4)
+    assert reminder_outbox._lease_seconds(5) == 300
+    # 50 groups, two at a time, 60 s each
+    assert reminder_outbox._lease_seconds(50) == 25 * 60
+
+
+def test_failed_send_is_retried_with_backoff(db, due_group, monkeypatch):
+    def failing(db, vaccinations, mailer=None, hold=None):
+        return {(v.child_id, v.period_label, v.due_date): RuntimeError("smtp down") for v in vaccinations}
+
+    monkeypatch.setattr(reminder_outbox, "send_reminder_groups", failing)
+    before = datetime.utcnow()
+    jobs = claim_jobs(db, "w1", 10, child_id=due_group.child_id)
+    assert process_jobs(db, jobs, "w1") == []
+
+    db.expire_all()
+    job = db.get(ReminderJob, due_group.id)
+    assert job.status == "pending"
+    assert "smtp down" in job.last_error
+    assert job.next_attempt_at >= before + reminder_outbox._backoff(1)
+    # Not due again until the backoff has passed
+    assert claim_jobs(db, "w2", 10, child_id=due_group.child_id) == []
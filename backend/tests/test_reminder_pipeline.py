@@ -0,0 +1,55 @@
+"""Reminder pipeline: groups run concurrently but the batch is committed only at phase boundaries."""
+import threading
+from datetime import date
+
+from sqlalchemy import event
+
+from app.models.child_vaccination import ChildVaccination
+from app.services.reminder_service import due_vaccinations_query, send_reminder_groups
+
+
+def _make_due(db, n: int) -> list[int]:
+    ids = [
+        vid
+        for (vid,) in db.query(ChildVaccination.id)
+        .filter(ChildVaccination.completed.is_(False))
+        .order_by(ChildVaccination.id)
+        .limit(n)
+    ]
+    db.query(ChildVaccination).filter(ChildVaccination.id.in_(ids)).update(
+        {ChildVaccination.due_date: date.today(), ChildVaccination.reminder_sent: False}, synchronize_session=False
+    )
+    db.commit()
+    return ids
+
+
+def test_batch_commits_at_phase_boundaries_only(db):
+    ids = _make_due(db, 40)
+    vaccinations = due_vaccinations_query(db).filter(ChildVaccination.id.in_(ids)).all()
+    commits = []
+
+    def on_commit(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", on_commit)
+    try:
+        results = send_reminder_groups(db, vaccinations)
+    finally:
+        event.remove(db, "after_commit", on_commit)
+
+    assert len(results) > 1
+    assert not any(isinstance(r, BaseException) for r in results.values())
+    # Texts and voices, then deliveries (no Minimax key: nothing to prefetch)
+    assert len(commits) == 2
+    db.expire_all()
+    assert db.query(ChildVaccination).filter(
+        ChildVaccination.id.in_(ids), ChildVaccination.reminder_sent.is_(False)
+    ).count() == 0
+
+
+def test_worker_threads_are_shut_down_after_each_run(db):
+    before = threading.active_count()
+    for _ in range(3):
+        ids = _make_due(db, 10)
+        send_reminder_groups(db, due_vaccinations_query(db).filter(ChildVaccination.id.in_(ids)).all())
+    assert threading.active_count() <= before
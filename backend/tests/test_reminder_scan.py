@@ -0,0 +1,23 @@
+"""Keyset scan of due reminder groups: bounded windows that together cover every group once."""
+from datetime import date
+
+from app.models.child_vaccination import ChildVaccination
+from app.services import reminder_outbox
+from app.services.reminder_outbox import _due_group_keys
+from app.services.reminder_service import due_vaccinations_query
+
+
+def test_windows_cover_all_due_groups_in_key_order(db, monkeypatch):
+    ids = [vid for (vid,) in db.query(ChildVaccination.id).filter(ChildVaccination.completed.is_(False)).limit(30)]
+    db.query(ChildVaccination).filter(ChildVaccination.id.in_(ids)).update(
+        {ChildVaccination.due_date: date.today(), ChildVaccination.reminder_sent: False}, synchronize_session=False
+    )
+    db.commit()
+    key = (ChildVaccination.child_id, ChildVaccination.period_label, ChildVaccination.due_date)
+    expected = [tuple(row) for row in due_vaccinations_query(db).with_entities(*key).distinct().order_by(*key)]
+    assert len(expected) > 3
+
+    monkeypatch.setattr(reminder_outbox.settings, "reminder_scan_batch_size", 3)
+    windows = list(_due_group_keys(db))
+    assert all(1 <= len(window) <= 3 for window in windows)
+    assert [tuple(row) for window in windows for row in window] == expected
@@ -0,0 +1,142 @@
+"""Batched Minimax template generation: reply parsing and the fallbacks for unusable items (no network)."""
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+import requests
+
+from app.config import settings
+from app.models.reminder_text_template import ReminderTextTemplate
+from app.services import reminder_service
+from app.services.reminder_service import _generate_period_templates_minimax, _ReminderGroup, _TextCache
+
+PERIODS = [("Naissance", ["BCG", "HB1"]), ("Mois 2", ["Penta1", "VPO1"]), ("Mois 4", ["Penta3"])]
+
+
+class _FakeMinimax:
+    """Stands in for requests.post: replies with the given message contents, one per call (or reply(prompt))."""
+
+    def __init__(self, *contents, status_code: int = 0):
+        self.contents = list(contents)
+        self.status_code = status_code
+        self.prompts = []
+
+    def __call__(self, url, json=None, headers=None, timeout=None):
+        self.prompts.append(json["messages"][-1]["content"])
+        content = self.contents[0](self.prompts[-1]) if callable(self.contents[0]) else self.contents.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        return _Response({"base_resp": {"status_code": self.status_code}, "choices": [{"message": {"content": content}}]})
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def minimax(monkeypatch):
+    monkeypatch.setattr(settings, "minimax_api_key", "test-key")
+
+    def install(*contents, status_code: int = 0) -> _FakeMinimax:
+        fake = _FakeMinimax(*contents, status_code=status_code)
+        monkeypatch.setattr(reminder_service.requests, "post", fake)
+        return fake
+
+    return install
+
+
+def _templates(n: int) -> list[str]:
+    return [f"Rappel {i} pour {{child_name}} le {{due_date}}." for i in range(n)]
+
+
+def test_batch_reply_is_aligned_with_periods(minimax):
+    fake = minimax("<think>plan</think>\n```json\n" + json.dumps(_templates(3)) + "\n```")
+    assert _generate_period_templates_minimax("fr", PERIODS) == _templates(3)
+    # One call for the whole batch, every period listed
+    assert len(fake.prompts) == 1
+    assert all(label in fake.prompts[0] for label, _ in PERIODS)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        json.dumps(_templates(2)),  # short batch
+        json.dumps(_templates(4)),  # long batch
+        '["Rappel pour {child_name}", ',  # truncated
+        "Désolé, je ne peux pas.",  # no array
+        "[1, 2, 3]",  # not strings
+    ],
+)
+def test_unusable_batch_reply_falls_back_for_every_period(minimax, content):
+    minimax(content)
+    assert _generate_period_templates_minimax("fr", PERIODS) == [None, None, None]
+
+
+def test_items_without_the_placeholders_are_dropped(minimax):
+    items = [
+        "Rappel pour {child_name} le {due_date}.",
+        "Rappel pour votre enfant le {due_date}.",  # child name missing
+        "Rappel pour {child_name}: {vaccine_list}.",  # invented placeholder
+    ]
+    minimax(json.dumps(items))
+    assert _generate_period_templates_minimax("fr", PERIODS) == [items[0], None, None]
+
+
+def test_api_error_and_failed_request_fall_back(minimax):
+    minimax(json.dumps(_templates(3)), status_code=1004)
+    assert _generate_period_templates_minimax("fr", PERIODS) == [None, None, None]
+    minimax(requests.ConnectionError("down"))
+    assert _generate_period_templates_minimax("fr", PERIODS) == [None, None, None]
+
+
+def _group(period_label: str, vaccine_names: list[str]) -> _ReminderGroup:
+    return _ReminderGroup(
+        vaccinations=[],
+        vaccination_ids=[],
+        first_vaccination_id=0,
+        child_id=0,
+        child_name="Amina",
+        period_label=period_label,
+        due_date=date(2026, 1, 5),
+        vaccine_names=vaccine_names,
+        lang="fr",
+        email=None,
+        phone=None,
+    )
+
+
+def test_prefetch_falls_back_per_period(db, minimax, monkeypatch):
+    monkeypatch.setattr(settings, "reminder_llm_batch_size", 2)
+    groups = [_group(label, names) for label, names in PERIODS]
+    # Stale stored template for "Mois 4": kept when regenerating it fails
+    db.add(ReminderTextTemplate(
+        lang="fr", period_label="Mois 4", vaccine_names="Penta3", model=settings.minimax_model,
+        template="Ancien rappel pour {child_name}.", generated_at=datetime.utcnow() - timedelta(days=30),
+    ))
+    db.commit()
+
+    def reply(prompt):
+        # Batches of two: "Mois 2" and "Mois 4" (sorted keys), then "Naissance"
+        if "Mois 2" in prompt:
+            return json.dumps(["Rappel Mois 2 pour {child_name}.", "Rappel sans placeholder."])
+        return "pas de JSON"
+
+    fake = minimax(reply)
+    cache = _TextCache(db, asyncio.Semaphore(1))
+    asyncio.run(cache.prefetch(groups))
+
+    assert len(fake.prompts) == 2
+    texts = {g.period_label: cache.get(g) for g in groups}
+    assert texts["Mois 2"] == "Rappel Mois 2 pour Amina."
+    assert texts["Mois 4"] == "Ancien rappel pour Amina."
+    # Nothing usable and nothing stored: the static text
+    assert texts["Naissance"].startswith("Rappel : votre enfant Amina doit recevoir les vaccins suivants")
+    assert "BCG, HB1" in texts["Naissance"]
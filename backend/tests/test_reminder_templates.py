@@ -0,0 +1,88 @@
+"""Reminder text templates: upserted when another worker stored the same key, stored without reloading the batch."""
+import asyncio
+from datetime import date
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.child_vaccination import ChildVaccination
+from app.models.reminder_text_template import ReminderTextTemplate
+from app.services import reminder_service
+from app.services.reminder_service import _ReminderGroup, _TextCache, due_vaccinations_query, send_reminder_groups
+
+
+def _group(period_label: str) -> _ReminderGroup:
+    return _ReminderGroup(
+        vaccinations=[],
+        vaccination_ids=[],
+        first_vaccination_id=0,
+        child_id=0,
+        child_name="Amina",
+        period_label=period_label,
+        due_date=date(2026, 1, 5),
+        vaccine_names=["BCG", "HB1"],
+        lang="fr",
+        email=None,
+        phone=None,
+    )
+
+
+def test_prefetch_upserts_key_stored_by_another_worker(db, monkeypatch):
+    monkeypatch.setattr(settings, "minimax_api_key", "test-key")
+    period = "Test concurrent period"
+
+    def generate(lang, periods):
+        # Another worker stores the same key while this batch is being generated
+        other = SessionLocal()
+        try:
+            other.add(ReminderTextTemplate(
+                lang=lang, period_label=period, vaccine_names="BCG, HB1", model=settings.minimax_model,
+                template="old {child_name} {due_date}",
+            ))
+            other.commit()
+        finally:
+            other.close()
+        return ["new {child_name} {due_date}" for _ in periods]
+
+    monkeypatch.setattr(reminder_service, "_generate_period_templates_minimax", generate)
+    cache = _TextCache(db, asyncio.Semaphore(1))
+    asyncio.run(cache.prefetch([_group(period)]))
+
+    assert cache.get(_group(period)).startswith("new Amina")
+    rows = db.query(ReminderTextTemplate).filter(ReminderTextTemplate.period_label == period).all()
+    assert [r.template for r in rows] == ["new {child_name} {due_date}"]
+
+
+def test_prefetch_keeps_loaded_vaccinations(db, monkeypatch):
+    monkeypatch.setattr(settings, "minimax_api_key", "test-key")
+    monkeypatch.setattr(settings, "reminder_send_voice", True)
+    monkeypatch.setattr(settings, "elevenlabs_api_key", "test-key")
+    monkeypatch.setattr(
+        reminder_service, "_generate_period_templates_minimax",
+        lambda lang, periods: ["Rappel {child_name} {due_date}" for _ in periods],
+    )
+    monkeypatch.setattr(reminder_service, "_generate_voice_elevenlabs", lambda text, lang="fr": text.encode())
+    ids = [vid for (vid,) in db.query(ChildVaccination.id).filter(ChildVaccination.completed.is_(False)).limit(40)]
+    db.query(ChildVaccination).filter(ChildVaccination.id.in_(ids)).update(
+        {ChildVaccination.due_date: date.today(), ChildVaccination.reminder_sent: False}, synchronize_session=False
+    )
+    db.commit()
+    vaccinations = due_vaccinations_query(db).filter(ChildVaccination.id.in_(ids)).all()
+    reloads = []
+
+    def on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("SELECT") and "FROM child_vaccinations" in statement:
+            reloads.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        results = send_reminder_groups(db, vaccinations)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert not any(isinstance(r, BaseException) for r in results.values())
+    assert all(r["text"].startswith("Rappel ") for r in results.values())
+    # Templates are stored by the phase 1 commit, not by a commit that expires the batch
+    assert reloads == []
+    assert db.query(ReminderTextTemplate).filter(ReminderTextTemplate.template.startswith("Rappel ")).count() > 0
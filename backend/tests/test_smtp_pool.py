@@ -0,0 +1,89 @@
+"""SMTPPool against a local aiosmtpd server: session reuse, per-message results, reconnection."""
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+from app.services.smtp_pool import SMTPPool
+
+
+class _Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("reject"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos)))
+        return "250 Message accepted"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = _Inbox()
+    controllers = [Controller(inbox, hostname="127.0.0.1", port=_free_port())]
+    controllers[0].start()
+
+    def restart() -> None:
+        """Stop the server (closing its sessions) and start a new one on the same port."""
+        controllers[-1].stop()
+        controllers.append(Controller(inbox, hostname="127.0.0.1", port=controllers[0].port))
+        controllers[-1].start()
+
+    try:
+        yield controllers[0], inbox, restart
+    finally:
+        controllers[-1].stop()
+
+
+def _pool(controller, size: int = 1) -> SMTPPool:
+    return SMTPPool(size, host=controller.hostname, port=controller.port, user="", starttls=False, timeout=5)
+
+
+def _message(n: int) -> MIMEText:
+    msg = MIMEText(f"Reminder {n}", "plain", "utf-8")
+    msg["Subject"] = f"Reminder {n}"
+    return msg
+
+
+def test_messages_share_one_session(smtp_server):
+    controller, inbox, _restart = smtp_server
+    with _pool(controller) as pool:
+        results = [pool.send(_message(n), "noreply@jelba.ma", [f"parent{n}@example.ma"]) for n in range(5)]
+        assert results == [True] * 5
+        assert pool.connections_opened == 1
+        # A rejected recipient fails that message only; the session stays usable
+        assert pool.send(_message(5), "noreply@jelba.ma", ["reject@example.ma"]) is False
+        assert pool.send(_message(6), "noreply@jelba.ma", ["parent6@example.ma"]) is True
+        assert (pool.sent, pool.failed, pool.connections_opened) == (6, 1, 1)
+    assert [rcpt for _, rcpt in inbox.messages] == [[f"parent{n}@example.ma"] for n in (0, 1, 2, 3, 4, 6)]
+
+
+def test_reconnects_after_server_drops_session(smtp_server):
+    controller, inbox, restart = smtp_server
+    with _pool(controller) as pool:
+        assert pool.send(_message(0), "noreply@jelba.ma", ["a@example.ma"])
+        # Server restart: the pooled session is dead
+        restart()
+        assert pool.send(_message(1), "noreply@jelba.ma", ["b@example.ma"])
+        assert pool.connections_opened == 2
+    assert [rcpt for _, rcpt in inbox.messages] == [["a@example.ma"], ["b@example.ma"]]
+
+
+def test_unreachable_server_reports_failure():
+    with SMTPPool(1, host="127.0.0.1", port=_free_port(), user="", starttls=False, timeout=2) as pool:
+        assert pool.send(_message(0), "noreply@jelba.ma", ["a@example.ma"]) is False
+        assert pool.failed == 1
@@ -0,0 +1,45 @@
+"""Stock ledger: balances move with movements; the national store only changes by receipt/transfer."""
+import logging
+
+from app.models.child import Child
+from app.models.child_vaccination import ChildVaccination
+from app.models.national_stock import NationalStock
+from app.models.region import Region
+from app.models.stock_movement import StockMovement
+from app.services.stock_service import on_dose_administered, record_receipt, stock_balances, transfer_stock
+
+
+def _national(db, vaccine_name: str) -> int | None:
+    return db.query(NationalStock.current_stock).filter(NationalStock.vaccine_name == vaccine_name).scalar()
+
+
+def test_dose_without_region_leaves_national_store_alone(db):
+    vaccine_name = "NO-SUCH-VACCINE"
+    movements = db.query(StockMovement).count()
+    on_dose_administered(db, ChildVaccination(vaccine_name=vaccine_name, child=Child(effective_region_id=None)))
+    db.flush()
+    assert _national(db, vaccine_name) is None
+    assert db.query(StockMovement).count() == movements
+
+
+def test_receipt_transfer_and_dose_balances(db, caplog):
+    vaccine_name = "TEST-VACCINE"
+    region_a, region_b = [r for (r,) in db.query(Region.id).order_by(Region.id).limit(2)]
+    record_receipt(db, vaccine_name, 10)
+    assert _national(db, vaccine_name) == 10
+
+    assert transfer_stock(db, vaccine_name, 4, from_region_id=None, to_region_id=region_a)
+    assert not transfer_stock(db, vaccine_name, 7, from_region_id=None, to_region_id=region_a)
+    assert _national(db, vaccine_name) == 6
+    assert stock_balances(db)[vaccine_name] == {region_a: 4}
+
+    child = Child(effective_region_id=region_a)
+    on_dose_administered(db, ChildVaccination(vaccine_name=vaccine_name, child=child))
+    assert stock_balances(db)[vaccine_name] == {region_a: 3}
+
+    # A region with no stock goes negative (intended) and is flagged
+    with caplog.at_level(logging.WARNING, logger="app.services.stock_service"):
+        on_dose_administered(db, ChildVaccination(vaccine_name=vaccine_name, child=Child(effective_region_id=region_b)))
+    assert stock_balances(db)[vaccine_name][region_b] == -1
+    assert "dose recorded before stock was received" in caplog.text
+    assert _national(db, vaccine_name) == 6
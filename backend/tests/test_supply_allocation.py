@@ -0,0 +1,72 @@
+"""National store allocation: whole doses, never more than the store or a region's net need, totals add up."""
+import random
+
+import pytest
+
+from app.services.stock_service import record_receipt
+from app.services.supply_service import allocate_by_priority, allocate_largest_remainder, get_supply_all
+
+
+def test_largest_remainder_splits_exactly():
+    assert allocate_largest_remainder(10, {1: 10, 2: 10, 3: 10}) == {1: 4, 2: 3, 3: 3}
+    assert allocate_largest_remainder(0, {1: 5}) == {1: 0}
+    # Stock above need: everyone gets their need
+    assert allocate_largest_remainder(100, {1: 5, 2: 7}) == {1: 5, 2: 7}
+
+
+def test_random_allocations_total_available_supply():
+    rng = random.Random(7)
+    for _ in range(200):
+        needs = {k: rng.randint(0, 500) for k in range(rng.randint(1, 12))}
+        amount = rng.randint(0, 3000)
+        expected = min(amount, sum(needs.values()))
+        keys = list(needs)
+        tiers = [keys[: len(keys) // 3], keys[len(keys) // 3:]]
+        for shares in (allocate_largest_remainder(amount, needs), allocate_by_priority(amount, needs, tiers)):
+            assert sum(shares.values()) == expected
+            assert all(0 <= shares[k] <= needs[k] for k in needs)
+
+
+def test_priority_serves_first_tier_in_full():
+    shares = allocate_by_priority(10, {1: 6, 2: 6, 3: 6}, [[2], [1, 3]])
+    assert shares == {1: 2, 2: 6, 3: 2}
+
+
+@pytest.mark.parametrize("allocation", ["proportional", "priority"])
+def test_supply_all_allocates_national_store(db, allocation):
+    result = get_supply_all(db, allocation)
+    assert result["vaccines"]
+    for vaccine in result["vaccines"]:
+        national = vaccine["national"]
+        regions = vaccine["regions"]
+        assert all(r["net_need"] == max(0, r["projected_need"] - r["region_stock"]) for r in regions)
+        net_total = sum(r["net_need"] for r in regions)
+        assert national["allocated_total"] == min(max(national["national_store"], 0), net_total)
+        assert national["allocated_total"] == sum(r["allocated"] for r in regions)
+        assert all(r["unmet_need"] == r["net_need"] - r["allocated"] for r in regions)
+
+
+@pytest.mark.parametrize("allocation", ["proportional", "priority"])
+def test_regional_stock_is_not_allocated_again(db, allocation):
+    vaccine_name = "BCG"
+    regions = {r["region_id"]: r for r in _vaccine(get_supply_all(db, allocation), vaccine_name)["regions"]}
+    # Region 1 already holds its whole need, region 2 part of it; the store can cover every region
+    need_1, need_2 = regions[1]["projected_need"], regions[2]["projected_need"]
+    record_receipt(db, vaccine_name, need_1 - regions[1]["region_stock"], region_id=1)
+    record_receipt(db, vaccine_name, need_2 // 2 - regions[2]["region_stock"], region_id=2)
+    record_receipt(db, vaccine_name, sum(r["projected_need"] for r in regions.values()))
+    db.commit()
+
+    vaccine = _vaccine(get_supply_all(db, allocation), vaccine_name)
+    regions = {r["region_id"]: r for r in vaccine["regions"]}
+    assert regions[1]["allocated"] == 0
+    assert regions[2]["allocated"] == need_2 - need_2 // 2
+    assert all(r["unmet_need"] == 0 for r in regions.values())
+    # Only the doses regions still need leave the store
+    assert vaccine["national"]["allocated_total"] == sum(
+        max(0, r["projected_need"] - r["region_stock"]) for r in regions.values()
+    )
+
+
+def _vaccine(result: dict, vaccine_name: str) -> dict:
+    return next(v for v in result["vaccines"] if v["vaccine_name"] == vaccine_name)
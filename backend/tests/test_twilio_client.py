@@ -0,0 +1,72 @@
+"""Twilio pacing and retries, against a fake HTTP client (no network)."""
+import email.utils
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.services import twilio_client
+from app.services.twilio_client import TokenBucket, _PacedHttpClient, _retry_after
+
+
+class _FakeHttp:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, *args, **kwargs):
+        self.calls.append((method, url))
+        return self.responses.pop(0)
+
+
+def _response(status: int, **headers) -> SimpleNamespace:
+    return SimpleNamespace(status_code=status, headers=headers)
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # Two from the burst, then one every 50 ms
+    assert time.monotonic() - start >= 0.09
+
+
+def test_unpaced_bucket_never_waits():
+    bucket = TokenBucket(rate=0)
+    start = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_retry_after_seconds_and_http_date():
+    assert _retry_after({"Retry-After": "2"}) == 2.0
+    assert _retry_after({}) is None
+    assert _retry_after({"Retry-After": "soon"}) is None
+    when = email.utils.format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= _retry_after({"Retry-After": when}) <= 30
+
+
+def test_throttled_create_is_retried(monkeypatch):
+    monkeypatch.setattr(twilio_client.settings, "twilio_retry_backoff_seconds", 0.01)
+    inner = _FakeHttp(_response(429, **{"Retry-After": "0"}), _response(201))
+    bucket = TokenBucket(rate=0)
+    http = _PacedHttpClient(inner, {"/Messages.json": bucket})
+    assert http.request("POST", "https://api.twilio.com/Accounts/AC1/Messages.json").status_code == 201
+    assert http.last_attempts == 2
+    assert len(inner.calls) == 2
+
+
+def test_long_retry_after_is_left_to_the_outbox(monkeypatch):
+    monkeypatch.setattr(twilio_client.settings, "twilio_retry_max_wait_seconds", 5)
+    inner = _FakeHttp(_response(429, **{"Retry-After": "60"}))
+    http = _PacedHttpClient(inner, {})
+    assert http.request("POST", "https://api.twilio.com/Accounts/AC1/Calls.json").status_code == 429
+    assert http.last_attempts == 1
+
+
+def test_client_errors_are_not_retried():
+    inner = _FakeHttp(_response(400))
+    http = _PacedHttpClient(inner, {})
+    assert http.request("POST", "https://api.twilio.com/Accounts/AC1/Messages.json").status_code == 400
+    assert len(inner.calls) == 1